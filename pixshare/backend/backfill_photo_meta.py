@@ -0,0 +1,87 @@
+# backend/backfill_photo_meta.py
+"""
+Fill Photo.width / height / placeholder / phash / checksum for photos
+uploaded before they were computed at ingest.
+
+    python backfill_photo_meta.py                 # all photos missing a placeholder or a hash
+    python backfill_photo_meta.py --workers 8 --batch-size 500
+    python backfill_photo_meta.py --force         # recompute everything
+
+Walks the photo table by id in batches; image decoding runs in a process pool
+and each batch is written back with one executemany UPDATE. Safe to interrupt
+and re-run: finished photos are skipped. Cold-tier originals are read in
+place, without thawing them.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import or_, select, update
+
+from app import app
+from extensions import db
+from models.photo import Photo
+from routes.photos import BASE_UPLOAD_DIR
+from utils.checksums import stream_checksum
+from utils.cold_storage import open_original
+from utils.event_manifest import invalidate_album_manifests
+from utils.imaging import Image, probe_image
+
+
+def _probe(item):
+    photo_id, rel_path = item
+    # Decode, then hash, whichever tier has the original; cold ones aren't thawed
+    fh = open_original(BASE_UPLOAD_DIR, rel_path)
+    if fh is None:
+        return photo_id, {"width": None, "height": None, "placeholder": None, "phash": None, "checksum": None}
+    with fh:
+        meta = probe_image(fh)
+    checksum = None
+    fh = open_original(BASE_UPLOAD_DIR, rel_path)
+    if fh is not None:
+        with fh:
+            checksum = stream_checksum(fh)
+    return photo_id, {**meta, "checksum": checksum}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill photo dimensions, placeholders, perceptual hashes and checksums.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--force", action="store_true", help="recompute photos that already have metadata")
+    args = parser.parse_args()
+
+    if Image is None:
+        raise SystemExit("backfill_photo_meta.py needs Pillow: pip install pillow")
+
+    done = failed = 0
+    last_id = 0
+    started = time.perf_counter()
+    with app.app_context(), ProcessPoolExecutor(max_workers=args.workers) as pool:
+        while True:
+            q = select(Photo.id, Photo.filepath, Photo.album_id).where(Photo.id > last_id)
+            if not args.force:
+                q = q.where(or_(Photo.placeholder.is_(None), Photo.phash.is_(None), Photo.checksum.is_(None)))
+            rows = db.session.execute(q.order_by(Photo.id).limit(args.batch_size)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            results = list(pool.map(_probe, [(r.id, r.filepath) for r in rows], chunksize=16))
+            # a file that isn't a readable image still gets its checksum
+            updates = [{"id": pid, **meta} for pid, meta in results if meta["checksum"] is not None]
+            failed += sum(1 for _, meta in results if meta["width"] is None)
+            if updates:
+                db.session.execute(update(Photo), updates)
+                db.session.commit()
+                invalidate_album_manifests({r.album_id for r in rows})
+            done += len(updates)
+            print(f"  up to id {last_id}: {done} updated, {failed} unreadable "
+                  f"({done / max(time.perf_counter() - started, 1e-6):.0f}/s)")
+
+    print(f"Done: {done} photo(s) updated, {failed} could not be read.")
+
+
+if __name__ == "__main__":
+    main()
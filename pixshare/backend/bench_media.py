@@ -0,0 +1,143 @@
+# backend/bench_media.py
+"""
+Concurrent slow downloads vs. API latency.
+
+Measures API latency (GET /api/albums) first on an idle server, then while
+N slow clients are downloading a large file from /uploads at a throttled rate.
+Run it once with --media-url pointing at the Flask app and once pointing at
+media_server.py to compare:
+
+    python app.py &                 # API (and sync /uploads) on :5172
+    python media_server.py &        # async /uploads on :5174
+    python bench_media.py --media-url http://127.0.0.1:5172   # sync media
+    python bench_media.py --media-url http://127.0.0.1:5174   # async media
+
+Uses the dataset summary written by database_gen.py (same DATABASE_URL) for
+the user and album; a throw-away blob of --blob-mb MB is written into that
+album's folder for the duration of the run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from flask_jwt_extended import create_access_token
+
+from app import app
+from config import Config
+from database_gen import DATASET_FILE
+
+
+async def _http_get(url: str, headers: dict, read_rate: float = 0.0, stop: asyncio.Event | None = None) -> int:
+    """Minimal HTTP/1.1 GET; returns body bytes read. read_rate (bytes/s) throttles the reader."""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    lines = [f"GET {target} HTTP/1.1", f"Host: {parts.netloc}", "Connection: close"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+
+    await reader.readuntil(b"\r\n\r\n")
+    total = 0
+    chunk = 16 * 1024 if read_rate else 256 * 1024
+    try:
+        while True:
+            if stop is not None and stop.is_set():
+                break
+            data = await reader.read(chunk)
+            if not data:
+                break
+            total += len(data)
+            if read_rate:
+                await asyncio.sleep(len(data) / read_rate)
+    finally:
+        writer.close()
+    return total
+
+
+async def _measure_api(url: str, headers: dict, n: int) -> list[float]:
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        await _http_get(url, headers)
+        out.append((time.perf_counter() - t0) * 1000.0)
+    return out
+
+
+async def _slow_client(url: str, rate: float, stop: asyncio.Event, counters: dict):
+    while not stop.is_set():
+        try:
+            counters["bytes"] += await _http_get(url, {}, read_rate=rate, stop=stop)
+            if not stop.is_set():
+                counters["downloads"] += 1
+        except (OSError, asyncio.IncompleteReadError):
+            counters["errors"] += 1
+            await asyncio.sleep(0.1)
+
+
+def _summary(label: str, ms: list[float]):
+    ms = sorted(ms)
+    q = statistics.quantiles(ms, n=100) if len(ms) > 1 else [ms[0]] * 99
+    print(f"{label:<28} p50={q[49]:8.1f} ms  p95={q[94]:8.1f} ms  p99={q[98]:8.1f} ms  (n={len(ms)})")
+
+
+async def _run(args, api_headers: dict, media_url: str):
+    api_url = args.api_url.rstrip("/") + "/api/albums"
+
+    idle = await _measure_api(api_url, api_headers, args.api_requests)
+    _summary("API latency, idle", idle)
+
+    stop = asyncio.Event()
+    counters = {"bytes": 0, "downloads": 0, "errors": 0}
+    clients = [
+        asyncio.create_task(_slow_client(media_url, args.rate_kb * 1024, stop, counters))
+        for _ in range(args.slow_clients)
+    ]
+    await asyncio.sleep(args.ramp)
+    loaded = await asyncio.wait_for(
+        _measure_api(api_url, api_headers, args.api_requests), timeout=args.timeout
+    )
+    stop.set()
+    await asyncio.gather(*clients, return_exceptions=True)
+
+    _summary(f"API latency, {args.slow_clients} slow dl", loaded)
+    print(f"slow downloads: {counters['bytes'] / 1024 / 1024:.1f} MB read, "
+          f"{counters['downloads']} completed, {counters['errors']} errors")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark API latency under concurrent slow media downloads.")
+    p.add_argument("--api-url", default="http://127.0.0.1:5172")
+    p.add_argument("--media-url", default="http://127.0.0.1:5174")
+    p.add_argument("--slow-clients", type=int, default=32)
+    p.add_argument("--rate-kb", type=float, default=64, help="per-client download rate in KB/s")
+    p.add_argument("--blob-mb", type=float, default=8, help="size of the file the slow clients download")
+    p.add_argument("--api-requests", type=int, default=50)
+    p.add_argument("--ramp", type=float, default=1.0, help="seconds to let downloads start")
+    p.add_argument("--timeout", type=float, default=120.0)
+    args = p.parse_args()
+
+    with open(DATASET_FILE) as fh:
+        ds = json.load(fh)
+    with app.app_context():
+        jwt_token = create_access_token(identity=str(ds["user_id"]))
+
+    rel = f"photos/{ds['user_id']}/{ds['big_album_id']}/_bench_media_blob.bin"
+    blob = os.path.join(Config.UPLOAD_ROOT, rel)
+    os.makedirs(os.path.dirname(blob), exist_ok=True)
+    with open(blob, "wb") as fh:
+        fh.write(os.urandom(int(args.blob_mb * 1024 * 1024)))
+
+    media_url = f"{args.media_url.rstrip('/')}/uploads/{rel}?a={jwt_token}"
+    try:
+        asyncio.run(_run(args, {"Authorization": f"Bearer {jwt_token}"}, media_url))
+    finally:
+        os.remove(blob)
+
+
+if __name__ == "__main__":
+    main()
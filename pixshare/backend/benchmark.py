@@ -0,0 +1,179 @@
+# backend/benchmark.py
+"""
+Endpoint benchmark suite.
+
+Drives the Flask app in-process (test client, no network) against the dataset
+produced by database_gen.py and reports p50/p95/p99 latency plus SQL queries
+per request for each scenario.
+
+    DATABASE_URL=sqlite:////tmp/bench.db python database_gen.py --reset --users 20 --big-album-photos 10000
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmark.py -n 200 --save-baseline main
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmark.py -n 200 --compare main
+
+Baselines are stored as JSON under instance/benchmarks/<name>.json.
+Note: the "upload" and "comment_create" scenarios write to the database.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app import app
+from database_gen import DATASET_FILE, make_png
+from utils.metrics import count_queries
+
+BENCH_DIR = os.path.dirname(DATASET_FILE)
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _scenarios(ds: dict, owner_jwt: str, participant_jwt: str | None):
+    """name -> callable(client, i) returning a response."""
+    auth = {"Authorization": f"Bearer {owner_jwt}"}
+    album_id = ds["big_album_id"]
+    photo_path = ds["sample_photo_path"]
+    photo_id = ds["sample_photo_id"]
+    rng = random.Random(ds.get("seed", 1))
+
+    s = {
+        "albums_list": lambda c, i: c.get("/api/albums", headers=auth),
+        "album_photos_big": lambda c, i: c.get(f"/api/albums/{album_id}/photos", headers=auth),
+        "events_list": lambda c, i: c.get("/api/events", headers=auth),
+        "dashboard_storage": lambda c, i: c.get("/api/dashboard/storage", headers=auth),
+        "comments_list": lambda c, i: c.get(f"/api/photos/{photo_id}/comments", headers=auth),
+        "comment_create": lambda c, i: c.post(
+            f"/api/photos/{photo_id}/comments", json={"content": f"bench {i}"}, headers=auth
+        ),
+        "uploads_owner": lambda c, i: c.get(f"/uploads/{photo_path}?a={owner_jwt}"),
+        "upload": lambda c, i: c.post(
+            f"/api/albums/{album_id}/photos",
+            data={"photos": (io.BytesIO(make_png(16, 16, rng)), f"bench_{time.time_ns()}_{i}.png")},
+            headers=auth,
+            content_type="multipart/form-data",
+        ),
+    }
+    if ds.get("event_id"):
+        s["event_get"] = lambda c, i: c.get(f"/api/events/{ds['event_id']}", headers=auth)
+    if ds.get("event_share_token"):
+        s["event_share_open"] = lambda c, i: c.get(f"/api/s/{ds['event_share_token']}/event")
+    if ds.get("album_share_token"):
+        s["album_share_open"] = lambda c, i: c.get(f"/api/s/{ds['album_share_token']}/album")
+        s["uploads_album_share"] = lambda c, i: c.get(f"/uploads/{photo_path}?t={ds['album_share_token']}")
+    if participant_jwt:
+        s["uploads_participant"] = lambda c, i: c.get(f"/uploads/{photo_path}?a={participant_jwt}")
+    return s
+
+
+def run(names, n: int, warmup: int) -> dict:
+    with open(DATASET_FILE) as fh:
+        ds = json.load(fh)
+
+    with app.app_context():
+        owner_jwt = create_access_token(identity=str(ds["user_id"]))
+        participant_jwt = (
+            create_access_token(identity=str(ds["participant_user_id"]))
+            if ds.get("participant_user_id") else None
+        )
+
+    scenarios = _scenarios(ds, owner_jwt, participant_jwt)
+    if names:
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            sys.exit(f"Unknown scenario(s): {', '.join(sorted(unknown))}. Available: {', '.join(sorted(scenarios))}")
+        scenarios = {k: v for k, v in scenarios.items() if k in names}
+
+    client = app.test_client()
+    results = {}
+    for name, call in scenarios.items():
+        for i in range(warmup):
+            call(client, -1 - i).close()
+
+        timings, queries, statuses = [], [], set()
+        for i in range(n):
+            with count_queries() as qc:
+                t0 = time.perf_counter()
+                resp = call(client, i)
+                _ = resp.get_data()  # include body/file read in the timing
+                timings.append((time.perf_counter() - t0) * 1000.0)
+            resp.close()
+            queries.append(qc.count)
+            statuses.add(resp.status_code)
+
+        timings.sort()
+        results[name] = {
+            "n": n,
+            "p50_ms": round(_percentile(timings, 50), 3),
+            "p95_ms": round(_percentile(timings, 95), 3),
+            "p99_ms": round(_percentile(timings, 99), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "queries_per_request": round(statistics.fmean(queries), 2),
+            "max_queries": max(queries),
+            "statuses": sorted(statuses),
+        }
+    return {"dataset": ds.get("counts"), "results": results}
+
+
+def _print_report(report: dict, baseline: dict | None):
+    hdr = f"{'scenario':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>8}  status"
+    if baseline:
+        hdr += "   Δp50     Δp95    Δq/req"
+    print(hdr)
+    print("-" * len(hdr))
+    base_results = (baseline or {}).get("results", {})
+    for name, r in report["results"].items():
+        line = (
+            f"{name:<22}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+            f"{r['queries_per_request']:>8.1f}  {','.join(map(str, r['statuses']))}"
+        )
+        b = base_results.get(name)
+        if b:
+            def pct(new, old):
+                return f"{(new - old) / old * 100:+7.1f}%" if old else "    n/a"
+            line += f"  {pct(r['p50_ms'], b['p50_ms'])}  {pct(r['p95_ms'], b['p95_ms'])}  {r['queries_per_request'] - b['queries_per_request']:+7.1f}"
+        print(line)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark PixShare endpoints against the synthetic dataset.")
+    p.add_argument("scenarios", nargs="*", help="subset of scenarios to run (default: all)")
+    p.add_argument("-n", type=int, default=100, help="requests per scenario")
+    p.add_argument("--warmup", type=int, default=5)
+    p.add_argument("--save-baseline", metavar="NAME")
+    p.add_argument("--compare", metavar="NAME", help="compare against a stored baseline")
+    args = p.parse_args()
+
+    if not os.path.exists(DATASET_FILE):
+        sys.exit(f"No dataset summary at {DATASET_FILE}; run database_gen.py --users N first.")
+
+    baseline = None
+    if args.compare:
+        path = os.path.join(BENCH_DIR, f"{args.compare}.json")
+        with open(path) as fh:
+            baseline = json.load(fh)
+
+    report = run(args.scenarios, args.n, args.warmup)
+    _print_report(report, baseline)
+
+    if args.save_baseline:
+        path = os.path.join(BENCH_DIR, f"{args.save_baseline}.json")
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        with open(path, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nBaseline saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# backend/build_similarity_index.py
+"""
+(Re)build the "more like this" vector index (utils/similarity.py) from the
+original files — for photos uploaded before it existed, or if SIMILARITY_DIR
+was lost.
+
+    python build_similarity_index.py               # every user
+    python build_similarity_index.py --user 12     # one user
+    python build_similarity_index.py --workers 8
+
+Feature extraction runs in a process pool; each user's index is replaced in
+one go, so queries keep using the old one until the new one is written.
+Cold-tier originals are read in place, without thawing them.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import select
+
+from app import app
+from extensions import db
+from models.photo import Photo
+from routes.photos import BASE_UPLOAD_DIR
+from utils.cold_storage import open_original
+from utils.similarity import feature_vector, similarity_available, similarity_index
+
+
+def _vector(item):
+    photo_id, album_id, rel_path = item
+    fh = open_original(BASE_UPLOAD_DIR, rel_path)  # cold-tier originals are read in place
+    if fh is None:
+        return photo_id, album_id, None
+    with fh:
+        return photo_id, album_id, feature_vector(fh)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild per-user photo similarity indexes.")
+    parser.add_argument("--user", type=int, help="only this user id")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    if not similarity_available():
+        raise SystemExit("build_similarity_index.py needs NumPy and Pillow: pip install numpy pillow")
+
+    with app.app_context(), ProcessPoolExecutor(max_workers=args.workers) as pool:
+        q = select(Photo.user_id).distinct()
+        if args.user:
+            q = q.where(Photo.user_id == args.user)
+        user_ids = [row[0] for row in db.session.execute(q.order_by(Photo.user_id))]
+
+        for user_id in user_ids:
+            started = time.perf_counter()
+            rows = db.session.execute(
+                select(Photo.id, Photo.album_id, Photo.filepath)
+                .where(Photo.user_id == user_id)
+                .order_by(Photo.id)
+            ).all()
+            items = list(pool.map(_vector, [tuple(r) for r in rows], chunksize=32))
+            similarity_index.rebuild(user_id, items)
+            indexed = sum(1 for _, _, vec in items if vec is not None)
+            print(f"  user {user_id}: {indexed}/{len(items)} photo(s) indexed "
+                  f"in {time.perf_counter() - started:.1f}s")
+
+    print(f"Done: {len(user_ids)} user(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# backend/build_timeline.py
+"""
+Recompute the GET /timeline rollups (models.timeline_bucket) from the photo
+table — after bulk imports that bypass the upload routes, or to repair drift.
+
+    python build_timeline.py
+"""
+import time
+
+from app import app
+from utils.timeline import rebuild_timeline
+
+
+def main():
+    started = time.perf_counter()
+    with app.app_context():
+        n = rebuild_timeline()
+    print(f"Done: {n} timeline bucket(s) in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
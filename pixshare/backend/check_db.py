@@ -1,5 +1,30 @@
+# backend/check_db.py
+"""Print the database URL, row counts per table and what is on disk under uploads/photos."""
+import os
+
+from sqlalchemy import func, inspect, select
+
 from app import app
 from extensions import db
+from routes.photos import UPLOAD_FOLDER
 
 with app.app_context():
-    print(db.engine.url) 
\ No newline at end of file
+    print(db.engine.url)
+
+    existing = set(inspect(db.engine).get_table_names())
+    for name, table in sorted(db.metadata.tables.items()):
+        if name not in existing:
+            print(f"  {name:<20} (missing — run database_gen.py)")
+            continue
+        n = db.session.execute(select(func.count()).select_from(table)).scalar()
+        print(f"  {name:<20} {n:>10}")
+
+    files = total = 0
+    for root, _dirs, names in os.walk(UPLOAD_FOLDER):
+        for n in names:
+            files += 1
+            try:
+                total += os.path.getsize(os.path.join(root, n))
+            except OSError:
+                pass
+    print(f"  uploads/photos       {files:>10} files, {total / (1024 ** 2):.1f} MB")
@@ -0,0 +1,391 @@
+# backend/check_query_budget.py
+"""
+SQL query budget check for every blueprint route.
+
+Seeds a throw-away SQLite database twice, at a small and a large data size,
+hits every /api route (plus /uploads) and asserts that:
+  - each request stays within its fixed statement budget, and
+  - the statement count is the same at both sizes (no N+1 / scaling queries).
+
+Any route registered on a blueprint without an entry in BUDGETS also fails,
+so new endpoints have to declare a budget.
+
+    python check_query_budget.py            # exit code 1 on any violation
+    python check_query_budget.py -v         # also print the SQL of failing requests
+    python -m pytest tests                  # the same checks as tests (tests/test_query_budget.py)
+
+Runs against a temporary database and upload root; your real data is untouched.
+"""
+import argparse
+import atexit
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="pixshare-budget-")
+atexit.register(shutil.rmtree, _TMP, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'budget.db')}"
+os.environ["UPLOAD_ROOT"] = os.path.join(_TMP, "uploads")
+os.environ["MANIFEST_DIR"] = os.path.join(_TMP, "manifests")
+os.environ["SPRITE_DIR"] = os.path.join(_TMP, "sprites")
+os.environ["RENDER_CACHE_DIR"] = os.path.join(_TMP, "renders")
+os.environ["SIMILARITY_DIR"] = os.path.join(_TMP, "similarity")
+os.environ.setdefault("JWT_SECRET_KEY", "query-budget-check-secret-0123456789")
+os.environ["METRICS_ENABLED"] = "0"
+os.environ["SHARE_RATE_LIMIT_ENABLED"] = "0"
+os.environ["SHARE_SWEEP_INTERVAL_SECONDS"] = "0"
+os.environ["ACTIVITY_FLUSH_SECONDS"] = "0"
+os.environ["SHARE_FILTER_REFRESH_SECONDS"] = "3600"  # no timing-dependent catch-up queries
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import app  # noqa: E402
+from extensions import db, bcrypt  # noqa: E402
+from models.user import User  # noqa: E402
+from models.album import Album  # noqa: E402
+from models.photo import Photo  # noqa: E402
+from models.comment import Comment  # noqa: E402
+from utils.share_tokens import share_token_filter  # noqa: E402
+from models.event import Event  # noqa: E402
+from models.event_albums import event_albums  # noqa: E402
+from models.event_participant import EventParticipant  # noqa: E402
+from models.share import Share  # noqa: E402
+from models.photo_edit import PhotoEdit  # noqa: E402
+from utils.metrics import count_queries  # noqa: E402
+from utils.similarity import feature_vector, similarity_index  # noqa: E402
+from utils.timeline import rebuild_timeline  # noqa: E402
+
+SMALL, LARGE = 1, 6
+
+# 2x2 RGB PNG, so routes that decode images (sprites, renders) do real work
+_PNG = (b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x02\x00\x00\x00\x02\x08\x02\x00\x00\x00\xfd\xd4\x9as"
+        b"\x00\x00\x00\x16IDATx\x9cc<\x91b\xc4\xc0\xc0\xc0\xc4\xc0\xc0\xc0\xc0\xc0\x00\x00\x11(\x01b\xa6 *\xa0"
+        b"\x00\x00\x00\x00IEND\xaeB`\x82")
+
+# endpoint -> max statements per request. Each request is issued once per data size.
+BUDGETS = {
+    "auth.register": 3,
+    "auth.login": 1,
+    "auth.logout": 0,
+    "dashboard.get_storage_usage": 1,
+    "dashboard.get_recent_albums": 1,
+    "dashboard.get_timeline": 2,
+    "dashboard.get_bootstrap": 4,
+    "albums.get_albums": 1,
+    "albums.get_album": 4,
+    "albums.get_photos": 4,
+    "albums.create_album": 2,
+    "albums.get_album_duplicates": 4,
+    "albums.get_album_sprite_map": 4,
+    "albums.get_album_sprite": 4,
+    "albums.delete_album": 10,
+    "photos.upload_photos": 6,
+    "photos.upload_via_share": 9,
+    "photos.similar_photos": 3,
+    "photos.delete_photo": 7,
+    "photos.copy_photo": 8,
+    "photos.copy_photos": 9,
+    "photos.move_photo": 10,
+    "photos.move_photos": 10,
+    "photos.precheck_uploads": 7,
+    "events.list_events": 2,
+    "events.create_event": 4,
+    "events.get_event": 3,
+    "events.get_event_photos": 3,
+    "events.get_event_duplicates": 3,
+    "events.delete_event": 6,
+    "events.add_albums_to_event": 6,
+    "events.remove_album_from_event": 3,
+    "events.add_event_from_shared_qs": 7,
+    "events.add_event_from_shared_path": 7,
+    "shares.create_album_share": 3,
+    "shares.create_photo_share": 3,
+    "shares.create_event_share": 3,
+    "shares.revoke_share": 5,
+    "shares.open_album_share": 3,
+    "shares.open_photo_share": 2,
+    "shares.open_event_share": 4,
+    "shares.resolve_share": 1,
+    "comments.list_comments": 5,
+    "comments.latest_comments": 3,
+    "comments.create_comment": 7,
+    "comments.delete_comment": 4,
+    "edits.get_edit": 2,
+    "edits.save_edit": 3,
+    "edits.delete_edit": 2,
+    "edits.render_photo": 3,
+    "accounts.get_profile": 1,
+    "accounts.update_profile": 3,
+    "accounts.change_password": 1,
+    "serve_uploads": 2,
+}
+
+# Routes that need no budget: non-API routes, and photos.get_photos, which is
+# shadowed by albums.get_photos (same URL, registered first) and never dispatched.
+_EXEMPT = {"static", "metrics", "photos.get_photos"}
+
+
+def _seed(scale: int) -> dict:
+    """Owner with `scale` albums of 3*scale photos each, an event with those albums,
+    `scale` participants/commenters, and one share of every kind."""
+    db.drop_all()
+    db.create_all()
+
+    pw = bcrypt.generate_password_hash("budget-pass").decode("utf-8")
+    owner = User(full_name="Owner", email="owner@example.com", password_hash=pw)
+    others = [User(full_name=f"Guest {i}", email=f"u{i}@example.com", password_hash=pw) for i in range(scale)]
+    db.session.add_all([owner, *others])
+    db.session.flush()
+
+    albums = [Album(title=f"Album {i}", user_id=owner.id) for i in range(scale)]
+    db.session.add_all(albums)
+    db.session.flush()
+
+    photos = []
+    for a in albums:
+        for k in range(3 * scale):
+            rel = f"photos/{owner.id}/{a.id}/p{k}.png"
+            full = os.path.join(app.config["UPLOAD_ROOT"], rel)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "wb") as fh:
+                fh.write(_PNG)
+            photos.append(Photo(filename=f"p{k}.png", filepath=rel, album_id=a.id, user_id=owner.id, size=len(_PNG),
+                                checksum=hashlib.sha256(_PNG).hexdigest()))
+    db.session.add_all(photos)
+    db.session.flush()
+
+    spare_album = Album(title="Spare", user_id=owner.id)  # copy/move target outside the event
+    ev = Event(title="Event", share_id=f"ev-{scale}", user_id=owner.id)
+    spare_ev = Event(title="Spare", share_id=f"spare-{scale}", user_id=owner.id)
+    db.session.add(PhotoEdit(photo_id=photos[0].id, user_id=owner.id, recipe='{"rotate":90}',
+                             recipe_hash="budget-edit"))
+    db.session.add_all([spare_album, ev, spare_ev])
+    db.session.flush()
+    db.session.execute(event_albums.insert(), [{"event_id": ev.id, "album_id": a.id} for a in albums])
+
+    ev_share = Share(token=f"event-{scale}", event_id=ev.id, can_comment=True)
+    al_share = Share(token=f"album-{scale}", album_id=albums[0].id, can_comment=True,
+                     can_upload=True, max_files_per_guest=10, max_upload_bytes=1 << 20)
+    ph_share = Share(token=f"photo-{scale}", photo_id=photos[0].id, can_comment=True)
+    spare_share = Share(token=f"spare-{scale}", event_id=spare_ev.id)
+    db.session.add_all([ev_share, al_share, ph_share, spare_share])
+    for u in others:
+        db.session.add(EventParticipant(event_id=ev.id, user_id=u.id, share_token=ev_share.token))
+
+    for p in photos[:2]:
+        for u in [owner, *others]:
+            for n in range(scale):
+                db.session.add(Comment(content=f"c{n}", photo_id=p.id, user_id=u.id))
+    db.session.commit()
+
+    owner_jwt = create_access_token(identity=str(owner.id))
+    joiner = User(full_name="Joiner", email="joiner@example.com", password_hash=pw)
+    db.session.add(joiner)
+    db.session.commit()
+    share_token_filter.build()  # drop_all/create_all above bypasses share creation
+    rebuild_timeline()
+    similarity_index.rebuild(owner.id, [
+        (p.id, p.album_id, feature_vector(os.path.join(app.config["UPLOAD_ROOT"], p.filepath))) for p in photos
+    ])
+    return {
+        "owner_jwt": owner_jwt,
+        "participant_jwt": create_access_token(identity=str(others[0].id)),
+        "joiner_jwt": create_access_token(identity=str(joiner.id)),
+        "album_id": albums[0].id,
+        "last_album_id": albums[-1].id,
+        "spare_album_id": spare_album.id,
+        "photo_id": photos[0].id,
+        "photo_path": photos[0].filepath,
+        "last_photo_id": photos[-1].id,
+        "event_id": ev.id,
+        "spare_event_id": spare_ev.id,
+        "event_token": ev_share.token,
+        "album_token": al_share.token,
+        "photo_token": ph_share.token,
+        "spare_share_id": spare_share.id,
+        "comment_id": Comment.query.filter_by(photo_id=photos[0].id).first().id,
+    }
+
+
+def _requests(f: dict):
+    """(endpoint, label, method, url, kwargs). Order matters: destructive calls come last."""
+    own = {"headers": {"Authorization": f"Bearer {f['owner_jwt']}"}}
+    part = {"headers": {"Authorization": f"Bearer {f['participant_jwt']}"}}
+    joiner = {"headers": {"Authorization": f"Bearer {f['joiner_jwt']}"}}
+    a, p, e = f["album_id"], f["photo_id"], f["event_id"]
+    return [
+        ("auth.register", "", "post", "/api/auth/register",
+         {"json": {"name": "New", "email": "new@example.com", "password": "secret123"}}),
+        ("auth.login", "unknown user", "post", "/api/auth/login",
+         {"json": {"email": "nobody@example.com", "password": "x"}}),
+        ("auth.logout", "", "post", "/api/auth/logout", {}),
+        ("dashboard.get_storage_usage", "", "get", "/api/dashboard/storage", own),
+        ("dashboard.get_recent_albums", "", "get", "/api/dashboard/recent-albums", own),
+        ("dashboard.get_timeline", "owner", "get", "/api/timeline?granularity=day", own),
+        ("dashboard.get_timeline", "participant", "get", "/api/timeline?limit=2", part),
+        ("dashboard.get_bootstrap", "owner", "get", "/api/bootstrap", own),
+        ("dashboard.get_bootstrap", "participant", "get", "/api/bootstrap", part),
+        ("albums.get_albums", "", "get", "/api/albums", own),
+        ("albums.get_album", "owner", "get", f"/api/albums/{a}", own),
+        ("albums.get_album", "participant", "get", f"/api/albums/{a}", part),
+        ("albums.get_photos", "owner", "get", f"/api/albums/{a}/photos", own),
+        ("albums.get_photos", "participant", "get", f"/api/albums/{a}/photos", part),
+        ("albums.get_album_duplicates", "owner", "get", f"/api/albums/{a}/duplicates", own),
+        ("albums.get_album_duplicates", "participant", "get", f"/api/albums/{a}/duplicates", part),
+        ("albums.get_album_sprite_map", "owner", "get", f"/api/albums/{a}/sprite.json", own),
+        ("albums.get_album_sprite_map", "participant", "get", f"/api/albums/{a}/sprite.json", part),
+        ("albums.get_album_sprite_map", "album share", "get", f"/api/albums/{a}/sprite.json?t={f['album_token']}", {}),
+        ("albums.get_album_sprite", "owner", "get", f"/api/albums/{a}/sprite.webp", own),
+        ("albums.get_album_sprite", "event share", "get", f"/api/albums/{a}/sprite.webp?t={f['event_token']}", {}),
+        ("albums.create_album", "", "post", "/api/albums", {**own, "json": {"name": "Created"}}),
+        ("photos.upload_photos", "", "post", f"/api/albums/{a}/photos",
+         {**own, "data": {"photos": (io.BytesIO(b"\x89PNG new"), "new.png")},
+          "content_type": "multipart/form-data"}),
+        ("photos.similar_photos", "owner", "get", f"/api/photos/{p}/similar", own),
+        ("photos.similar_photos", "participant", "get", f"/api/photos/{p}/similar?k=5", part),
+        ("events.list_events", "owner", "get", "/api/events", own),
+        ("events.list_events", "participant", "get", "/api/events", part),
+        ("events.create_event", "", "post", "/api/events", {**own, "json": {"name": "New event"}}),
+        ("events.get_event", "owner", "get", f"/api/events/{e}", own),
+        ("events.get_event", "participant", "get", f"/api/events/{e}", part),
+        ("events.get_event_photos", "owner", "get", f"/api/events/{e}/photos", own),
+        ("events.get_event_photos", "participant", "get", f"/api/events/{e}/photos", part),
+        ("events.get_event_duplicates", "owner", "get", f"/api/events/{e}/duplicates", own),
+        ("events.get_event_duplicates", "participant", "get", f"/api/events/{e}/duplicates?distance=8", part),
+        ("events.add_albums_to_event", "", "post", f"/api/events/{f['spare_event_id']}/albums",
+         {**own, "json": {"album_ids": [a, f["last_album_id"]]}}),
+        ("events.add_event_from_shared_qs", "", "post", f"/api/events/from-shared?t={f['event_token']}", joiner),
+        ("events.add_event_from_shared_path", "", "post", f"/api/events/from-shared/{f['event_token']}", part),
+        ("shares.create_album_share", "", "post", f"/api/share/album/{a}", {**own, "json": {}}),
+        ("shares.create_photo_share", "", "post", f"/api/share/photo/{p}", {**own, "json": {}}),
+        ("shares.create_event_share", "", "post", f"/api/share/event/{e}", {**own, "json": {}}),
+        ("photos.upload_via_share", "new guest", "post", f"/api/s/{f['album_token']}/upload",
+         {"headers": {"X-Guest-Key": "budget-guest"},
+          "data": {"photos": (io.BytesIO(b"\x89PNG guest"), "guest.png")}, "content_type": "multipart/form-data"}),
+        ("photos.upload_via_share", "known guest", "post", f"/api/s/{f['album_token']}/upload",
+         {"headers": {"X-Guest-Key": "budget-guest"},
+          "data": {"photos": (io.BytesIO(b"\x89PNG guest"), "guest.png")}, "content_type": "multipart/form-data"}),
+        ("shares.open_album_share", "", "get", f"/api/s/{f['album_token']}/album", {}),
+        ("shares.open_photo_share", "", "get", f"/api/s/{f['photo_token']}/photo", {}),
+        ("shares.open_event_share", "build", "get", f"/api/s/{f['event_token']}/event", {}),
+        ("shares.open_event_share", "manifest", "get", f"/api/s/{f['event_token']}/event", {}),
+        ("shares.resolve_share", "", "get", f"/api/share/resolve/{f['event_token']}", {}),
+        ("shares.resolve_share", "unknown token", "get", "/api/share/resolve/not-a-token", {}),
+        ("comments.list_comments", "owner", "get", f"/api/photos/{p}/comments", own),
+        ("comments.list_comments", "share", "get", f"/api/photos/{p}/comments?t={f['event_token']}", {}),
+        ("comments.latest_comments", "owner", "get", f"/api/comments/latest?photo_ids={p},{f['last_photo_id']}", own),
+        ("comments.latest_comments", "participant", "get", f"/api/comments/latest?photo_ids={p}&n=1", part),
+        ("comments.latest_comments", "share", "get",
+         f"/api/comments/latest?photo_ids={p},{f['last_photo_id']}&t={f['event_token']}", {}),
+        ("comments.create_comment", "owner", "post", f"/api/photos/{p}/comments", {**own, "json": {"content": "hi"}}),
+        ("comments.create_comment", "share", "post", f"/api/photos/{p}/comments?t={f['event_token']}",
+         {"json": {"content": "hi"}}),
+        ("edits.get_edit", "", "get", f"/api/photos/{p}/edit", own),
+        ("edits.save_edit", "", "put", f"/api/photos/{p}/edit", {**own, "json": {"recipe": {"rotate": 90}}}),
+        ("edits.render_photo", "owner", "get", f"/api/photos/{p}/render?size=256", own),
+        ("edits.render_photo", "cached", "get", f"/api/photos/{p}/render?size=256", own),
+        ("edits.render_photo", "participant", "get", f"/api/photos/{p}/render?size=256", part),
+        ("edits.render_photo", "event share", "get", f"/api/photos/{p}/render?size=256&t={f['event_token']}", {}),
+        ("edits.render_photo", "preview", "get", f"/api/photos/{p}/render?recipe=%7B%22exposure%22%3A1%7D", own),
+        ("accounts.get_profile", "", "get", "/api/account/profile", own),
+        ("accounts.update_profile", "", "put", "/api/account/profile",
+         {**own, "json": {"name": "Owner", "email": "owner@example.com"}}),
+        ("accounts.change_password", "wrong current", "put", "/api/account/password",
+         {**own, "json": {"current": "wrong-password", "new": "another1"}}),
+        ("serve_uploads", "owner", "get", f"/uploads/{f['photo_path']}?a={f['owner_jwt']}", {}),
+        ("serve_uploads", "participant", "get", f"/uploads/{f['photo_path']}?a={f['participant_jwt']}", {}),
+        ("serve_uploads", "album share", "get", f"/uploads/{f['photo_path']}?t={f['album_token']}", {}),
+        ("serve_uploads", "event share", "get", f"/uploads/{f['photo_path']}?t={f['event_token']}", {}),
+        ("serve_uploads", "photo share", "get", f"/uploads/{f['photo_path']}?t={f['photo_token']}", {}),
+        ("serve_uploads", "unknown token", "get", f"/uploads/{f['photo_path']}?t=not-a-token", {}),
+        # destructive
+        ("edits.delete_edit", "", "delete", f"/api/photos/{p}/edit", own),
+        ("comments.delete_comment", "", "delete", f"/api/photos/{p}/comments/{f['comment_id']}", own),
+        ("shares.revoke_share", "", "delete", f"/api/share/{f['spare_share_id']}", own),
+        ("events.remove_album_from_event", "", "delete", f"/api/events/{e}/albums/{f['last_album_id']}", own),
+        ("photos.precheck_uploads", "", "post", f"/api/albums/{f['spare_album_id']}/photos/precheck",
+         {**own, "json": {"files": [{"name": "same.png", "size": len(_PNG), "sha256": hashlib.sha256(_PNG).hexdigest()},
+                                    {"name": "new.png", "size": 10, "sha256": "0" * 64}]}}),
+        ("photos.copy_photo", "", "post", f"/api/photos/{p}/copy", {**own, "json": {"album_id": f["spare_album_id"]}}),
+        ("photos.copy_photos", "", "post", "/api/photos/copy",
+         {**own, "json": {"photo_ids": [p, f["last_photo_id"]], "album_id": f["spare_album_id"]}}),
+        ("photos.move_photo", "", "post", f"/api/photos/{f['last_photo_id']}/move", {**own, "json": {"album_id": f["spare_album_id"]}}),
+        ("photos.move_photos", "", "post", "/api/photos/move",
+         {**own, "json": {"photo_ids": [f["last_photo_id"]], "album_id": f["last_album_id"]}}),
+        ("photos.delete_photo", "", "delete", f"/api/photos/{f['last_photo_id']}", own),
+        ("albums.delete_album", "", "delete", f"/api/albums/{f['last_album_id']}", own),
+        ("events.delete_event", "", "delete", f"/api/events/{f['spare_event_id']}", own),
+    ]
+
+
+def _measure(scale: int) -> dict:
+    """(endpoint, label) -> (status, statements)"""
+    out = {}
+    with app.app_context():
+        fixture = _seed(scale)
+    client = app.test_client()
+    for endpoint, label, method, url, kwargs in _requests(fixture):
+        with count_queries() as qc:
+            resp = getattr(client, method)(url, **kwargs)
+            resp.get_data()
+        resp.close()
+        out[(endpoint, label)] = (resp.status_code, qc.statements)
+    return out
+
+
+def evaluate(small: dict, large: dict) -> tuple[list, list]:
+    """(rows, failures) for two _measure() results; failures are (endpoint, label, message)."""
+    rows, failures = [], []
+    routes = {r.endpoint for r in app.url_map.iter_rules()} - _EXEMPT
+    for endpoint in sorted(routes - set(BUDGETS)):
+        failures.append((endpoint, "", "no query budget declared"))
+    exercised = {endpoint for endpoint, _ in small}
+    for endpoint in sorted(set(BUDGETS) - exercised):
+        failures.append((endpoint, "", "budget declared but route never exercised"))
+
+    for key, (status, stmts_small) in small.items():
+        endpoint, label = key
+        _, stmts_large = large[key]
+        budget = BUDGETS.get(endpoint)
+        n_small, n_large = len(stmts_small), len(stmts_large)
+        problems = []
+        if status >= 500:
+            problems.append(f"server error {status}")
+        if budget is not None and max(n_small, n_large) > budget:
+            problems.append(f"{max(n_small, n_large)} statements > budget {budget}")
+        if n_small != n_large:
+            problems.append(f"statement count grows with data ({n_small} -> {n_large})")
+        failures.extend((endpoint, label, msg) for msg in problems)
+        rows.append((endpoint, label, status, n_small, n_large, budget, bool(problems), stmts_large))
+    return rows, failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-v", "--verbose", action="store_true", help="print SQL for failing requests")
+    args = parser.parse_args()
+
+    rows, failures = evaluate(_measure(SMALL), _measure(LARGE))
+
+    print(f"{'endpoint':<38}{'case':<16}{'status':>7}{'small':>7}{'large':>7}{'budget':>8}")
+    for endpoint, label, status, n_small, n_large, budget, failed, stmts_large in rows:
+        flag = "  ✗" if failed else ""
+        print(f"{endpoint:<38}{label:<16}{status:>7}{n_small:>7}{n_large:>7}{budget if budget is not None else '-':>8}{flag}")
+        if failed and args.verbose:
+            for stmt in stmts_large:
+                print("      " + " ".join(stmt.split()))
+
+    if failures:
+        print(f"\n✗ {len(failures)} query budget violation(s):")
+        for endpoint, label, msg in failures:
+            print(f"  - {endpoint}{f' ({label})' if label else ''}: {msg}")
+        return 1
+    print("\n✅ All routes within their query budgets.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
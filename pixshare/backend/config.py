@@ -13,6 +13,11 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Media root (photos live under <UPLOAD_ROOT>/photos/<user>/<album>/<xx>/<yy>/)
+    UPLOAD_ROOT = os.path.abspath(os.getenv("UPLOAD_ROOT", os.path.join(basedir, "..", "uploads")))
+    # Hash-prefix directory levels below each album folder (utils/upload_layout.py); 0 = flat
+    UPLOAD_FANOUT_LEVELS = max(0, min(int(os.getenv("UPLOAD_FANOUT_LEVELS", "2")), 3))
+
     # JWT
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-jwt-secret")
 
@@ -27,3 +32,76 @@ class Config:
     JWT_COOKIE_CSRF_PROTECT = False      # safe here since we’re scoping the cookie path
     JWT_QUERY_STRING_NAME = "a"  # we pass ?a=<JWT> from the UI
 
+    # Instrumentation (/metrics in Prometheus text format)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # bearer token for /metrics; unset = no /metrics route
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+    # Async media server (media_server.py) — serves /uploads next to the Flask API
+    MEDIA_SERVER_PORT = int(os.getenv("MEDIA_SERVER_PORT", "5174"))
+    MEDIA_CHUNK_SIZE = int(os.getenv("MEDIA_CHUNK_SIZE", str(256 * 1024)))
+
+
+    # Share tokens: in-memory filter of valid tokens (unknown tokens never reach the DB)
+    SHARE_FILTER_ENABLED = os.getenv("SHARE_FILTER_ENABLED", "1") not in ("0", "false", "False")
+    SHARE_FILTER_REBUILD_SECONDS = float(os.getenv("SHARE_FILTER_REBUILD_SECONDS", "300"))
+    SHARE_FILTER_REFRESH_SECONDS = float(os.getenv("SHARE_FILTER_REFRESH_SECONDS", "1"))
+    SHARE_FILTER_FP_RATE = float(os.getenv("SHARE_FILTER_FP_RATE", "0.01"))
+
+    # Per-IP admission control on public share routes (token bucket)
+    SHARE_RATE_LIMIT_ENABLED = os.getenv("SHARE_RATE_LIMIT_ENABLED", "1") not in ("0", "false", "False")
+    SHARE_RATE_PER_MINUTE = float(os.getenv("SHARE_RATE_PER_MINUTE", "120"))
+    SHARE_RATE_BURST = float(os.getenv("SHARE_RATE_BURST", "60"))
+    SHARE_MISS_COST = float(os.getenv("SHARE_MISS_COST", "10"))  # extra cost of an unknown token
+
+    # Background threads (share sweeper, activity flusher, scrubber) only run in a serving
+    # process: `python app.py` starts them itself; under a WSGI server (gunicorn) set
+    # BACKGROUND_JOBS=1 for the server only, never for CLI scripts or cron jobs.
+    BACKGROUND_JOBS = os.getenv("BACKGROUND_JOBS", "0") not in ("0", "false", "False")
+
+    # Expired share links: background sweep (0 disables; sweep_shares.py runs it on demand)
+    SHARE_SWEEP_INTERVAL_SECONDS = float(os.getenv("SHARE_SWEEP_INTERVAL_SECONDS", "900"))
+    SHARE_SWEEP_BATCH_SIZE = int(os.getenv("SHARE_SWEEP_BATCH_SIZE", "500"))
+    SHARE_SWEEP_GRACE_HOURS = float(os.getenv("SHARE_SWEEP_GRACE_HOURS", "24"))
+
+    # Write-behind activity tracking (utils/activity.py); 0 disables it
+    ACTIVITY_FLUSH_SECONDS = float(os.getenv("ACTIVITY_FLUSH_SECONDS", "5"))
+    ACTIVITY_MAX_PENDING = int(os.getenv("ACTIVITY_MAX_PENDING", "10000"))
+
+    # Materialized /s/<token>/event payloads (utils/event_manifest.py)
+    MANIFEST_DIR = os.path.abspath(os.getenv("MANIFEST_DIR", os.path.join(basedir, "instance", "manifests")))
+
+    # Album contact-sheet sprites (utils/sprites.py)
+    SPRITE_DIR = os.path.abspath(os.getenv("SPRITE_DIR", os.path.join(basedir, "instance", "sprites")))
+    SPRITE_TILE = int(os.getenv("SPRITE_TILE", "128"))
+    SPRITE_COLUMNS = int(os.getenv("SPRITE_COLUMNS", "10"))
+    SPRITE_PAGE_SIZE = int(os.getenv("SPRITE_PAGE_SIZE", "100"))
+    SPRITE_QUALITY = int(os.getenv("SPRITE_QUALITY", "70"))
+
+    # Near-duplicate grouping: default Hamming distance between 64-bit dHashes (utils/phash.py)
+    DUPLICATE_MAX_DISTANCE = int(os.getenv("DUPLICATE_MAX_DISTANCE", "4"))
+
+    # Rendered photo edits: on-disk LRU (utils/render_cache.py)
+    RENDER_CACHE_DIR = os.path.abspath(os.getenv("RENDER_CACHE_DIR", os.path.join(basedir, "instance", "renders")))
+    RENDER_CACHE_MAX_MB = float(os.getenv("RENDER_CACHE_MAX_MB", "1024"))
+
+    # "More like this": per-user memory-mapped feature vectors (utils/similarity.py)
+    SIMILARITY_DIR = os.path.abspath(os.getenv("SIMILARITY_DIR", os.path.join(basedir, "instance", "similarity")))
+
+    # Storage scrubber (utils/scrubber.py): background pass every SCRUB_INTERVAL_SECONDS
+    # (0 disables; scrub_uploads.py runs one on demand)
+    SCRUB_INTERVAL_SECONDS = float(os.getenv("SCRUB_INTERVAL_SECONDS", "0"))
+    SCRUB_MAX_MBPS = float(os.getenv("SCRUB_MAX_MBPS", "20"))  # checksum read budget; 0 = unthrottled
+    SCRUB_VERIFY_CHECKSUMS = os.getenv("SCRUB_VERIFY_CHECKSUMS", "1") not in ("0", "false", "False")
+    SCRUB_RECLAIM_ORPHANS = os.getenv("SCRUB_RECLAIM_ORPHANS", "0") not in ("0", "false", "False")
+    SCRUB_ORPHAN_GRACE_HOURS = float(os.getenv("SCRUB_ORPHAN_GRACE_HOURS", "24"))
+    SCRUB_REPORT_PATH = os.path.abspath(os.getenv("SCRUB_REPORT_PATH", os.path.join(basedir, "instance", "scrub_report.json")))
+
+    # Cold tier for originals (utils/cold_storage.py): tier_uploads.py moves originals not
+    # served for COLD_AFTER_DAYS here (gzipped with COLD_COMPRESS); /uploads thaws them on demand
+    COLD_STORAGE_ROOT = os.path.abspath(os.getenv("COLD_STORAGE_ROOT", os.path.join(basedir, "instance", "cold")))
+    COLD_AFTER_DAYS = float(os.getenv("COLD_AFTER_DAYS", "180"))
+    COLD_COMPRESS = os.getenv("COLD_COMPRESS", "0") not in ("0", "false", "False")
+
+    # GET /api/bootstrap: per-user, in-process payload cache (0 = off; keep 0 with several workers)
+    BOOTSTRAP_CACHE_SECONDS = float(os.getenv("BOOTSTRAP_CACHE_SECONDS", "0"))
@@ -1,6 +1,289 @@
+# backend/database_gen.py
+"""
+Create the database tables and, optionally, a reproducible synthetic dataset
+for load testing.
+
+    python database_gen.py                      # just create tables (old behaviour)
+    python database_gen.py --users 20 --albums-per-user 5 --photos-per-album 200 \\
+        --big-album-photos 10000 --events-per-user 2 --albums-per-event 8 \\
+        --participants-per-event 10 --shares-per-event 3 --comments-per-photo 0.5
+
+Point DATABASE_URL at a scratch database first; --reset drops every table.
+Each photo is a real (tiny) PNG written under uploads/photos/<user>/<album>/<xx>/<yy>/.
+Everything is driven by --seed, so the same arguments give the same rows and
+files. A summary of the generated ids/tokens is written to
+instance/benchmarks/dataset.json for benchmark.py. Placeholders are left empty;
+run backfill_photo_meta.py to fill them.
+"""
+import argparse
+import json
+import os
+import random
+import struct
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert
+
 from app import app
-from extensions import db
+from extensions import db, bcrypt
+from models.user import User
+from models.album import Album
+from models.photo import Photo
+from models.comment import Comment
+from models.event import Event
+from models.event_albums import event_albums
+from models.event_participant import EventParticipant
+from models.share import Share
+from routes.photos import BASE_UPLOAD_DIR
+from utils.timeline import rebuild_timeline
+from utils.upload_layout import photo_relpath
+
+BENCH_PASSWORD = "benchmark-pass"
+DATASET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "benchmarks", "dataset.json")
+
+_INSERT_BATCH = 5000
+
+
+# ---------- Tiny PNG writer (no Pillow needed) ----------
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def make_png(width: int, height: int, rng: random.Random) -> bytes:
+    """A width x height RGB gradient with a random base colour."""
+    r0, g0, b0 = rng.randrange(256), rng.randrange(256), rng.randrange(256)
+    rows = bytearray()
+    for y in range(height):
+        rows.append(0)  # filter: none
+        for x in range(width):
+            rows += bytes(((r0 + x * 8) % 256, (g0 + y * 8) % 256, (b0 + (x + y) * 4) % 256))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", zlib.compress(bytes(rows), 6))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+# ---------- Helpers ----------
+
+def _next_id(model) -> int:
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _bulk_insert(target, rows):
+    for i in range(0, len(rows), _INSERT_BATCH):
+        db.session.execute(insert(target), rows[i:i + _INSERT_BATCH])
+
+
+def _write_photo(rel_path: str, rng: random.Random, size: int) -> int:
+    full = os.path.join(BASE_UPLOAD_DIR, rel_path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    data = make_png(size, size, rng)
+    with open(full, "wb") as fh:
+        fh.write(data)
+    return len(data)
+
+
+# ---------- Generator ----------
+
+def generate(args) -> dict:
+    rng = random.Random(args.seed)
+    started = datetime(2024, 1, 1)
+    pw_hash = bcrypt.generate_password_hash(BENCH_PASSWORD).decode("utf-8")
+
+    # Users
+    uid0 = _next_id(User)
+    users = [
+        {
+            "id": uid0 + i,
+            "full_name": f"Bench User {args.seed}-{i}",
+            "email": f"bench-{args.seed}-{i}@example.com",
+            "password_hash": pw_hash,
+            "created_at": started,
+        }
+        for i in range(args.users)
+    ]
+    _bulk_insert(User, users)
+    user_ids = [u["id"] for u in users]
+
+    # Albums (the very first album is the "big" one when --big-album-photos is set)
+    aid = _next_id(Album)
+    albums = []
+    for u in user_ids:
+        for j in range(args.albums_per_user):
+            albums.append({
+                "id": aid,
+                "title": f"Album {u}-{j}",
+                "user_id": u,
+                "created_at": started + timedelta(minutes=aid),
+            })
+            aid += 1
+    _bulk_insert(Album, albums)
+
+    # Photos + files
+    pid = _next_id(Photo)
+    photos = []
+    for idx, a in enumerate(albums):
+        n = args.big_album_photos if (idx == 0 and args.big_album_photos) else args.photos_per_album
+        for k in range(n):
+            name = f"IMG_{k:06d}.png"
+            rel = photo_relpath(a["user_id"], a["id"], name)
+            size = _write_photo(rel, rng, args.image_size) if args.write_files else 0
+            photos.append({
+                "id": pid,
+                "filename": name,
+                "filepath": rel,
+                "album_id": a["id"],
+                "user_id": a["user_id"],
+                "size": size,
+                "width": args.image_size if args.write_files else None,
+                "height": args.image_size if args.write_files else None,
+                "uploaded_at": started + timedelta(seconds=pid * 37),
+            })
+            pid += 1
+    _bulk_insert(Photo, photos)
+
+    # Events with many attached albums, participants and shares
+    eid = _next_id(Event)
+    events, links, participants, shares = [], [], [], []
+    albums_by_user: dict[int, list[int]] = {}
+    for a in albums:
+        albums_by_user.setdefault(a["user_id"], []).append(a["id"])
+
+    for u in user_ids:
+        for j in range(args.events_per_user):
+            events.append({
+                "id": eid,
+                "title": f"Event {u}-{j}",
+                "share_id": f"ev-{args.seed}-{eid}",
+                "user_id": u,
+                "created_at": started + timedelta(hours=eid),
+            })
+            # Attach own albums first, then borrow from other users to reach albums_per_event
+            pool = list(albums_by_user.get(u, []))
+            others = [x["id"] for x in albums if x["user_id"] != u]
+            rng.shuffle(others)
+            pool += others
+            for album_id in pool[: args.albums_per_event]:
+                links.append({"event_id": eid, "album_id": album_id})
+
+            candidates = [x for x in user_ids if x != u]
+            rng.shuffle(candidates)
+            for s in range(args.shares_per_event):
+                shares.append({
+                    "token": f"bench-{args.seed}-{eid}-{s}-{rng.getrandbits(64):016x}",
+                    "album_id": None,
+                    "event_id": eid,
+                    "can_comment": True,
+                    "created_at": started,
+                })
+            join_token = shares[-1]["token"] if args.shares_per_event else f"bench-{eid}"
+            for p_uid in candidates[: args.participants_per_event]:
+                participants.append({"event_id": eid, "user_id": p_uid, "share_token": join_token})
+            eid += 1
+
+    # One album share per user for /uploads?t= benchmarks
+    for u in user_ids:
+        own = albums_by_user.get(u, [])
+        if own:
+            shares.append({
+                "token": f"bench-{args.seed}-a{own[0]}-{rng.getrandbits(64):016x}",
+                "album_id": own[0],
+                "event_id": None,
+                "can_comment": True,
+                "created_at": started,
+            })
+
+    _bulk_insert(Event, events)
+    _bulk_insert(event_albums, links)
+    _bulk_insert(EventParticipant, participants)
+    _bulk_insert(Share, shares)
+
+    # Comments (average per photo, authors drawn from all users)
+    comments = []
+    if args.comments_per_photo > 0 and user_ids:
+        for p in photos:
+            n = int(args.comments_per_photo)
+            if rng.random() < args.comments_per_photo - n:
+                n += 1
+            for c in range(n):
+                comments.append({
+                    "content": f"Comment {c} on {p['id']}",
+                    "photo_id": p["id"],
+                    "user_id": rng.choice(user_ids),
+                    "created_at": p["uploaded_at"] + timedelta(minutes=c + 1),
+                })
+    _bulk_insert(Comment, comments)
+
+    db.session.commit()
+    rebuild_timeline()  # bulk inserts bypass the upload routes' rollup maintenance
+
+    big_album = albums[0] if albums else None
+    event_share = next((s for s in shares if s.get("event_id")), None)
+    album_share = next((s for s in shares if s.get("album_id")), None)
+    sample_photo = photos[0] if photos else None
+    return {
+        "seed": args.seed,
+        "generated_at": datetime.utcnow().isoformat(),
+        "password": BENCH_PASSWORD,
+        "counts": {
+            "users": len(users), "albums": len(albums), "photos": len(photos),
+            "events": len(events), "event_albums": len(links),
+            "participants": len(participants), "shares": len(shares), "comments": len(comments),
+        },
+        "user_id": user_ids[0] if user_ids else None,
+        "user_email": users[0]["email"] if users else None,
+        "participant_user_id": next((p["user_id"] for p in participants if events and p["event_id"] == events[0]["id"]), None),
+        "big_album_id": big_album["id"] if big_album else None,
+        "event_id": events[0]["id"] if events else None,
+        "event_share_token": event_share["token"] if event_share else None,
+        "album_share_token": album_share["token"] if album_share else None,
+        "sample_photo_id": sample_photo["id"] if sample_photo else None,
+        "sample_photo_path": sample_photo["filepath"] if sample_photo else None,
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Create tables and (optionally) a synthetic load-test dataset.")
+    p.add_argument("--reset", action="store_true", help="drop all tables first")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--users", type=int, default=0)
+    p.add_argument("--albums-per-user", type=int, default=3)
+    p.add_argument("--photos-per-album", type=int, default=50)
+    p.add_argument("--big-album-photos", type=int, default=0, help="photo count for the first album (e.g. 10000)")
+    p.add_argument("--events-per-user", type=int, default=1)
+    p.add_argument("--albums-per-event", type=int, default=5)
+    p.add_argument("--participants-per-event", type=int, default=3)
+    p.add_argument("--shares-per-event", type=int, default=1)
+    p.add_argument("--comments-per-photo", type=float, default=0.2)
+    p.add_argument("--image-size", type=int, default=16, help="edge length in px of generated PNGs")
+    p.add_argument("--no-files", dest="write_files", action="store_false", help="skip writing image files")
+    args = p.parse_args()
+
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        print("✅ Database and tables created!")
+
+        if args.users <= 0:
+            return
+
+        t0 = time.perf_counter()
+        summary = generate(args)
+        summary["seconds"] = round(time.perf_counter() - t0, 2)
+
+        os.makedirs(os.path.dirname(DATASET_FILE), exist_ok=True)
+        with open(DATASET_FILE, "w") as fh:
+            json.dump(summary, fh, indent=2)
+        print(f"✅ Synthetic dataset generated in {summary['seconds']}s: {summary['counts']}")
+        print(f"   summary written to {DATASET_FILE}")
+
 
-with app.app_context():
-    db.create_all()
-    print("✅ Database and tables created!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
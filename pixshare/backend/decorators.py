@@ -2,10 +2,10 @@
 from functools import wraps
 from flask import request, jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from models.share import Share
 from models.event import Event
 from models.album import Album
 from models.photo import Photo
+from utils.share_tokens import resolve_share_token
 from extensions import db
 
 def event_share_or_owner_required(fn):
@@ -39,8 +39,8 @@ def event_share_or_owner_required(fn):
 
         # If not owner, check if share token is valid
         if token:
-            s = Share.query.filter_by(token=token, event_id=event_id).first()
-            if s:
+            s = resolve_share_token(token)
+            if s and s.event_id == event_id:
                 # In future: check can_edit/can_comment here
                 return fn(*args, **kwargs)
 
@@ -0,0 +1,412 @@
+# backend/export_share.py
+"""
+Render a share link into a static bundle that nginx or a CDN can serve with
+no app or database behind it, for big public events where every guest would
+otherwise cost an open_event_share call plus one /uploads request per image.
+
+    python export_share.py <token> /srv/www/summer-party
+    python export_share.py <token> out --originals --thumb-size 320 --preview-size 2048
+    python export_share.py <token> out --watch 60       # re-export whenever the share changes
+
+The bundle:
+
+    index.html                  self-contained viewer (reads manifest.json)
+    manifest.json               event/album info, albums, photos with their file URLs
+    thumbs/<id>-<key>.jpg       grid thumbnails
+    previews/<id>-<key>.jpg     screen-sized images (--preview-size 0 to skip)
+    originals/<id>-<key>/<name> with --originals (hard-linked from uploads when possible)
+    .export-state.json          what was exported, for the next run
+
+<key> hashes the photo's file, checksum and the export settings, so a file
+name never changes content: the bundle can be served with far-future cache
+headers. Re-running only renders photos that are new or changed; removed
+photos' files are deleted after the new manifest is in place, and the
+manifest is replaced atomically, so a reader never sees it point at a file
+that isn't there yet. Works for event, album and photo shares. Cold-tier
+originals are read in place.
+
+The bundle is a snapshot: a photo deleted in the app stays public until the
+next export (run with --watch to keep that window short). When the link is
+revoked, expires or no longer exists, the export withdraws the bundle instead:
+thumbs/, previews/ and originals/ are deleted, manifest.json is replaced with
+a tombstone ({"withdrawn": true, no photos}) that the viewer reports as "no
+longer available", and the script exits with an error, --watch included.
+
+Requires Pillow.
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app import app
+from extensions import db
+from models.album import Album
+from models.event import Event
+from models.event_albums import event_albums
+from models.photo import Photo
+from routes.photos import BASE_UPLOAD_DIR
+from utils.cold_storage import open_original
+from utils.imaging import Image, ImageOps
+from utils.share_tokens import resolve_share_token
+from utils.upload_layout import link_upload
+
+STATE_FILE = ".export-state.json"
+QUALITY = 82
+
+
+# ---------- Files ----------
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _save_jpeg(img, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    os.close(fd)
+    try:
+        img.save(tmp, format="JPEG", quality=QUALITY, optimize=True, progressive=True)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _remove(out: str, rel: str):
+    path = os.path.join(out, rel)
+    try:
+        if rel.startswith("originals/"):
+            shutil.rmtree(os.path.dirname(path))
+        else:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def _export_photo(item):
+    """Runs in the pool: write one photo's files; returns (photo id, {kind: rel path}) or an error."""
+    photo_id, rel_path, filename, key, out, thumb_size, preview_size, originals = item
+    files = {"thumb": f"thumbs/{photo_id}-{key}.jpg"}
+    if preview_size:
+        files["preview"] = f"previews/{photo_id}-{key}.jpg"
+    if originals:
+        files["original"] = f"originals/{photo_id}-{key}/{filename}"
+    try:
+        fh = open_original(BASE_UPLOAD_DIR, rel_path)
+        if fh is None:
+            return photo_id, None, "original is missing"
+        with fh, Image.open(fh) as img:
+            img.draft("RGB", (max(thumb_size, preview_size),) * 2)
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            for kind, size in (("preview", preview_size), ("thumb", thumb_size)):
+                if kind not in files:
+                    continue
+                img.thumbnail((size, size), Image.LANCZOS)  # largest first, each from the last
+                _save_jpeg(img, os.path.join(out, files[kind]))
+        if originals:
+            dst = os.path.join(out, files["original"])
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            hot = os.path.join(BASE_UPLOAD_DIR, rel_path)
+            if os.path.isfile(hot):
+                if os.path.exists(dst):
+                    os.remove(dst)
+                link_upload(hot, dst)
+            else:
+                with open_original(BASE_UPLOAD_DIR, rel_path) as src:
+                    _write_atomic(dst, src.read())
+    # Pillow raises OSError/ValueError for undecodable files, DecompressionBombError for huge ones
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        return photo_id, None, str(e)
+    return photo_id, files, None
+
+
+# ---------- Share contents ----------
+
+def _share_contents(share) -> tuple[dict, list, list]:
+    """(header, albums, photo rows) for an event, album or photo share."""
+    cols = (Photo.id, Photo.filename, Photo.filepath, Photo.size, Photo.checksum, Photo.uploaded_at,
+            Photo.width, Photo.height, Photo.placeholder, Photo.album_id)
+    if share.event_id:
+        ev = db.session.get(Event, share.event_id)
+        albums = db.session.execute(
+            select(Album.id, Album.title)
+            .join(event_albums, event_albums.c.album_id == Album.id)
+            .where(event_albums.c.event_id == ev.id)
+            .order_by(Album.created_at.asc())
+        ).all()
+        photos = db.session.execute(
+            select(*cols).where(Photo.album_id.in_([a.id for a in albums])).order_by(Photo.uploaded_at.asc(), Photo.id)
+        ).all() if albums else []
+        header = {"event": {
+            "id": ev.id,
+            "name": ev.title,
+            "description": ev.description,
+            "date": ev.date.isoformat() if ev.date else None,
+        }}
+    elif share.album_id:
+        album = db.session.get(Album, share.album_id)
+        albums = [(album.id, album.title)]
+        photos = db.session.execute(
+            select(*cols).where(Photo.album_id == album.id).order_by(Photo.uploaded_at.asc(), Photo.id)
+        ).all()
+        header = {"album": {"id": album.id, "name": album.title}}
+    else:
+        photos = db.session.execute(select(*cols).where(Photo.id == share.photo_id)).all()
+        albums = []
+        header = {"photo": {"id": share.photo_id}}
+    return header, [{"id": a_id, "name": title} for a_id, title in albums], photos
+
+
+def _photo_key(row, settings: str) -> str:
+    src = f"{row.filepath}|{row.size}|{row.checksum}|{settings}"
+    return hashlib.sha1(src.encode("utf-8")).hexdigest()[:12]
+
+
+# ---------- Export ----------
+
+def _withdraw(out: str):
+    """Take a bundle down: tombstone manifest first, then every exported file."""
+    _write_atomic(os.path.join(out, "index.html"), _INDEX_HTML.replace("{{TITLE}}", "Photos").encode("utf-8"))
+    _write_atomic(os.path.join(out, "manifest.json"), json.dumps({
+        "withdrawn": True,
+        "albums": [],
+        "photos": [],
+        "exported_at": datetime.utcnow().isoformat() + "Z",
+    }, separators=(",", ":")).encode("utf-8"))
+    for folder in ("thumbs", "previews", "originals"):
+        shutil.rmtree(os.path.join(out, folder), ignore_errors=True)
+    try:
+        os.remove(os.path.join(out, STATE_FILE))
+    except OSError:
+        pass
+
+
+def export(pool, token: str, out: str, args) -> bool:
+    """One export pass; returns False if nothing changed since the last one."""
+    share = resolve_share_token(token)
+    if share is None:
+        db.session.rollback()
+        _withdraw(out)
+        raise SystemExit(f"Invalid, revoked or expired share link; bundle in {out} withdrawn")
+    header, albums, photos = _share_contents(share)
+    db.session.commit()  # end the read transaction before the slow part
+
+    settings = f"{args.thumb_size}|{args.preview_size}|{int(args.originals)}"
+    try:
+        with open(os.path.join(out, STATE_FILE)) as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        state = {}
+    done = {int(k): v for k, v in state.get("photos", {}).items()}
+
+    todo, exported, failed = [], {}, 0
+    for row in photos:
+        key = _photo_key(row, settings)
+        prev = done.get(row.id)
+        if prev and prev["key"] == key and all(os.path.isfile(os.path.join(out, f)) for f in prev["files"].values()):
+            exported[row.id] = prev
+            continue
+        todo.append((row.id, row.filepath, row.filename, key, out,
+                     args.thumb_size, args.preview_size, args.originals))
+
+    listing = json.dumps([header, albums, [tuple(map(str, r)) for r in photos]], sort_keys=True)
+    digest = hashlib.sha1(f"{listing}|{settings}".encode("utf-8")).hexdigest()
+    if not todo and digest == state.get("digest") and os.path.isfile(os.path.join(out, "manifest.json")):
+        return False
+
+    keys = {item[0]: item[3] for item in todo}
+    for i, (photo_id, files, error) in enumerate(pool.map(_export_photo, todo, chunksize=8), 1):
+        if error:
+            failed += 1
+            print(f"  ! photo {photo_id}: {error}")
+        else:
+            exported[photo_id] = {"key": keys[photo_id], "files": files}
+        if i % 200 == 0:
+            print(f"  rendered {i}/{len(todo)}")
+
+    manifest = {
+        **header,
+        "albums": albums,
+        "photos": [
+            {
+                "id": row.id,
+                "filename": row.filename,
+                "uploaded_at": row.uploaded_at.isoformat() if row.uploaded_at else None,
+                "width": row.width,
+                "height": row.height,
+                "placeholder": row.placeholder,
+                "album_id": row.album_id,
+                **exported[row.id]["files"],
+            }
+            for row in photos if row.id in exported
+        ],
+        "exported_at": datetime.utcnow().isoformat() + "Z",
+    }
+    title = (header.get("event") or header.get("album") or {}).get("name") or "Photos"
+    _write_atomic(os.path.join(out, "index.html"), _INDEX_HTML.replace("{{TITLE}}", html.escape(title)).encode("utf-8"))
+    _write_atomic(os.path.join(out, "manifest.json"), json.dumps(manifest, separators=(",", ":")).encode("utf-8"))
+
+    # Only now drop files the new manifest no longer mentions
+    live = {f for entry in exported.values() for f in entry["files"].values()}
+    for entry in done.values():
+        for f in entry["files"].values():
+            if f not in live:
+                _remove(out, f)
+    _write_atomic(os.path.join(out, STATE_FILE), json.dumps({
+        "digest": digest,
+        "photos": {str(k): v for k, v in exported.items()},
+    }).encode("utf-8"))
+    print(f"Exported {len(manifest['photos'])} photo(s) to {out}: {len(todo) - failed} rendered, "
+          f"{len(photos) - len(todo)} unchanged, {failed} failed.")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a share link as a static site.")
+    parser.add_argument("token", help="share token (event, album or photo link)")
+    parser.add_argument("out", help="output directory (created if missing)")
+    parser.add_argument("--thumb-size", type=int, default=400, help="longest side of grid thumbnails")
+    parser.add_argument("--preview-size", type=int, default=1600, help="longest side of previews (0 = none)")
+    parser.add_argument("--originals", action="store_true", help="include the original files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--watch", type=float, default=0, help="re-export every this many seconds (0 = once)")
+    args = parser.parse_args()
+
+    if Image is None:
+        raise SystemExit("Pillow is required (pip install Pillow)")
+    out = os.path.abspath(args.out)
+    os.makedirs(out, exist_ok=True)
+
+    with app.app_context(), ProcessPoolExecutor(max_workers=args.workers) as pool:
+        while True:
+            started = time.perf_counter()
+            if export(pool, args.token, out, args):
+                print(f"  in {time.perf_counter() - started:.1f}s")
+            elif not args.watch:
+                print("Nothing changed since the last export.")
+            db.session.remove()
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+
+
+_INDEX_HTML = """<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{{TITLE}}</title>
+<style>
+  body { margin: 0; font-family: system-ui, sans-serif; background: #fafafa; color: #222; }
+  header { padding: 1.5rem 1rem 0.5rem; }
+  h1 { margin: 0; font-size: 1.6rem; }
+  header p { margin: 0.4rem 0 0; color: #666; }
+  nav { display: flex; flex-wrap: wrap; gap: 0.5rem; padding: 0.5rem 1rem; }
+  nav button { border: 1px solid #ccc; background: #fff; border-radius: 999px; padding: 0.3rem 0.9rem; cursor: pointer; }
+  nav button.on { background: #222; color: #fff; border-color: #222; }
+  main { display: grid; grid-template-columns: repeat(auto-fill, minmax(180px, 1fr)); gap: 6px; padding: 1rem; }
+  main a { display: block; aspect-ratio: 1; background: #ddd center / cover; }
+  main img { width: 100%; height: 100%; object-fit: cover; display: block; }
+  #view { position: fixed; inset: 0; background: rgba(0,0,0,.92); display: none; align-items: center; justify-content: center; }
+  #view.open { display: flex; }
+  #view img { max-width: 96vw; max-height: 88vh; }
+  #view .bar { position: absolute; bottom: 1rem; display: flex; gap: 1rem; }
+  #view .bar a, #view .bar button { color: #fff; background: none; border: 1px solid #777; border-radius: 4px; padding: 0.3rem 0.8rem; cursor: pointer; text-decoration: none; font: inherit; }
+</style>
+</head>
+<body>
+<header><h1>{{TITLE}}</h1><p id="sub"></p></header>
+<nav id="albums"></nav>
+<main id="grid"></main>
+<div id="view"><img alt=""><div class="bar"><button id="prev">&larr;</button><a id="orig" download hidden>Original</a><button id="close">Close</button><button id="next">&rarr;</button></div></div>
+<script>
+(async () => {
+  const data = await (await fetch("manifest.json", { cache: "no-cache" })).json();
+  if (data.withdrawn) {
+    document.getElementById("sub").textContent = "These photos are no longer available.";
+    return;
+  }
+  const grid = document.getElementById("grid"), view = document.getElementById("view");
+  const info = data.event || data.album || {};
+  document.getElementById("sub").textContent =
+    [info.date, info.description, data.photos.length + " photos"].filter(Boolean).join(" \\u00b7 ");
+  let shown = data.photos, at = 0;
+
+  const render = () => {
+    grid.replaceChildren(...shown.map((p, i) => {
+      const a = document.createElement("a");
+      a.href = p.preview || p.original || p.thumb;
+      if (p.placeholder) a.style.backgroundImage = `url(${p.placeholder})`;
+      const img = document.createElement("img");
+      img.src = p.thumb; img.loading = "lazy"; img.alt = p.filename;
+      a.append(img);
+      a.onclick = (e) => { e.preventDefault(); open(i); };
+      return a;
+    }));
+  };
+  const open = (i) => {
+    at = (i + shown.length) % shown.length;
+    const p = shown[at], orig = document.getElementById("orig");
+    view.querySelector("img").src = p.preview || p.original || p.thumb;
+    orig.hidden = !p.original;
+    if (p.original) orig.href = p.original;
+    view.classList.add("open");
+  };
+  document.getElementById("close").onclick = () => view.classList.remove("open");
+  document.getElementById("prev").onclick = () => open(at - 1);
+  document.getElementById("next").onclick = () => open(at + 1);
+  document.addEventListener("keydown", (e) => {
+    if (!view.classList.contains("open")) return;
+    if (e.key === "Escape") view.classList.remove("open");
+    if (e.key === "ArrowLeft") open(at - 1);
+    if (e.key === "ArrowRight") open(at + 1);
+  });
+
+  if (data.albums.length > 1) {
+    const nav = document.getElementById("albums");
+    const pick = (id, btn) => {
+      shown = id == null ? data.photos : data.photos.filter((p) => p.album_id === id);
+      nav.querySelectorAll("button").forEach((b) => b.classList.toggle("on", b === btn));
+      render();
+    };
+    [{ id: null, name: "All" }, ...data.albums].forEach((a) => {
+      const btn = document.createElement("button");
+      btn.textContent = a.name;
+      btn.onclick = () => pick(a.id, btn);
+      nav.append(btn);
+      if (a.id == null) btn.classList.add("on");
+    });
+  }
+  render();
+})();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    main()
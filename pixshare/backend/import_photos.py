@@ -0,0 +1,236 @@
+# backend/import_photos.py
+"""
+Import a directory tree from the server's disk into a user's albums, without
+pushing every file through the browser and upload_photos.
+
+    python import_photos.py --user 12 /mnt/archive
+    python import_photos.py --user 12 /mnt/archive --workers 8 --batch-size 500
+    python import_photos.py --user 12 /mnt/archive --link --use-mtime
+
+Every folder that holds files becomes an album titled by its path below the
+root ("2019/Summer"; files directly in the root go to an album named after
+the root). An album of that title that already exists is reused. Names go
+through the same junk filter (_is_garbage_name) and secure_filename as
+uploads and land in the fan-out layout.
+
+Copying (or, with --link, hard-linking), hashing, image probing and feature
+extraction run in a process pool, one batch ahead of the main process, which
+inserts each batch with one multi-row INSERT, updates the timeline rollups,
+commits, and then extends the similarity index. A file whose checksum the
+album already holds is skipped, so re-running over the same tree imports
+nothing twice.
+
+Progress (finished folders, last file of the current one) is checkpointed in
+instance/import_photos_<user>.json after every batch; an interrupted import
+resumes from there unless --restart is given.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import insert
+from werkzeug.utils import secure_filename
+
+from app import app
+from extensions import db
+from models.album import Album
+from models.photo import Photo
+from models.user import User
+from routes.photos import BASE_UPLOAD_DIR, _is_garbage_name
+from utils.checksums import copy_with_checksum, file_checksum
+from utils.event_manifest import invalidate_album_manifests
+from utils.imaging import probe_image
+from utils.similarity import feature_vector, similarity_index
+from utils.timeline import photos_added
+from utils.upload_layout import link_upload, unique_photo_relpath
+
+INSTANCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance")
+_SKIP_DIRS = {"__MACOSX", "@eaDir", "$RECYCLE.BIN", "System Volume Information"}
+
+
+# ---------- Checkpoint ----------
+
+def _state_path(user_id: int) -> str:
+    return os.path.join(INSTANCE_DIR, f"import_photos_{user_id}.json")
+
+
+def _load_state(user_id: int, root: str) -> dict:
+    try:
+        with open(_state_path(user_id)) as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        return {"root": root, "done": [], "dir": None, "after": None}
+    if state.get("root") != root:
+        return {"root": root, "done": [], "dir": None, "after": None}
+    return state
+
+
+def _save_state(user_id: int, state: dict):
+    os.makedirs(INSTANCE_DIR, exist_ok=True)
+    tmp = _state_path(user_id) + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(state, fh)
+    os.replace(tmp, _state_path(user_id))
+
+
+# ---------- Worker ----------
+
+def _ingest(item):
+    """Runs in the pool: place one file and compute everything the row needs."""
+    src, dst, link = item
+    try:
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if link:
+            link_upload(src, dst)
+            size, checksum = os.path.getsize(dst), file_checksum(dst)
+        else:
+            size, checksum = copy_with_checksum(src, dst)
+        st = os.stat(src)
+    except OSError as e:
+        return {"src": src, "dst": dst, "error": str(e)}
+    return {
+        "src": src,
+        "dst": dst,
+        "size": size,
+        "checksum": checksum,
+        "mtime": st.st_mtime,
+        "meta": probe_image(dst),
+        "vector": feature_vector(dst),
+    }
+
+
+# ---------- Tree walk ----------
+
+def _folders(root: str):
+    """(relative dir, sorted file names) in a stable order; junk dirs and files skipped."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and d not in _SKIP_DIRS)
+        names = sorted(n for n in filenames if not _is_garbage_name(n))
+        if names:
+            rel = os.path.relpath(dirpath, root)
+            yield ("" if rel == "." else rel.replace(os.sep, "/")), names
+
+
+def _album_for(user_id: int, title: str) -> Album:
+    album = Album.query.filter_by(user_id=user_id, title=title).first()
+    if album is None:
+        album = Album(title=title, user_id=user_id)
+        db.session.add(album)
+        db.session.commit()
+    return album
+
+
+def _batches(names, size):
+    for i in range(0, len(names), size):
+        yield names[i:i + size]
+
+
+# ---------- Import ----------
+
+def _import_folder(pool, args, user_id, root, rel_dir, names, state, totals):
+    title = (rel_dir or os.path.basename(root.rstrip(os.sep)) or "Import")[:100]
+    album = _album_for(user_id, title)
+    album_id = album.id
+    if state["dir"] == rel_dir and state["after"]:
+        names = [n for n in names if n > state["after"]]
+    taken = {n for (n,) in db.session.query(Photo.filename).filter_by(album_id=album_id)}
+    sums = {c for (c,) in db.session.query(Photo.checksum).filter(
+        Photo.album_id == album_id, Photo.checksum.isnot(None))}
+
+    def submit(batch):
+        items = []
+        for name in batch:
+            safe = secure_filename(name) or "upload"
+            rel = unique_photo_relpath(BASE_UPLOAD_DIR, user_id, album_id, safe, taken)
+            items.append((os.path.join(root, rel_dir, name), os.path.join(BASE_UPLOAD_DIR, rel), args.link))
+        return batch, [pool.submit(_ingest, item) for item in items]
+
+    batches = _batches(names, args.batch_size)
+    in_flight = submit(next(batches)) if names else None
+    while in_flight is not None:
+        batch, futures = in_flight
+        in_flight = next((submit(b) for b in batches), None)  # keep the pool busy during the DB write
+
+        rows, vectors, now = [], [], datetime.utcnow()
+        for res in (f.result() for f in futures):
+            if "error" in res:
+                totals["failed"] += 1
+                print(f"  ! {res['src']}: {res['error']}")
+                continue
+            if res["checksum"] in sums:
+                os.remove(res["dst"])
+                totals["duplicates"] += 1
+                continue
+            sums.add(res["checksum"])
+            rows.append({
+                "filename": os.path.basename(res["dst"]),
+                "filepath": os.path.relpath(res["dst"], BASE_UPLOAD_DIR).replace(os.sep, "/"),
+                "album_id": album_id,
+                "user_id": user_id,
+                "size": res["size"],
+                "checksum": res["checksum"],
+                "uploaded_at": datetime.utcfromtimestamp(res["mtime"]) if args.use_mtime else now,
+                **res["meta"],
+            })
+            vectors.append(res["vector"])
+
+        if rows:
+            ids = db.session.execute(
+                insert(Photo).returning(Photo.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            photos_added(album_id, [(pid, r["uploaded_at"]) for pid, r in zip(ids, rows)])
+        state["dir"], state["after"] = rel_dir, batch[-1]
+        db.session.commit()
+        _save_state(user_id, state)
+        if rows:
+            similarity_index.add(user_id, [(pid, album_id, vec) for pid, vec in zip(ids, vectors)])
+            invalidate_album_manifests([album_id])
+        totals["imported"] += len(rows)
+        elapsed = max(time.perf_counter() - totals["started"], 1e-6)
+        print(f"  {title}: {totals['imported']} imported, {totals['duplicates']} duplicates, "
+              f"{totals['failed']} failed ({totals['imported'] / elapsed:.0f}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a directory tree into a user's albums.")
+    parser.add_argument("root", help="directory to import; each folder with files becomes an album")
+    parser.add_argument("--user", type=int, required=True, help="owner user id")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--link", action="store_true",
+                        help="hard-link instead of copying (source must be on the uploads filesystem)")
+    parser.add_argument("--use-mtime", action="store_true", help="use file modification times as upload times")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint of a previous run")
+    args = parser.parse_args()
+
+    root = os.path.abspath(args.root)
+    if not os.path.isdir(root):
+        raise SystemExit(f"Not a directory: {root}")
+
+    totals = {"imported": 0, "duplicates": 0, "failed": 0, "started": time.perf_counter()}
+    with app.app_context(), ProcessPoolExecutor(max_workers=args.workers) as pool:
+        if db.session.get(User, args.user) is None:
+            raise SystemExit(f"No user with id {args.user}")
+        state = {"root": root, "done": [], "dir": None, "after": None} if args.restart \
+            else _load_state(args.user, root)
+        done = set(state["done"])
+        if done or state["dir"] is not None:
+            print(f"Resuming: {len(done)} folder(s) already imported")
+
+        for rel_dir, names in _folders(root):
+            if rel_dir in done:
+                continue
+            _import_folder(pool, args, args.user, root, rel_dir, names, state, totals)
+            done.add(rel_dir)
+            state["done"], state["dir"], state["after"] = sorted(done), None, None
+            _save_state(args.user, state)
+
+    print(f"Done: {totals['imported']} photo(s) imported, {totals['duplicates']} duplicate(s) skipped, "
+          f"{totals['failed']} failed, in {time.perf_counter() - totals['started']:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
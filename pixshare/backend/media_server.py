@@ -0,0 +1,241 @@
+# backend/media_server.py
+"""
+Optional asyncio/ASGI server for /uploads.
+
+The Flask app serves /uploads from synchronous workers, so a few slow clients
+downloading originals can hold every worker while API calls queue behind them.
+This module serves the same URLs with the same authorization rules and per-IP
+share admission (utils.uploads_auth.admit_upload; the client address comes from
+the ASGI scope) but streams files from an event loop:
+a slow client only costs a suspended coroutine, not a worker.
+
+Run it next to the Flask API process (requires `pip install uvicorn`):
+
+    python media_server.py                  # 0.0.0.0:MEDIA_SERVER_PORT (5174)
+    uvicorn media_server:app --port 5174    # or any ASGI server
+
+and point the /uploads proxy at it (e.g. VITE_MEDIA_PROXY=http://<host>:5174
+for the Vite dev server). The Flask /uploads route keeps working as before.
+
+The authorization check (a couple of indexed queries) runs in a worker thread
+inside a Flask app context; file reads are chunked and also offloaded, so the
+loop itself never blocks on the database or the disk.
+"""
+import argparse
+import asyncio
+import math
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import parse_qs
+
+from flask_jwt_extended import decode_token
+
+from app import app as flask_app
+from config import Config
+from utils.activity import init_activity_buffer, touch_upload
+from utils.uploads_auth import admit_upload
+from utils.upload_layout import locate_upload
+
+UPLOAD_ROOT = Config.UPLOAD_ROOT
+CHUNK_SIZE = Config.MEDIA_CHUNK_SIZE
+PREFIX = "/uploads/"
+
+_REASONS = {
+    200: b"OK", 206: b"Partial Content", 304: b"Not Modified", 401: b"Unauthorized",
+    403: b"Forbidden", 404: b"Not Found", 405: b"Method Not Allowed",
+    416: b"Range Not Satisfiable", 429: b"Too Many Requests",
+}
+
+
+# ---------- Helpers ----------
+
+def _authorize(filename: str, token: str, jwt_token: str, ip: str) -> tuple[int, float]:
+    """Blocking: resolve the JWT identity and apply the /uploads rules; (status, retry_after)."""
+    with flask_app.app_context():
+        uid = None
+        if jwt_token and not token:
+            try:
+                uid = decode_token(jwt_token).get("sub")
+            except Exception:
+                uid = None  # invalid/expired JWT behaves like no JWT
+        return admit_upload(filename, token, uid, ip)
+
+
+def _parse_range(header: str, size: int):
+    """Single 'bytes=a-b' range -> (start, end) inclusive; None if absent; False if unsatisfiable."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    spec = header[len("bytes="):].strip()
+    start_s, _, end_s = spec.partition("-")
+    try:
+        if start_s == "":
+            length = int(end_s)
+            if length <= 0:
+                return False
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+
+def _not_modified(headers: dict, etag: str, mtime: float) -> bool:
+    inm = headers.get("if-none-match")
+    if inm is not None:
+        return etag in [t.strip() for t in inm.split(",")] or inm.strip() == "*"
+    ims = headers.get("if-modified-since")
+    if ims:
+        try:
+            return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def _respond(send, status: int, headers=(), body: bytes = b""):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-length", str(len(body)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _stream_file(send, path: str, start: int, length: int):
+    loop = asyncio.get_running_loop()
+    fh = await loop.run_in_executor(None, open, path, "rb")
+    try:
+        if start:
+            await loop.run_in_executor(None, fh.seek, start)
+        remaining = length
+        while remaining > 0:
+            chunk = await loop.run_in_executor(None, fh.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            # send() applies backpressure: a slow client just parks this coroutine
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        await loop.run_in_executor(None, fh.close)
+
+
+# ---------- ASGI application ----------
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                init_activity_buffer(flask_app)  # flushes the touch_upload() last-access times
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+    cors = []
+    if headers.get("origin"):
+        cors = [
+            (b"access-control-allow-origin", headers["origin"].encode("latin-1")),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+
+    method = scope["method"]
+    if method == "OPTIONS":
+        return await _respond(send, 200, [
+            *cors,
+            (b"access-control-allow-methods", b"GET, HEAD, OPTIONS"),
+            (b"access-control-allow-headers", b"Content-Type, Authorization"),
+        ])
+    if method not in ("GET", "HEAD"):
+        return await _respond(send, 405, [(b"allow", b"GET, HEAD, OPTIONS"), *cors])
+
+    path = scope["path"]
+    if not path.startswith(PREFIX):
+        return await _respond(send, 404, cors)
+    filename = path[len(PREFIX):]
+
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    token = ((query.get("t") or query.get("token") or [""])[0]).strip()
+    jwt_token = (query.get(flask_app.config["JWT_QUERY_STRING_NAME"]) or [""])[0]
+    auth = headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        jwt_token = auth[7:].strip()
+
+    client = scope.get("client")
+    ip = client[0] if client else "unknown"
+    status, wait = await asyncio.to_thread(_authorize, filename, token, jwt_token, ip)
+    if wait:
+        return await _respond(send, 429, [(b"retry-after", str(max(math.ceil(wait), 1)).encode()), *cors],
+                              _REASONS[429])
+    if status != 200:
+        return await _respond(send, status, cors, _REASONS.get(status, b"Error"))
+
+    full_path = await asyncio.to_thread(locate_upload, UPLOAD_ROOT, filename)
+    try:
+        st = await asyncio.to_thread(os.stat, full_path) if full_path else None
+    except OSError:
+        st = None  # moved between lookup and stat
+    if st is None:
+        return await _respond(send, 404, cors, _REASONS[404])
+    touch_upload(os.path.relpath(full_path, UPLOAD_ROOT).replace(os.sep, "/"))
+
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    common = [
+        (b"etag", etag.encode()),
+        (b"last-modified", formatdate(st.st_mtime, usegmt=True).encode()),
+        (b"cache-control", b"no-cache"),
+        (b"accept-ranges", b"bytes"),
+        *cors,
+    ]
+    if _not_modified(headers, etag, st.st_mtime):
+        return await _respond(send, 304, common)
+
+    size = st.st_size
+    rng = _parse_range(headers.get("range", ""), size)
+    if rng is False:
+        return await _respond(send, 416, [(b"content-range", f"bytes */{size}".encode()), *common])
+
+    start, end, status = 0, size - 1, 200
+    if rng:
+        start, end = rng
+        status = 206
+        common.append((b"content-range", f"bytes {start}-{end}/{size}".encode()))
+    length = max(end - start + 1, 0)
+
+    ctype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", ctype.encode()), (b"content-length", str(length).encode()), *common],
+    })
+    if method == "HEAD" or length == 0:
+        await send({"type": "http.response.body", "body": b""})
+        return
+    await _stream_file(send, full_path, start, length)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async /uploads media server (ASGI).")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=Config.MEDIA_SERVER_PORT)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("media_server.py needs an ASGI server: pip install uvicorn")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# backend/migrate_upload_layout.py
+"""
+Move existing uploads from the flat photos/<user>/<album>/<name> layout into
+the hash fan-out layout (utils/upload_layout.py) while the site stays up.
+
+    python migrate_upload_layout.py                        # everything, 200 photos per batch
+    python migrate_upload_layout.py --batch-size 500 --pause 0.5
+    python migrate_upload_layout.py --max-batches 10       # a slice now, resume later
+    python migrate_upload_layout.py --dry-run
+
+Per batch, each file is first hard-linked (copied where links aren't
+supported) to its new path, then the batch's Photo.filepath updates are
+committed in one transaction, and only then are the old names unlinked. At
+every point each row's filepath names an existing file, and /uploads
+resolves old URLs to the new location (upload_layout.locate_upload), so
+nothing 404s mid-migration. A row that was deleted or re-pointed meanwhile
+keeps its filepath (the UPDATE matches on the old path) and its new link is
+removed again.
+
+Progress is checkpointed in instance/upload_layout_migration.json after each
+batch; an interrupted run resumes from there (--restart walks from the
+start; migrated rows are skipped either way).
+"""
+import argparse
+import json
+import os
+import time
+
+from sqlalchemy import select, update
+
+from app import app
+from extensions import db
+from models.photo import Photo
+from routes.photos import BASE_UPLOAD_DIR
+from utils.event_manifest import invalidate_album_manifests
+from utils.sprites import invalidate_album_sprites
+from utils.upload_layout import fanout_path, link_upload
+
+STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "upload_layout_migration.json")
+
+
+def _load_checkpoint() -> int:
+    try:
+        with open(STATE_FILE) as fh:
+            return int(json.load(fh).get("last_id", 0))
+    except (OSError, ValueError):
+        return 0
+
+
+def _save_checkpoint(last_id: int):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump({"last_id": last_id, "updated_at": time.time()}, fh)
+    os.replace(tmp, STATE_FILE)
+
+
+def _unlink(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _legacy_twin(rel_path: str) -> str:
+    parts = rel_path.split("/")
+    return os.path.join(BASE_UPLOAD_DIR, "photos", parts[1], parts[2], parts[-1])
+
+
+def _migrate_batch(rows, dry_run: bool):
+    """Returns (moved, missing, conflicts, album ids touched)."""
+    planned, missing, conflicts = [], 0, 0
+    for row in rows:
+        new_rel = fanout_path(row.filepath)
+        if new_rel is None:
+            continue
+        if new_rel == row.filepath:
+            # Already migrated; a crash between commit and unlink can leave the old name behind
+            twin = _legacy_twin(new_rel)
+            new_abs = os.path.join(BASE_UPLOAD_DIR, new_rel)
+            if not dry_run and twin != new_abs and os.path.exists(twin) and os.path.exists(new_abs) \
+                    and os.path.samefile(twin, new_abs):
+                _unlink(twin)
+            continue
+        src = os.path.join(BASE_UPLOAD_DIR, row.filepath)
+        if not os.path.isfile(src):
+            missing += 1
+            continue
+        if dry_run:
+            planned.append((row, new_rel))
+            continue
+        try:
+            link_upload(src, os.path.join(BASE_UPLOAD_DIR, new_rel))
+        except FileExistsError:
+            conflicts += 1  # a different file already sits there; leave this one flat
+            continue
+        planned.append((row, new_rel))
+
+    if dry_run or not planned:
+        return len(planned), missing, conflicts, {row.album_id for row, _ in planned}
+
+    moved = []
+    for row, new_rel in planned:
+        res = db.session.execute(
+            update(Photo)
+            .where(Photo.id == row.id, Photo.filepath == row.filepath)
+            .values(filepath=new_rel)
+        )
+        moved.append((row, new_rel, res.rowcount == 1))
+    db.session.commit()
+
+    for row, new_rel, updated in moved:
+        if updated:
+            _unlink(os.path.join(BASE_UPLOAD_DIR, row.filepath))
+        else:
+            _unlink(os.path.join(BASE_UPLOAD_DIR, new_rel))  # row deleted or changed meanwhile
+    done = [row for row, _, updated in moved if updated]
+    return len(done), missing, conflicts, {row.album_id for row in done}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move uploads into the hash fan-out directory layout.")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--pause", type=float, default=0.2, help="seconds to sleep between batches (throttle)")
+    parser.add_argument("--max-batches", type=int, default=0, help="stop after this many batches (0 = all)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and walk from the first photo")
+    parser.add_argument("--dry-run", action="store_true", help="report what would move; touch nothing")
+    args = parser.parse_args()
+
+    last_id = 0 if args.restart else _load_checkpoint()
+    moved = missing = conflicts = batches = 0
+    started = time.perf_counter()
+    with app.app_context():
+        if last_id:
+            print(f"Resuming after photo id {last_id}")
+        while True:
+            rows = db.session.execute(
+                select(Photo.id, Photo.filepath, Photo.album_id)
+                .where(Photo.id > last_id)
+                .order_by(Photo.id)
+                .limit(args.batch_size)
+            ).all()
+            if not rows:
+                break
+            n, miss, conf, album_ids = _migrate_batch(rows, args.dry_run)
+            moved += n
+            missing += miss
+            conflicts += conf
+            last_id = rows[-1].id
+            if not args.dry_run:
+                _save_checkpoint(last_id)
+                if album_ids:
+                    # cached manifests and sprite keys embed the old paths
+                    invalidate_album_manifests(album_ids)
+                    invalidate_album_sprites(album_ids)
+            batches += 1
+            print(f"  up to id {last_id}: {moved} {'to move' if args.dry_run else 'moved'}, "
+                  f"{missing} missing, {conflicts} conflicts "
+                  f"({moved / max(time.perf_counter() - started, 1e-6):.0f}/s)")
+            if args.max_batches and batches >= args.max_batches:
+                print("Stopped at --max-batches; run again to continue.")
+                return
+            if args.pause:
+                time.sleep(args.pause)
+
+    if not args.dry_run:
+        _save_checkpoint(last_id)
+    print(f"Done: {moved} file(s) {'to move' if args.dry_run else 'moved'}, "
+          f"{missing} missing on disk, {conflicts} left in place (name conflict).")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,4 +7,6 @@ from .event import Event
 from .share import Share
 from .guest import Guest            # NEW
 from .photo_reaction import PhotoReaction  # NEW
+from .photo_edit import PhotoEdit
+from .timeline_bucket import TimelineBucket
 # from .event_albums import EventAlbum   # if you keep a mapped class for the association
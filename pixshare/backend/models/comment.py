@@ -5,7 +5,7 @@ from datetime import datetime
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     # Auth user (optional if guest comments are allowed)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
@@ -10,14 +10,18 @@ class Event(db.Model):
 
     # NEW
     share_id = db.Column(db.String(48), unique=True, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
     albums = db.relationship(
         "Album",
         secondary=event_albums,
-        lazy="subquery",
+        lazy=True,  # "subquery" fired an extra album query on every Event load
         backref=db.backref("events", lazy=True),
         cascade="save-update",
+    )
+
+    __table_args__ = (
+        db.Index("ix_event_user_created", "user_id", "created_at"),  # GET /events pages
     )
\ No newline at end of file
@@ -10,6 +10,10 @@ class EventParticipant(db.Model):
     # store the share token this user used to join (lets us authorize /uploads)
     share_token = db.Column(db.String(255), nullable=False)
 
+    # Activity, written in batches by utils/activity.py (not per request)
+    last_seen_at = db.Column(db.DateTime, nullable=True)
+    view_count = db.Column(db.Integer, nullable=False, default=0)
+
     __table_args__ = (
         db.UniqueConstraint("event_id", "user_id", name="uq_event_user"),
         db.Index("ix_event_participant_event", "event_id"),
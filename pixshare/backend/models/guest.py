@@ -14,7 +14,13 @@ class Guest(db.Model):
     display_name = db.Column(db.String(80), nullable=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Activity, written in batches by utils/activity.py (not per request)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    view_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Upload quota counters (bumped with a conditional UPDATE, see routes/photos.upload_via_share)
+    upload_count = db.Column(db.Integer, nullable=False, default=0)
+    upload_bytes = db.Column(db.BigInteger, nullable=False, default=0)
 
     # Relationships
     comments = db.relationship("Comment", backref="guest", lazy=True)
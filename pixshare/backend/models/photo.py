@@ -9,6 +9,14 @@ class Photo(db.Model):
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     size = db.Column(db.BigInteger, default=0)
 
+    # Display metadata from utils/imaging.py (None until computed)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    placeholder = db.Column(db.Text, nullable=True)  # tiny data: URI preview
+    phash = db.Column(db.String(16), nullable=True)  # 64-bit dHash, hex (utils/phash.py)
+    checksum = db.Column(db.String(64), nullable=True)  # SHA-256 of the original, hex (utils/checksums.py)
+    last_accessed_at = db.Column(db.DateTime, nullable=True)  # last /uploads hit (utils/activity.py); picks cold-tier candidates
+
     album_id = db.Column(db.Integer, db.ForeignKey("album.id"), nullable=False)
     user_id  = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
@@ -34,3 +42,8 @@ class Photo(db.Model):
         lazy=True,
         cascade="all, delete-orphan"
     )
+
+    __table_args__ = (
+        db.Index("ix_photo_user_checksum", "user_id", "checksum"),  # exact-duplicate lookups
+        db.Index("ix_photo_filepath", "filepath"),  # path-ordered scrub (utils/scrubber.py)
+    )
@@ -0,0 +1,18 @@
+# backend/models/photo_edit.py
+from extensions import db
+from datetime import datetime
+
+class PhotoEdit(db.Model):
+    """Current non-destructive edit of a photo; the original file is never rewritten."""
+    __tablename__ = "photo_edit"
+
+    id = db.Column(db.Integer, primary_key=True)
+    photo_id = db.Column(db.Integer, db.ForeignKey("photo.id"), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)  # last editor
+
+    # Canonical JSON from utils.imaging.normalize_recipe, and its hash (render cache key)
+    recipe = db.Column(db.Text, nullable=False)
+    recipe_hash = db.Column(db.String(40), nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
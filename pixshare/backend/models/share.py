@@ -26,6 +26,10 @@ class Share(db.Model):
     max_upload_bytes = db.Column(db.BigInteger, nullable=True)
     max_files_per_guest = db.Column(db.Integer, nullable=True)
 
+    # Activity, written in batches by utils/activity.py (not per request)
+    last_used_at = db.Column(db.DateTime, nullable=True)
+    view_count = db.Column(db.Integer, nullable=False, default=0)
+
     # Optional backrefs (won’t break existing code)
     guests = db.relationship("Guest", backref="share", lazy=True)
 
@@ -33,4 +37,6 @@ class Share(db.Model):
         db.Index("ix_share_album", "album_id"),
         db.Index("ix_share_photo", "photo_id"),
         db.Index("ix_share_event", "event_id"),
+        db.Index("ix_share_created", "created_at"),  # token filter catch-up query
+        db.Index("ix_share_expires", "expires_at"),  # expiry sweeps (utils/share_sweeper.py)
     )
\ No newline at end of file
@@ -0,0 +1,22 @@
+# backend/models/timeline_bucket.py
+from extensions import db
+
+class TimelineBucket(db.Model):
+    """
+    Photo count per album per day / month of upload, maintained on upload and
+    delete (utils/timeline.py) so GET /timeline reads buckets, not photos.
+    """
+    __tablename__ = "timeline_bucket"
+
+    id = db.Column(db.Integer, primary_key=True)
+    album_id = db.Column(db.Integer, db.ForeignKey("album.id"), nullable=False)
+    granularity = db.Column(db.String(5), nullable=False)  # "day" | "month"
+    bucket_start = db.Column(db.Date, nullable=False)      # the day, or the 1st of the month
+
+    photo_count = db.Column(db.Integer, nullable=False, default=0)
+    sample_ids = db.Column(db.Text, nullable=False, default="[]")  # JSON list, newest first
+
+    __table_args__ = (
+        db.UniqueConstraint("album_id", "granularity", "bucket_start", name="uq_timeline_bucket"),
+        db.Index("ix_timeline_bucket_scan", "granularity", "bucket_start"),
+    )
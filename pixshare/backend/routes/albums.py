@@ -1,12 +1,23 @@
 # backend/routes/albums.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from models.album import Album
 from models.photo import Photo
 from models.event_participant import EventParticipant
+from config import Config
+from utils.cold_storage import discard_cold
+from utils.event_manifest import invalidate_album_manifests
+from utils.phash import duplicate_groups_payload, max_distance_param
+from utils.similarity import similarity_index
+from utils.sprites import album_sprite, invalidate_album_sprites, sprite_path, sprites_available
+from utils.timeline import album_removed
+from utils.rate_limit import client_ip, penalize_share_miss, share_admission, too_many_requests
+from utils.uploads_auth import admit_upload
+from sqlalchemy import func
 import os
 import shutil
+from urllib.parse import urlencode
 
 # optional: association table
 try:
@@ -17,7 +28,7 @@ except Exception:
 albums_bp = Blueprint("albums", __name__)
 
 # 📁 Uploads folder is outside the backend directory
-BASE_UPLOAD_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../uploads"))
+BASE_UPLOAD_DIR = Config.UPLOAD_ROOT
 PHOTO_UPLOAD_ROOT = os.path.join(BASE_UPLOAD_DIR, "photos")
 
 def _uid():
@@ -50,16 +61,23 @@ def _user_can_view_album(user_id: int, album_id: int) -> bool:
 @jwt_required()
 def get_albums():
     user_id = _uid()
-    albums = Album.query.filter_by(user_id=user_id).all()
+    # Count photos in the same query; len(album.photos) would load every photo of every album
+    rows = (
+        db.session.query(Album, func.count(Photo.id))
+        .outerjoin(Photo, Photo.album_id == Album.id)
+        .filter(Album.user_id == user_id)
+        .group_by(Album.id)
+        .all()
+    )
     return jsonify({
         "albums": [
             {
                 "id": album.id,
                 "name": album.title,
                 "created_at": album.created_at.isoformat(),
-                "photo_count": len(album.photos)
+                "photo_count": photo_count
             }
-            for album in albums
+            for album, photo_count in rows
         ]
     }), 200
 
@@ -77,7 +95,7 @@ def get_album(album_id):
         "id": album.id,
         "name": album.title,
         "created_at": album.created_at.isoformat(),
-        "photo_count": len(album.photos)
+        "photo_count": db.session.query(func.count(Photo.id)).filter(Photo.album_id == album.id).scalar()
     }), 200
 
 # GET /api/albums/<album_id>/photos — allow owner OR participant (read-only)
@@ -97,12 +115,124 @@ def get_photos(album_id):
                 "filename": p.filename,
                 "filepath": p.filepath,
                 "uploaded_at": p.uploaded_at.isoformat(),
+                "width": p.width,
+                "height": p.height,
+                "placeholder": p.placeholder,
                 "size": getattr(p, "size", 0),
             }
             for p in photos
         ]
     }), 200
 
+# GET /api/albums/<album_id>/duplicates?distance=4 — near-identical photos, grouped
+@albums_bp.route("/albums/<int:album_id>/duplicates", methods=["GET"])
+@jwt_required()
+def get_album_duplicates(album_id):
+    user_id = _uid()
+    album = Album.query.get(album_id)
+    if not album or not _user_can_view_album(user_id, album_id):
+        return jsonify({"msg": "Album not found"}), 404
+
+    rows = (
+        db.session.query(
+            Photo.id, Photo.filename, Photo.filepath, Photo.uploaded_at, Photo.width, Photo.height,
+            Photo.placeholder, Photo.size, Photo.album_id, Photo.phash,
+        )
+        .filter(Photo.album_id == album.id)
+        .order_by(Photo.uploaded_at.asc(), Photo.id.asc())
+        .all()
+    )
+    distance = max_distance_param(request.args.get("distance", type=int))
+    return jsonify(duplicate_groups_payload(rows, distance)), 200
+
+# ---------- Contact-sheet sprite ----------
+
+def _album_sprite_for_request(album_id):
+    """
+    ((album_id, page, key, offsets), None) or (None, error response). Authorized like
+    /uploads files of the album: ?t=<share token>, or owner/participant JWT
+    (Authorization header or ?a=<JWT>), with the same per-IP share admission.
+    """
+    if not sprites_available():
+        return None, (jsonify({"msg": "Sprites are not available on this server"}), 501)
+
+    token = (request.args.get("t") or request.args.get("token") or "").strip()
+    if token and current_app.config.get("SHARE_RATE_LIMIT_ENABLED", True):
+        wait = share_admission.blocked(client_ip())  # refused before any lookup, like /uploads
+        if wait:
+            return None, too_many_requests(wait)
+    album = Album.query.get(album_id)
+    if not album:
+        if token:
+            penalize_share_miss()
+        return None, (jsonify({"msg": "Album not found"}), 404)
+    status, wait = admit_upload(f"photos/{album.user_id}/{album.id}/", token, get_jwt_identity(), client_ip())
+    if wait:
+        return None, too_many_requests(wait)
+    if status != 200:
+        return None, (jsonify({"msg": "Album not found"}), 404)
+
+    page_size = Config.SPRITE_PAGE_SIZE
+    page = max(request.args.get("page", 0, type=int), 0)
+    photos = (
+        db.session.query(Photo.id, Photo.filepath)
+        .filter(Photo.album_id == album.id)
+        .order_by(Photo.id)
+        .offset(page * page_size)
+        .limit(page_size)
+        .all()
+    )
+    key, offsets = album_sprite(album.id, page, [tuple(p) for p in photos], BASE_UPLOAD_DIR)
+    return (album.id, page, key, offsets), None
+
+# GET /api/albums/<album_id>/sprite.json?page=N — offset map for one page of tiles
+@albums_bp.route("/albums/<int:album_id>/sprite.json", methods=["GET"])
+@jwt_required(optional=True, locations=["headers", "query_string"])
+def get_album_sprite_map(album_id):
+    sprite, error = _album_sprite_for_request(album_id)
+    if error:
+        return error
+    album_id, page, key, offsets = sprite
+
+    # The image URL is versioned by key, so the browser may cache it forever
+    params = {"page": page, "v": key}
+    params.update({k: request.args[k] for k in ("t", "a") if request.args.get(k)})
+    url = f"/api/albums/{album_id}/sprite.webp?{urlencode(params)}"
+    return jsonify({
+        "sprite": url,
+        "page": page,
+        "page_size": Config.SPRITE_PAGE_SIZE,
+        **offsets,
+    }), 200
+
+# GET /api/albums/<album_id>/sprite.webp?page=N — the contact sheet itself
+@albums_bp.route("/albums/<int:album_id>/sprite.webp", methods=["GET"])
+@jwt_required(optional=True, locations=["headers", "query_string"])
+def get_album_sprite(album_id):
+    sprite, error = _album_sprite_for_request(album_id)
+    if error:
+        return error
+    album_id, page, key, _offsets = sprite
+
+    # A rebuild or invalidate_album_sprites can delete the file between album_sprite()
+    # and the open in send_file: build it once more, then give up with a 404.
+    for attempt in range(2):
+        try:
+            resp = send_file(sprite_path(album_id, page, key), mimetype="image/webp", conditional=True)
+            break
+        except FileNotFoundError:
+            if attempt:
+                return jsonify({"msg": "Sprite not found"}), 404
+            sprite, error = _album_sprite_for_request(album_id)
+            if error:
+                return error
+            album_id, page, key, _offsets = sprite
+    if request.args.get("v") == key:
+        resp.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    else:
+        resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
 # POST /api/albums — Create a new album (owner-only)  (unchanged)
 @albums_bp.route("/albums", methods=["POST"])
 @jwt_required()
@@ -135,15 +265,28 @@ def delete_album(album_id):
         return jsonify({"msg": "Album not found"}), 404
 
     from models.photo import Photo  # avoid circular import
-    photos = Photo.query.filter_by(album_id=album.id, user_id=user_id).all()
-    for photo in photos:
-        full_path = os.path.join(BASE_UPLOAD_DIR, photo.filepath)
+    from models.photo_reaction import PhotoReaction
+    from models.photo_edit import PhotoEdit
+    photos = (
+        db.session.query(Photo.id, Photo.filepath)
+        .filter_by(album_id=album.id, user_id=user_id)
+        .all()
+    )
+    for _, filepath in photos:
+        full_path = os.path.join(BASE_UPLOAD_DIR, filepath)
         if os.path.exists(full_path):
             try:
                 os.remove(full_path)
             except OSError:
                 pass
-        db.session.delete(photo)
+        discard_cold(filepath)
+
+    # Bulk deletes: session.delete() per photo also loaded each photo's reactions (N+1)
+    photo_ids = [pid for pid, _ in photos]
+    if photo_ids:
+        PhotoReaction.query.filter(PhotoReaction.photo_id.in_(photo_ids)).delete(synchronize_session=False)
+        PhotoEdit.query.filter(PhotoEdit.photo_id.in_(photo_ids)).delete(synchronize_session=False)
+        Photo.query.filter(Photo.id.in_(photo_ids)).delete(synchronize_session=False)
 
     album_folder = os.path.join(PHOTO_UPLOAD_ROOT, str(user_id), str(album.id))
     if os.path.exists(album_folder):
@@ -152,6 +295,10 @@ def delete_album(album_id):
         except OSError:
             pass
 
+    album_removed(album.id)
     db.session.delete(album)
     db.session.commit()
+    invalidate_album_manifests([album_id])
+    invalidate_album_sprites([album_id])
+    similarity_index.remove(user_id, photo_ids)
     return jsonify({"msg": "Album and all associated photos deleted"}), 200
@@ -1,7 +1,7 @@
 # backend/routes/comments.py
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import select, exists
+from sqlalchemy import and_, exists, func, or_, select
 from extensions import db
 
 # Models
@@ -12,32 +12,49 @@ from models.share import Share
 from models.event import Event
 from models.event_albums import event_albums as EventAlbum
 from models.event_participant import EventParticipant
-from models.user import User  # used for display name if available
+from models.user import User
+from models.guest import Guest
+from utils.activity import touch_guest
+from utils.guests import guest_for_share, request_guest_key
+from utils.cursors import decode_cursor, encode_cursor
+from utils.share_tokens import resolve_share_token
 
 comments_bp = Blueprint("comments", __name__)
 
 # -------------------- Helpers --------------------
 
-def _serialize_comment(c: Comment):
-    # Try to provide a friendly author label without needing a DB column
-    author_label = "Guest"
-    try:
-        # Prefer joined relationship if present
-        u = getattr(c, "user", None)
-        if u:
-            author_label = getattr(u, "name", None) or getattr(u, "username", None) or getattr(u, "email", None) or f"User {u.id}"
-        elif getattr(c, "user_id", None):
-            # Fallback without eager relationship
-            author_label = f"User {c.user_id}"
-    except Exception:
-        if getattr(c, "user_id", None):
-            author_label = f"User {c.user_id}"
+COMMENTS_PAGE_SIZE = 50
+COMMENTS_MAX_PAGE_SIZE = 200
+LATEST_MAX_PHOTOS = 200
+LATEST_MAX_PER_PHOTO = 20
+
+def _comment_query():
+    """Comment columns plus author names (user or guest) in one joined SELECT."""
+    return (
+        db.session.query(
+            Comment.id, Comment.photo_id, Comment.content, Comment.created_at,
+            Comment.user_id, Comment.guest_id, User.full_name, Guest.display_name,
+        )
+        .outerjoin(User, User.id == Comment.user_id)
+        .outerjoin(Guest, Guest.id == Comment.guest_id)
+    )
 
+def _serialize_comment(row, user_name=None, guest_name=None):
+    """`row` is a _comment_query() row or a Comment (then pass the author names)."""
+    user_name = getattr(row, "full_name", user_name)
+    guest_name = getattr(row, "display_name", guest_name)
+    if row.user_id:
+        author, author_type = user_name or f"User {row.user_id}", "user"
+    else:
+        author, author_type = guest_name or "Guest", "guest"
     return {
-        "id": c.id,
-        "content": c.content,
-        "author": author_label,
-        "created_at": c.created_at.isoformat() if getattr(c, "created_at", None) else None,
+        "id": row.id,
+        "content": row.content,
+        "author": author,
+        "author_type": author_type,
+        "user_id": row.user_id,
+        "guest_id": row.guest_id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
     }
 
 def _photo_and_album(photo_id: int):
@@ -62,35 +79,33 @@ def _album_ids_for_event(event_id: int):
         except Exception:
             return set()
 
-def _share_allows_photo(token: str, photo_id: int) -> tuple[bool, bool]:
-    """
-    Returns (allowed, can_comment) for a given share token and target photo.
-    """
+def _share_for_photo(token: str, photo_id: int):
+    """The share behind `token` if it grants access to the photo, else None."""
     if not token:
-        return (False, False)
+        return None
 
-    s: Share | None = Share.query.filter_by(token=token).first()
+    s: Share | None = resolve_share_token(token)
     if not s:
-        return (False, False)
+        return None
 
     photo, album = _photo_and_album(photo_id)
     if not photo or not album:
-        return (False, False)
+        return None
 
     # Photo share: exact match
     if getattr(s, "photo_id", None):
-        return (photo.id == s.photo_id, bool(getattr(s, "can_comment", False)))
+        return s if photo.id == s.photo_id else None
 
     # Album share: photo must be in this album
     if getattr(s, "album_id", None):
-        return (getattr(photo, "album_id", None) == s.album_id, bool(getattr(s, "can_comment", False)))
+        return s if getattr(photo, "album_id", None) == s.album_id else None
 
     # Event share: photo's album must be one of the event albums
     if getattr(s, "event_id", None):
         allowed_albums = _album_ids_for_event(s.event_id)
-        return (getattr(photo, "album_id", None) in allowed_albums, bool(getattr(s, "can_comment", False)))
+        return s if getattr(photo, "album_id", None) in allowed_albums else None
 
-    return (False, False)
+    return None
 
 def _user_can_read_photo(uid, photo_id: int) -> bool:
     """
@@ -128,34 +143,130 @@ def _user_can_write_photo(uid, photo_id: int) -> bool:
     # same rule as read for now
     return _user_can_read_photo(uid, photo_id)
 
+def _readable_photo_ids(photo_ids, uid, token: str) -> set:
+    """Subset of `photo_ids` the caller may read (share token, else owner/participant JWT), in one query."""
+    q = db.session.query(Photo.id).filter(Photo.id.in_(photo_ids))
+    if token:
+        s = resolve_share_token(token)
+        if not s:
+            return set()
+        if s.photo_id:
+            return {s.photo_id} & set(photo_ids)
+        if s.album_id:
+            q = q.filter(Photo.album_id == s.album_id)
+        elif s.event_id:
+            q = q.filter(Photo.album_id.in_(
+                select(EventAlbum.c.album_id).where(EventAlbum.c.event_id == s.event_id)
+            ))
+        else:
+            return set()
+    elif uid:
+        joined = (
+            select(EventAlbum.c.album_id)
+            .join(EventParticipant, EventParticipant.event_id == EventAlbum.c.event_id)
+            .where(EventParticipant.user_id == uid)
+        )
+        q = q.join(Album, Album.id == Photo.album_id).filter(
+            or_(Album.user_id == uid, Photo.album_id.in_(joined))
+        )
+    else:
+        return set()
+    return {r[0] for r in q.all()}
+
 # -------------------- Routes --------------------
 
 @comments_bp.route("/photos/<int:photo_id>/comments", methods=["GET"])
 @jwt_required(optional=True, locations=["headers"])
 def list_comments(photo_id):
     """
-    Read comments either:
+    Read comments (oldest first, ?limit= per page, ?after=<next_cursor>) either:
       - via header JWT (owner/participant), or
       - via share token ?t=<token> (public).
     """
     token = (request.args.get("t") or "").strip()
     uid = get_jwt_identity()
 
-    allowed = False
     if token:
-        allowed, _ = _share_allows_photo(token, photo_id)
+        allowed = _share_for_photo(token, photo_id) is not None
     else:
         allowed = _user_can_read_photo(uid, photo_id)
 
     if not allowed:
         return jsonify({"msg": "Not authorized to view comments"}), 401
 
+    limit = max(1, min(request.args.get("limit", COMMENTS_PAGE_SIZE, type=int), COMMENTS_MAX_PAGE_SIZE))
+    q = _comment_query().filter(Comment.photo_id == photo_id)
+    if request.args.get("after"):
+        try:
+            after_ts, after_id = decode_cursor(request.args["after"])
+        except ValueError:
+            return jsonify({"msg": "Invalid cursor"}), 400
+        q = q.filter(or_(
+            Comment.created_at > after_ts,
+            and_(Comment.created_at == after_ts, Comment.id > after_id),
+        ))
+
+    rows = q.order_by(Comment.created_at.asc(), Comment.id.asc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return jsonify({
+        "comments": [_serialize_comment(r) for r in rows],
+        "next_cursor": encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+    }), 200
+
+
+@comments_bp.route("/comments/latest", methods=["GET"])
+@jwt_required(optional=True, locations=["headers"])
+def latest_comments():
+    """
+    GET /api/comments/latest?photo_ids=1,2,3&n=3[&t=<token>]
+    The newest `n` comments (oldest first) and the total count for each photo,
+    for gallery overlays — one windowed query instead of a request per photo.
+    Photos the caller can't read are left out.
+    """
+    token = (request.args.get("t") or "").strip()
+    uid = get_jwt_identity()
+    try:
+        photo_ids = {int(x) for x in (request.args.get("photo_ids") or "").split(",") if x.strip()}
+    except ValueError:
+        return jsonify({"msg": "photo_ids must be a comma-separated list of ids"}), 400
+    if not photo_ids:
+        return jsonify({"msg": "photo_ids required"}), 400
+    if len(photo_ids) > LATEST_MAX_PHOTOS:
+        return jsonify({"msg": f"At most {LATEST_MAX_PHOTOS} photo_ids per request"}), 400
+    n = max(1, min(request.args.get("n", 3, type=int), LATEST_MAX_PER_PHOTO))
+
+    readable = _readable_photo_ids(photo_ids, uid, token)
+    if not readable:
+        return jsonify({"photos": {}}), 200
+
+    ranked = (
+        select(
+            Comment.id, Comment.photo_id, Comment.content, Comment.created_at,
+            Comment.user_id, Comment.guest_id,
+            func.row_number().over(
+                partition_by=Comment.photo_id,
+                order_by=(Comment.created_at.desc(), Comment.id.desc()),
+            ).label("rn"),
+            func.count().over(partition_by=Comment.photo_id).label("total"),
+        )
+        .where(Comment.photo_id.in_(readable))
+        .subquery()
+    )
     rows = (
-        Comment.query.filter_by(photo_id=photo_id)
-        .order_by(Comment.created_at.asc())
+        db.session.query(ranked, User.full_name, Guest.display_name)
+        .outerjoin(User, User.id == ranked.c.user_id)
+        .outerjoin(Guest, Guest.id == ranked.c.guest_id)
+        .filter(ranked.c.rn <= n)
+        .order_by(ranked.c.photo_id, ranked.c.created_at.asc(), ranked.c.id.asc())
         .all()
     )
-    return jsonify({"comments": [_serialize_comment(c) for c in rows]}), 200
+
+    out = {pid: {"count": 0, "comments": []} for pid in readable}
+    for r in rows:
+        out[r.photo_id]["count"] = r.total
+        out[r.photo_id]["comments"].append(_serialize_comment(r))
+    return jsonify({"photos": {str(pid): v for pid, v in out.items()}}), 200
 
 
 @comments_bp.route("/photos/<int:photo_id>/comments", methods=["POST"])
@@ -164,7 +275,9 @@ def create_comment(photo_id):
     """
     Create a comment either:
       - via JWT (owner/participant), or
-      - via share token ?t=<token> if that share has can_comment=True.
+      - via share token ?t=<token> if that share has can_comment=True. Anonymous
+        commenters get a guest identity (X-Guest-Key, optional "name" in the body);
+        the key is returned so the client can keep it.
     """
     token = (request.args.get("t") or "").strip()
     uid = get_jwt_identity()  # may be None if optional and unauthenticated
@@ -175,30 +288,32 @@ def create_comment(photo_id):
     if not content:
         return jsonify({"msg": "Content required"}), 400
 
-    # Check if user_id is nullable to decide whether anonymous shared comments are allowed at DB level
-    user_nullable = True
-    try:
-        user_nullable = Comment.__table__.c.user_id.nullable  # type: ignore[attr-defined]
-    except Exception:
-        user_nullable = True  # assume nullable if we can't inspect
+    user_name = db.session.query(User.full_name).filter_by(id=uid).scalar() if uid else None
 
     if token:
-        allowed, can_comment = _share_allows_photo(token, photo_id)
-        if not allowed:
+        s = _share_for_photo(token, photo_id)
+        if s is None:
             return jsonify({"msg": "Invalid or unauthorized share token"}), 401
-        if not can_comment:
+        if not s.can_comment:
             return jsonify({"msg": "Commenting disabled for this share link"}), 403
-        if not uid and not user_nullable:
-            return jsonify({"msg": "Login required to comment on this share"}), 401
 
-        comment = Comment(
-            photo_id=photo_id,
-            content=content,
-            user_id=uid if uid else None,
-        )
+        comment = Comment(photo_id=photo_id, content=content, user_id=uid if uid else None, share_id=s.id)
+        guest_key = guest = None
+        if not uid:
+            guest_key = request_guest_key()
+            name = (data.get("name") or "").strip()[:80] or None
+            guest = guest_for_share(s, guest_key, display_name=name)
+            if guest is None:
+                return jsonify({"msg": "Guest key belongs to another link"}), 403
+            comment.guest_id = guest.id
+            touch_guest(guest_key)
         db.session.add(comment)
+        db.session.flush()
+        payload = {"comment": _serialize_comment(comment, user_name, guest.display_name if guest else None)}
+        if guest_key:
+            payload["guest_key"] = guest_key
         db.session.commit()
-        return jsonify({"comment": _serialize_comment(comment)}), 201
+        return jsonify(payload), 201
 
     # JWT path (no share token)
     if not uid:
@@ -212,8 +327,10 @@ def create_comment(photo_id):
         user_id=uid,
     )
     db.session.add(comment)
+    db.session.flush()
+    payload = {"comment": _serialize_comment(comment, user_name)}
     db.session.commit()
-    return jsonify({"comment": _serialize_comment(comment)}), 201
+    return jsonify(payload), 201
 
 
 @comments_bp.route("/photos/<int:photo_id>/comments/<int:comment_id>", methods=["DELETE"])
@@ -1,20 +1,36 @@
 # backend/routes/dashboard.py
-from flask import Blueprint, jsonify
+import json
+import threading
+import time
+from datetime import date
+from typing import Optional
+
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.album import Album
 from models.photo import Photo
+from models.user import User
+from models.event_albums import event_albums
+from models.event_participant import EventParticipant
+from models.timeline_bucket import TimelineBucket
 from extensions import db
+from sqlalchemy import or_, select
 from sqlalchemy.sql import func
+from routes.events import events_page
+from utils.metrics import cache_hit, cache_miss
+from utils.timeline import GRANULARITIES, TIMELINE_SAMPLES
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
+STORAGE_LIMIT_GB = 10
+
 @dashboard_bp.route("/dashboard/storage", methods=["GET"])
 @jwt_required(locations=["headers"])
 def get_storage_usage():
     user_id = get_jwt_identity()
     total_bytes = db.session.query(func.sum(Photo.size)).filter_by(user_id=user_id).scalar() or 0
     total_gb = round(total_bytes / (1024 ** 3), 2)
-    return jsonify({"used_gb": total_gb, "limit_gb": 10}), 200
+    return jsonify({"used_gb": total_gb, "limit_gb": STORAGE_LIMIT_GB}), 200
 
 @dashboard_bp.route("/dashboard/recent-albums", methods=["GET"])
 @jwt_required(locations=["headers"])
@@ -33,3 +49,175 @@ def get_recent_albums():
             for a in albums
         ]
     }), 200
+
+# ---------- App shell bootstrap ----------
+
+# user id -> (expires at, payload); only used when BOOTSTRAP_CACHE_SECONDS > 0
+_bootstrap_cache: dict = {}
+_bootstrap_lock = threading.Lock()
+_BOOTSTRAP_CACHE_MAX = 10000
+
+@dashboard_bp.after_app_request
+def _forget_bootstrap(response):
+    """Any successful write by a user drops their cached bootstrap payload (this process only)."""
+    if _bootstrap_cache and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        try:
+            uid = get_jwt_identity()
+        except RuntimeError:  # route without jwt_required
+            uid = None
+        if uid is not None:
+            with _bootstrap_lock:
+                _bootstrap_cache.pop(str(uid), None)
+    return response
+
+def _bootstrap_payload(user_id: int, events_limit: int) -> Optional[dict]:
+    user = db.session.execute(
+        select(
+            User.full_name,
+            User.email,
+            select(func.coalesce(func.sum(Photo.size), 0)).where(Photo.user_id == user_id).scalar_subquery(),
+        ).where(User.id == user_id)
+    ).first()
+    if user is None:
+        return None
+    full_name, email, used_bytes = user
+
+    # Same aggregate as GET /albums; the recent ones are picked from these rows
+    albums = (
+        db.session.query(Album.id, Album.title, Album.created_at, func.count(Photo.id))
+        .outerjoin(Photo, Photo.album_id == Album.id)
+        .filter(Album.user_id == user_id)
+        .group_by(Album.id)
+        .all()
+    )
+    recent = sorted(albums, key=lambda a: (a.created_at, a.id), reverse=True)[:3]
+    events, next_cursor = events_page(user_id, events_limit)
+
+    return {
+        "profile": {"name": full_name or "", "email": email or "", "subscription": "Free"},
+        "storage": {"used_gb": round(int(used_bytes) / (1024 ** 3), 2), "limit_gb": STORAGE_LIMIT_GB},
+        "albums": [
+            {"id": a_id, "name": title, "created_at": created_at.isoformat(), "photo_count": count}
+            for a_id, title, created_at, count in albums
+        ],
+        "recent_albums": [
+            {"id": a_id, "name": title, "created_at": created_at.isoformat()}
+            for a_id, title, created_at, _ in recent
+        ],
+        "events": events,
+        "events_next_cursor": next_cursor,
+    }
+
+# GET /api/bootstrap?events_limit=50
+@dashboard_bp.route("/bootstrap", methods=["GET"])
+@jwt_required(locations=["headers"])
+def get_bootstrap():
+    """
+    Everything the dashboard / app shell loads on start in one response:
+    profile, storage, albums (with photo counts), the three most recent
+    albums, and the first page of GET /events (continue with
+    /events?cursor=<events_next_cursor>). Four queries, whatever the amount
+    of data. With BOOTSTRAP_CACHE_SECONDS > 0 the payload is kept per user
+    for that long and dropped early on any write the user makes through this
+    process; leave it at 0 when several workers serve the API.
+    """
+    uid = get_jwt_identity()
+    events_limit = max(1, min(request.args.get("events_limit", 50, type=int), 200))
+    ttl = float(current_app.config.get("BOOTSTRAP_CACHE_SECONDS", 0))
+    key = str(uid)
+    if ttl > 0:
+        with _bootstrap_lock:
+            hit = _bootstrap_cache.get(key)
+        if hit and hit[0] > time.monotonic() and hit[1] == events_limit:
+            cache_hit("bootstrap")
+            return jsonify(hit[2]), 200
+        cache_miss("bootstrap")
+
+    try:
+        user_id = int(uid)
+    except (TypeError, ValueError):
+        return jsonify({"msg": "User not found"}), 404
+    payload = _bootstrap_payload(user_id, events_limit)
+    if payload is None:
+        return jsonify({"msg": "User not found"}), 404
+
+    if ttl > 0:
+        now = time.monotonic()
+        with _bootstrap_lock:
+            if len(_bootstrap_cache) >= _BOOTSTRAP_CACHE_MAX:
+                for k in [k for k, v in _bootstrap_cache.items() if v[0] <= now]:
+                    del _bootstrap_cache[k]
+                if len(_bootstrap_cache) >= _BOOTSTRAP_CACHE_MAX:
+                    _bootstrap_cache.clear()
+            _bootstrap_cache[key] = (now + ttl, events_limit, payload)
+    return jsonify(payload), 200
+
+# GET /api/timeline?granularity=month&before=2024-06-01&limit=24
+@dashboard_bp.route("/timeline", methods=["GET"])
+@jwt_required(locations=["headers"])
+def get_timeline():
+    """
+    Photo counts per day/month (newest first) across the caller's own albums
+    and albums of events they joined, with a few sample photo ids per bucket.
+    Reads the TimelineBucket rollups: cost grows with buckets, not photos.
+    Page backwards with ?before=<next_before>.
+    """
+    user_id = get_jwt_identity()
+    granularity = request.args.get("granularity", "month")
+    if granularity not in GRANULARITIES:
+        return jsonify({"msg": f"granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+    limit = max(1, min(request.args.get("limit", 24, type=int), 366))
+    before = None
+    if request.args.get("before"):
+        try:
+            before = date.fromisoformat(request.args["before"])
+        except ValueError:
+            return jsonify({"msg": "before must be YYYY-MM-DD"}), 400
+
+    owned = select(Album.id).where(Album.user_id == user_id)
+    joined = (
+        select(event_albums.c.album_id)
+        .join(EventParticipant, EventParticipant.event_id == event_albums.c.event_id)
+        .where(EventParticipant.user_id == user_id)
+    )
+    scope = [
+        TimelineBucket.granularity == granularity,
+        or_(TimelineBucket.album_id.in_(owned), TimelineBucket.album_id.in_(joined)),
+    ]
+    if before is not None:
+        scope.append(TimelineBucket.bucket_start < before)
+
+    totals = (
+        db.session.query(TimelineBucket.bucket_start, func.sum(TimelineBucket.photo_count), func.count())
+        .filter(*scope)
+        .group_by(TimelineBucket.bucket_start)
+        .order_by(TimelineBucket.bucket_start.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(totals) > limit
+    totals = totals[:limit]
+
+    samples = {}
+    if totals:
+        rows = (
+            db.session.query(TimelineBucket.bucket_start, TimelineBucket.sample_ids)
+            .filter(*scope, TimelineBucket.bucket_start >= totals[-1][0])
+            .all()
+        )
+        for start, ids in rows:
+            samples.setdefault(start, []).extend(json.loads(ids))
+
+    return jsonify({
+        "granularity": granularity,
+        "buckets": [
+            {
+                "start": start.isoformat(),
+                "count": int(count),
+                "albums": albums,
+                "sample_ids": sorted(samples.get(start, []), reverse=True)[:TIMELINE_SAMPLES],
+            }
+            for start, count, albums in totals
+        ],
+        "next_before": totals[-1][0].isoformat() if has_more else None,
+    }), 200
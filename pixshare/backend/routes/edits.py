@@ -0,0 +1,185 @@
+# backend/routes/edits.py
+"""
+Non-destructive photo editing.
+
+The owner stores an edit recipe per photo (crop, rotate, exposure, resize —
+see utils.imaging.normalize_recipe); originals are never rewritten.
+/photos/<id>/render applies the recipe on demand and keeps the JPEG in an
+on-disk LRU (utils.render_cache) keyed by (photo, recipe hash, size), so
+repeated views of an edited photo are a cache hit.
+"""
+import io
+import json
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from config import Config
+from extensions import db
+from models.photo import Photo
+from models.photo_edit import PhotoEdit
+from utils.cold_storage import open_original
+from utils.imaging import Image, normalize_recipe, recipe_hash, render_recipe
+from utils.render_cache import render_cache
+from utils.uploads_auth import authorize_upload
+
+edits_bp = Blueprint("edits", __name__)
+
+BASE_UPLOAD_DIR = Config.UPLOAD_ROOT
+
+# Render sizes are bucketed so the cache holds a handful of variants per recipe
+RENDER_SIZES = (256, 512, 1024, 2048, 4096)
+DEFAULT_RENDER_SIZE = 2048
+
+# ---------- Helpers ----------
+
+def _uid():
+    uid = get_jwt_identity()
+    try:
+        return int(uid)
+    except (TypeError, ValueError):
+        return uid
+
+def _owned_photo(photo_id: int):
+    return Photo.query.filter_by(id=photo_id, user_id=_uid()).first()
+
+def _render_size(requested) -> int:
+    if not requested:
+        return DEFAULT_RENDER_SIZE
+    for size in RENDER_SIZES:
+        if requested <= size:
+            return size
+    return RENDER_SIZES[-1]
+
+def _serialize_edit(photo_id: int, edit) -> dict:
+    if edit is None:
+        return {"photo_id": photo_id, "recipe": None, "recipe_hash": None, "render_url": None}
+    return {
+        "photo_id": photo_id,
+        "recipe": json.loads(edit.recipe),
+        "recipe_hash": edit.recipe_hash,
+        "updated_at": edit.updated_at.isoformat() if edit.updated_at else None,
+        "render_url": f"/api/photos/{photo_id}/render?v={edit.recipe_hash}",
+    }
+
+# ---------- Recipe (owner only) ----------
+
+# GET /api/photos/<photo_id>/edit
+@edits_bp.route("/photos/<int:photo_id>/edit", methods=["GET"])
+@jwt_required(locations=["headers"])
+def get_edit(photo_id):
+    if not _owned_photo(photo_id):
+        return jsonify({"msg": "Photo not found"}), 404
+    edit = PhotoEdit.query.filter_by(photo_id=photo_id).first()
+    return jsonify(_serialize_edit(photo_id, edit)), 200
+
+# PUT /api/photos/<photo_id>/edit   { "recipe": { "rotate": 90, "crop": {...}, "exposure": 0.5, "resize": {"max": 2048} } }
+@edits_bp.route("/photos/<int:photo_id>/edit", methods=["PUT"])
+@jwt_required(locations=["headers"])
+def save_edit(photo_id):
+    if not _owned_photo(photo_id):
+        return jsonify({"msg": "Photo not found"}), 404
+
+    body = request.get_json() or {}
+    try:
+        recipe = normalize_recipe(body.get("recipe") or {})
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    edit = PhotoEdit.query.filter_by(photo_id=photo_id).first()
+    if not recipe:
+        # An empty recipe is the original: drop the edit
+        if edit:
+            db.session.delete(edit)
+            db.session.commit()
+        return jsonify(_serialize_edit(photo_id, None)), 200
+
+    if edit is None:
+        edit = PhotoEdit(photo_id=photo_id)
+        db.session.add(edit)
+    edit.user_id = _uid()
+    edit.recipe = json.dumps(recipe, sort_keys=True, separators=(",", ":"))
+    edit.recipe_hash = recipe_hash(recipe)
+    edit.updated_at = datetime.utcnow()
+    payload = _serialize_edit(photo_id, edit)  # before commit: no refresh needed
+    db.session.commit()
+    return jsonify(payload), 200
+
+# DELETE /api/photos/<photo_id>/edit — revert to the original
+@edits_bp.route("/photos/<int:photo_id>/edit", methods=["DELETE"])
+@jwt_required(locations=["headers"])
+def delete_edit(photo_id):
+    if not _owned_photo(photo_id):
+        return jsonify({"msg": "Photo not found"}), 404
+    PhotoEdit.query.filter_by(photo_id=photo_id).delete(synchronize_session=False)
+    db.session.commit()
+    return jsonify({"msg": "Edit removed"}), 200
+
+# ---------- Render ----------
+
+# GET /api/photos/<photo_id>/render?size=1024[&recipe=<json>]
+@edits_bp.route("/photos/<int:photo_id>/render", methods=["GET"])
+@jwt_required(optional=True, locations=["headers", "query_string"])
+def render_photo(photo_id):
+    """
+    The photo with its saved edit applied (or the original, resized), as JPEG.
+    Authorized like /uploads: ?t=<share token>, or owner/participant JWT.
+    The owner may preview an unsaved recipe with ?recipe=<json>.
+    """
+    if Image is None:
+        return jsonify({"msg": "Rendering is not available on this server"}), 501
+
+    row = (
+        db.session.query(Photo.filepath, Photo.user_id, PhotoEdit.recipe, PhotoEdit.recipe_hash)
+        .outerjoin(PhotoEdit, PhotoEdit.photo_id == Photo.id)
+        .filter(Photo.id == photo_id)
+        .first()
+    )
+    if not row:
+        return jsonify({"msg": "Photo not found"}), 404
+    filepath, owner_id, saved_recipe, saved_hash = row
+
+    token = (request.args.get("t") or request.args.get("token") or "").strip()
+    uid = get_jwt_identity()
+    if authorize_upload(filepath, token=token, uid=uid) != 200:
+        return jsonify({"msg": "Photo not found"}), 404
+
+    if request.args.get("recipe"):
+        if token or str(uid) != str(owner_id):
+            return jsonify({"msg": "Only the owner can preview edits"}), 403
+        try:
+            recipe = normalize_recipe(json.loads(request.args["recipe"]))
+        except ValueError as e:  # includes JSONDecodeError
+            return jsonify({"msg": str(e)}), 400
+        r_hash = recipe_hash(recipe)
+    elif saved_recipe:
+        recipe, r_hash = json.loads(saved_recipe), saved_hash
+    else:
+        recipe, r_hash = {}, recipe_hash({})
+
+    size = _render_size(request.args.get("size", type=int))
+    resp = None
+    path = render_cache.get(photo_id, r_hash, size)
+    if path is not None:
+        try:
+            resp = send_file(path, mimetype="image/jpeg", conditional=True, etag=f"{r_hash}-{size}")
+        except FileNotFoundError:
+            pass  # evicted by another worker since get(): render it again
+    if resp is None:
+        original = open_original(BASE_UPLOAD_DIR, filepath)  # renders don't thaw a cold original
+        if original is None:
+            return jsonify({"msg": "Original file is missing"}), 404
+        try:
+            with original:
+                data = render_recipe(original, recipe, max_size=size)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return jsonify({"msg": "Photo could not be rendered"}), 422
+        render_cache.put(photo_id, r_hash, size, data)
+        # Sent from memory: the cached file may already be evicted by the time it would be opened
+        resp = send_file(io.BytesIO(data), mimetype="image/jpeg", conditional=True, etag=f"{r_hash}-{size}")
+    if request.args.get("v") == r_hash:
+        resp.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    else:
+        resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
@@ -1,15 +1,22 @@
 # backend/routes/events.py
+from typing import Optional
+
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import select, delete, insert, update
+from sqlalchemy import and_, delete, distinct, func, insert, literal, null, or_, select, union_all, update
 from sqlalchemy.exc import IntegrityError
 from extensions import db
 from models.event import Event
 from models.album import Album
+from models.photo import Photo
 from models.event_albums import event_albums as EventAlbum
 from models.event_participant import EventParticipant
-from models.share import Share
 from routes.shares import can_contribute_event
+from utils.cursors import decode_cursor, encode_cursor
+from utils.share_tokens import resolve_share_token
+from utils.activity import touch_participant
+from utils.event_manifest import invalidate_event_manifests
+from utils.phash import duplicate_groups_payload, max_distance_param
 import secrets
 
 events_bp = Blueprint("events", __name__)
@@ -86,43 +93,100 @@ def _serialize_event(ev, participant_row: EventParticipant | None = None):
 
 # ---------- Routes ----------
 
-@events_bp.route("/events", methods=["GET"])
-@jwt_required(locations=["headers"])
-def list_events():
+def events_page(user_id, limit: int, cursor: Optional[str] = None) -> tuple[list, Optional[str]]:
     """
-    Return union of:
-      - events owned by the user
-      - events where the user is a participant (collaborator)
+    (events, next_cursor) for one page of list_events; also used by
+    GET /bootstrap. Raises ValueError for a malformed cursor.
     """
-    user_id = _uid()
-
-    owned = Event.query.filter_by(user_id=user_id).all()
+    owned = select(
+        Event.id.label("event_id"),
+        literal("owner").label("role"),
+        null().label("share_token"),
+    ).where(Event.user_id == user_id)
+    joined = (
+        select(EventParticipant.event_id, literal("participant"), EventParticipant.share_token)
+        .join(Event, Event.id == EventParticipant.event_id)
+        .where(EventParticipant.user_id == user_id, Event.user_id != user_id)  # owners stay 'owner'
+    )
+    mine = union_all(owned, joined).subquery()
 
-    member_events = (
-        db.session.query(Event, EventParticipant.share_token)
-        .join(EventParticipant, EventParticipant.event_id == Event.id)
-        .filter(EventParticipant.user_id == user_id)
-        .all()
+    q = (
+        select(Event.id, Event.title, Event.share_id, Event.created_at, mine.c.role, mine.c.share_token)
+        .join(mine, mine.c.event_id == Event.id)
     )
+    if cursor:
+        after_ts, after_id = decode_cursor(cursor)
+        q = q.where(or_(
+            Event.created_at < after_ts,
+            and_(Event.created_at == after_ts, Event.id < after_id),
+        ))
+    rows = db.session.execute(
+        q.order_by(Event.created_at.desc(), Event.id.desc()).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    stats = {}
+    if rows:
+        ev_col, al_col = _ea_cols()
+        agg = (
+            select(
+                ev_col.label("event_id"),
+                func.count(distinct(al_col)).label("albums"),
+                func.count(Photo.id).label("photos"),
+                func.max(Photo.id).label("cover_id"),
+            )
+            .select_from(EventAlbum)
+            .outerjoin(Photo, Photo.album_id == al_col)
+            .where(ev_col.in_([r.id for r in rows]))
+            .group_by(ev_col)
+            .subquery()
+        )
+        stats = {
+            r.event_id: r
+            for r in db.session.execute(
+                select(agg, Photo.filepath).outerjoin(Photo, Photo.id == agg.c.cover_id)
+            ).all()
+        }
+
+    events = []
+    for r in rows:
+        st = stats.get(r.id)
+        item = {
+            "id": r.id,
+            "name": r.title,
+            "shareId": r.share_id,
+            "role": r.role,
+            "createdAt": r.created_at.isoformat() if r.created_at else None,
+            "albumCount": st.albums if st else 0,
+            "photoCount": st.photos if st else 0,
+            "coverPhotoId": st.cover_id if st else None,
+            "coverPath": st.filepath if st else None,
+        }
+        if r.role == "participant":
+            item["shareTokenForUploads"] = r.share_token
+        events.append(item)
+
+    last = rows[-1] if rows else None
+    return events, (encode_cursor(last.created_at, last.id) if has_more else None)
 
-    # merge by id with role info
-    by_id: dict[int, dict] = {}
-    for e in owned:
-        by_id[e.id] = {"id": e.id, "name": e.title, "shareId": e.share_id, "role": "owner"}
-
-    for e, share_token in member_events:
-        if e.id not in by_id:  # if you also own it, prefer 'owner'
-            by_id[e.id] = {
-                "id": e.id,
-                "name": e.title,
-                "shareId": e.share_id,
-                "role": "participant",
-                "shareTokenForUploads": share_token,
-            }
+@events_bp.route("/events", methods=["GET"])
+@jwt_required(locations=["headers"])
+def list_events():
+    """
+    GET /api/events?limit=50&cursor=<next_cursor>
 
-    # You may have a created_at column; sort desc if present
-    events = list(by_id.values())
-    return jsonify({"events": events}), 200
+    Events the user owns or joined as a participant, newest first, with album
+    and photo counts and a cover photo (the newest one). Two queries per page
+    regardless of how many events or albums are involved: the page itself,
+    then one aggregate over the page's event_albums/photos.
+    """
+    limit = max(1, min(request.args.get("limit", 50, type=int), 200))
+    try:
+        events, next_cursor = events_page(_uid(), limit, request.args.get("cursor"))
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
+    return jsonify({"events": events, "next_cursor": next_cursor}), 200
 
 @events_bp.route("/events", methods=["POST"])
 @jwt_required(locations=["headers"])
@@ -159,6 +223,7 @@ def delete_event(event_id):
         db.session.query(EventParticipant).filter_by(event_id=ev.id).delete()
         db.session.delete(ev)
         db.session.commit()
+        invalidate_event_manifests([event_id])
         return jsonify({"msg": "Event deleted"}), 200
 
     # participant: leave
@@ -181,10 +246,79 @@ def get_event(event_id):
 
     pr = EventParticipant.query.filter_by(event_id=ev.id, user_id=user_id).first()
     if pr:
+        touch_participant(ev.id, user_id)
         return jsonify({"event": _serialize_event(ev, participant_row=pr)}), 200
 
     return jsonify({"msg": "Not authorized to view this event"}), 403
 
+@events_bp.route("/events/<int:event_id>/photos", methods=["GET"])
+@jwt_required(locations=["headers"])
+def get_event_photos(event_id):
+    """
+    All photos across the event's albums in one query (instead of one
+    /albums/<id>/photos request per attached album). Owner or participant only.
+    """
+    user_id = _uid()
+    ev = Event.query.filter_by(id=event_id).first()
+    if not ev:
+        return jsonify({"msg": "Event not found"}), 404
+    if str(ev.user_id) != str(user_id) and not _is_participant(user_id, ev.id):
+        return jsonify({"msg": "Not authorized to view this event"}), 403
+
+    ev_col, al_col = _ea_cols()
+    photos = (
+        Photo.query
+        .join(EventAlbum, al_col == Photo.album_id)
+        .filter(ev_col == ev.id)
+        .order_by(Photo.uploaded_at.asc(), Photo.id.asc())
+        .all()
+    )
+    return jsonify({
+        "photos": [
+            {
+                "id": p.id,
+                "filename": p.filename,
+                "filepath": p.filepath,
+                "uploaded_at": p.uploaded_at.isoformat(),
+                "width": p.width,
+                "height": p.height,
+                "placeholder": p.placeholder,
+                "size": getattr(p, "size", 0),
+                "album_id": p.album_id,
+            }
+            for p in photos
+        ]
+    }), 200
+
+@events_bp.route("/events/<int:event_id>/duplicates", methods=["GET"])
+@jwt_required(locations=["headers"])
+def get_event_duplicates(event_id):
+    """
+    Near-identical photos (burst shots, re-uploads by different collaborators)
+    across the event's albums, grouped. ?distance= is the max Hamming distance
+    between perceptual hashes. Owner or participant only.
+    """
+    user_id = _uid()
+    ev = Event.query.filter_by(id=event_id).first()
+    if not ev:
+        return jsonify({"msg": "Event not found"}), 404
+    if str(ev.user_id) != str(user_id) and not _is_participant(user_id, ev.id):
+        return jsonify({"msg": "Not authorized to view this event"}), 403
+
+    ev_col, al_col = _ea_cols()
+    rows = (
+        db.session.query(
+            Photo.id, Photo.filename, Photo.filepath, Photo.uploaded_at, Photo.width, Photo.height,
+            Photo.placeholder, Photo.size, Photo.album_id, Photo.phash,
+        )
+        .join(EventAlbum, al_col == Photo.album_id)
+        .filter(ev_col == ev.id)
+        .order_by(Photo.uploaded_at.asc(), Photo.id.asc())
+        .all()
+    )
+    distance = max_distance_param(request.args.get("distance", type=int))
+    return jsonify(duplicate_groups_payload(rows, distance)), 200
+
 @events_bp.route("/events/<int:event_id>/albums", methods=["POST"])
 @jwt_required(locations=["headers"])
 def add_albums_to_event(event_id):
@@ -233,6 +367,7 @@ def add_albums_to_event(event_id):
     if to_add:
         _ea_insert_many(to_add)
         db.session.commit()
+        invalidate_event_manifests([ev.id])
 
     return jsonify({"event": _serialize_event(ev)}), 200
 
@@ -252,6 +387,7 @@ def remove_album_from_event(event_id, album_id):
 
     _ea_delete_pairs(event_id, album_id)
     db.session.commit()
+    invalidate_event_manifests([event_id])
     return jsonify({"msg": "Removed"}), 200
 
 # ---------- Join via shared link (creates EventParticipant) ----------
@@ -268,7 +404,7 @@ def add_event_from_shared_qs():
     if not token:
         return jsonify({"msg": "Missing share token"}), 400
 
-    s = Share.query.filter_by(token=token).first()
+    s = resolve_share_token(token)
     if not s or not s.event_id:
         return jsonify({"msg": "Invalid or expired link"}), 404
 
@@ -307,7 +443,7 @@ def add_event_from_shared_qs():
 def add_event_from_shared_path(share_or_token):
     user_id = _uid()
 
-    s = Share.query.filter_by(token=share_or_token).first()
+    s = resolve_share_token(share_or_token)
     if s and s.event_id:
         ev = Event.query.get(s.event_id)
         token = s.token
@@ -1,15 +1,33 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import update
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 import os
 
 from models.photo import Photo
 from models.album import Album
+from models.guest import Guest
+from models.photo_edit import PhotoEdit
+from models.event_albums import event_albums as EventAlbum
+from models.event_participant import EventParticipant
 from extensions import db
+from config import Config
+from utils.activity import touch_guest
+from utils.decorators import allow_jwt_or_share, require_share_permission
+from utils.rate_limit import share_rate_limited
+from utils.event_manifest import invalidate_album_manifests
+from utils.guests import guest_for_share, request_guest_key
+from utils.checksums import file_checksum, new_hasher
+from utils.cold_storage import cold_copy, discard_cold, thaw
+from utils.imaging import probe_image
+from utils.similarity import feature_vector, similarity_available, similarity_index
+from utils.timeline import photos_added, photos_removed
+from utils.upload_layout import link_upload, photo_relpath, unique_photo_relpath
 
 photos_bp = Blueprint("photos", __name__)
 
-BASE_UPLOAD_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../uploads"))
+BASE_UPLOAD_DIR = Config.UPLOAD_ROOT
 UPLOAD_FOLDER = os.path.join(BASE_UPLOAD_DIR, "photos")
 
 def _uid():
@@ -33,6 +51,20 @@ def _is_garbage_name(name: str) -> bool:
         lower == "desktop.ini"
     )
 
+def _serialize_photo(p) -> dict:
+    """Photo as the album views expect it. Routes that just inserted rows call this
+    before commit, so the attributes aren't re-selected row by row afterwards."""
+    return {
+        "id": p.id,
+        "filename": p.filename,
+        "filepath": p.filepath,
+        "uploaded_at": p.uploaded_at.isoformat(),
+        "width": p.width,
+        "height": p.height,
+        "placeholder": p.placeholder,
+        "size": getattr(p, "size", 0),
+    }
+
 @photos_bp.route("/albums/<int:album_id>/photos", methods=["GET"])
 @jwt_required(locations=["headers"])
 def get_photos(album_id):
@@ -43,16 +75,7 @@ def get_photos(album_id):
 
     photos = Photo.query.filter_by(album_id=album.id).all()
     return jsonify({
-        "photos": [
-            {
-                "id": p.id,
-                "filename": p.filename,
-                "filepath": p.filepath,
-                "uploaded_at": p.uploaded_at.isoformat(),
-                "size": getattr(p, "size", 0),
-            }
-            for p in photos
-        ]
+        "photos": [_serialize_photo(p) for p in photos]
     }), 200
 
 @photos_bp.route("/albums/<int:album_id>/photos", methods=["POST"])
@@ -83,19 +106,18 @@ def upload_photos(album_id):
 
         safe_name = secure_filename(base_name)
 
-        folder_path = os.path.join(UPLOAD_FOLDER, str(user_id), str(album_id))
-        os.makedirs(folder_path, exist_ok=True)
-
-        filepath = os.path.join(folder_path, safe_name)
-        rel_path = os.path.relpath(filepath, BASE_UPLOAD_DIR)
+        rel_path = photo_relpath(user_id, album_id, safe_name)
+        filepath = os.path.join(BASE_UPLOAD_DIR, rel_path)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
         # Skip duplicates by filename within the same album for this user
         existing = Photo.query.filter_by(
             album_id=album.id, user_id=user_id, filename=safe_name
         ).first()
         if existing:
-            # If the physical file is missing, (re)save it; otherwise just skip
-            if not os.path.exists(os.path.join(BASE_UPLOAD_DIR, existing.filepath)):
+            # If the physical file is missing (and not in the cold tier), (re)save it; otherwise just skip
+            if not os.path.exists(os.path.join(BASE_UPLOAD_DIR, existing.filepath)) \
+                    and cold_copy(existing.filepath) is None:
                 try:
                     file.save(os.path.join(BASE_UPLOAD_DIR, existing.filepath))
                 except Exception:
@@ -116,23 +138,22 @@ def upload_photos(album_id):
             album_id=album.id,
             user_id=user_id,
             size=size_bytes,
+            checksum=file_checksum(filepath),
+            **probe_image(filepath),
         )
         db.session.add(photo)
-        saved_photos.append(photo)
+        saved_photos.append((photo, feature_vector(filepath)))
 
+    db.session.flush()
+    payload = [_serialize_photo(p) for p, _ in saved_photos]
+    vectors = [(p.id, album_id, vec) for p, vec in saved_photos]
+    photos_added(album_id, [(p.id, p.uploaded_at) for p, _ in saved_photos])
     db.session.commit()
+    if saved_photos:
+        invalidate_album_manifests([album_id])
+        similarity_index.add(user_id, vectors)
 
-    return jsonify({
-        "photos": [
-            {
-                "id": p.id,
-                "filename": p.filename,
-                "filepath": p.filepath,
-                "uploaded_at": p.uploaded_at.isoformat(),
-                "size": getattr(p, "size", 0),
-            } for p in saved_photos
-        ]
-    }), 201
+    return jsonify({"photos": payload}), 201
 
 @photos_bp.route("/photos/<int:photo_id>", methods=["DELETE"])
 @jwt_required(locations=["headers"])
@@ -149,6 +170,506 @@ def delete_photo(photo_id):
         except OSError:
             pass
 
+    discard_cold(photo.filepath)
+
+    album_id, uploaded_at = photo.album_id, photo.uploaded_at
+    PhotoEdit.query.filter_by(photo_id=photo.id).delete(synchronize_session=False)
     db.session.delete(photo)
+    photos_removed(album_id, [(photo_id, uploaded_at)])
     db.session.commit()
+    invalidate_album_manifests([album_id])
+    similarity_index.remove(user_id, [photo_id])
     return jsonify({"msg": "Photo deleted"}), 200
+
+# ---------- Copy / move between albums ----------
+
+RELOCATE_MAX_PHOTOS = 10000
+
+def _relocate(photo_ids, album_id, move: bool):
+    """
+    Copy or move the caller's photos into another of their albums without
+    duplicating bytes: each file gets a hard link under the destination
+    album's path (so the /uploads rules, which go by the <user>/<album>
+    segments, follow the photo), and a move drops the old name after commit.
+    A copy is a new Photo row sharing the file, metadata and current edit.
+    """
+    user_id = _uid()
+    try:
+        ids = sorted({int(i) for i in photo_ids})
+        album_id = int(album_id)
+    except (TypeError, ValueError):
+        return jsonify({"msg": "photo_ids and album_id must be integers"}), 400
+    if not ids:
+        return jsonify({"msg": "No photos given"}), 400
+    if len(ids) > RELOCATE_MAX_PHOTOS:
+        return jsonify({"msg": f"At most {RELOCATE_MAX_PHOTOS} photos per request"}), 400
+
+    dest = Album.query.filter_by(id=album_id, user_id=user_id).first()
+    if not dest:
+        return jsonify({"msg": "Album not found"}), 404
+    photos = Photo.query.filter(Photo.id.in_(ids), Photo.user_id == user_id).order_by(Photo.id).all()
+    if len(photos) != len(ids):
+        return jsonify({"msg": "Photo not found"}), 404
+    if move:
+        photos = [p for p in photos if p.album_id != dest.id]
+
+    taken = {name for (name,) in db.session.query(Photo.filename).filter_by(album_id=dest.id)}
+    planned, skipped = [], []  # (photo, old_rel, new_rel)
+    try:
+        for p in photos:
+            src = thaw(BASE_UPLOAD_DIR, p.filepath)  # links need the file on the upload filesystem
+            if src is None:
+                skipped.append(p.id)
+                continue
+            new_rel = unique_photo_relpath(BASE_UPLOAD_DIR, dest.user_id, dest.id, p.filename, taken)
+            link_upload(src, os.path.join(BASE_UPLOAD_DIR, new_rel))
+            planned.append((p, p.filepath, new_rel))
+
+        if move:
+            by_album = {}
+            for p, _, new_rel in planned:
+                by_album.setdefault(p.album_id, []).append((p.id, p.uploaded_at))
+                p.album_id = dest.id
+                p.filepath = new_rel
+                p.filename = os.path.basename(new_rel)
+            db.session.flush()
+            for src_album_id, rows in by_album.items():
+                photos_removed(src_album_id, rows)
+            result = [p for p, _, _ in planned]
+        else:
+            result = [
+                Photo(
+                    filename=os.path.basename(new_rel),
+                    filepath=new_rel,
+                    album_id=dest.id,
+                    user_id=user_id,
+                    size=p.size,
+                    uploaded_at=p.uploaded_at,
+                    width=p.width,
+                    height=p.height,
+                    placeholder=p.placeholder,
+                    phash=p.phash,
+                    checksum=p.checksum,
+                )
+                for p, _, new_rel in planned
+            ]
+            db.session.add_all(result)
+            db.session.flush()
+            edits = {
+                e.photo_id: e
+                for e in PhotoEdit.query.filter(PhotoEdit.photo_id.in_([p.id for p, _, _ in planned])).all()
+            } if planned else {}
+            db.session.add_all([
+                PhotoEdit(photo_id=c.id, user_id=user_id, recipe=edits[p.id].recipe,
+                          recipe_hash=edits[p.id].recipe_hash)
+                for (p, _, _), c in zip(planned, result) if p.id in edits
+            ])
+        photos_added(dest.id, [(p.id, p.uploaded_at) for p in result])
+        payload = [_serialize_photo(p) for p in result]
+        # ids captured now: committed objects would be re-selected on access
+        src_album_ids = set(by_album) if move else set()
+        pairs = [(p.id, c.id) for (p, _, _), c in zip(planned, result)]
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        _remove_files(os.path.join(BASE_UPLOAD_DIR, new_rel) for _, _, new_rel in planned)
+        raise
+
+    if planned:
+        if move:
+            _remove_files(os.path.join(BASE_UPLOAD_DIR, old_rel) for _, old_rel, _ in planned)
+            invalidate_album_manifests(src_album_ids | {album_id})
+            similarity_index.move(user_id, [photo_id for photo_id, _ in pairs], album_id)
+        else:
+            invalidate_album_manifests([album_id])
+            similarity_index.copy(user_id, pairs, album_id)
+    return jsonify({"photos": payload, "skipped": skipped}), (200 if move else 201)
+
+# POST /api/photos/<photo_id>/copy   { "album_id": 7 }
+@photos_bp.route("/photos/<int:photo_id>/copy", methods=["POST"])
+@jwt_required(locations=["headers"])
+def copy_photo(photo_id):
+    return _relocate([photo_id], (request.get_json(silent=True) or {}).get("album_id"), move=False)
+
+# POST /api/photos/<photo_id>/move   { "album_id": 7 }
+@photos_bp.route("/photos/<int:photo_id>/move", methods=["POST"])
+@jwt_required(locations=["headers"])
+def move_photo(photo_id):
+    return _relocate([photo_id], (request.get_json(silent=True) or {}).get("album_id"), move=True)
+
+# POST /api/photos/copy   { "photo_ids": [1, 2, 3], "album_id": 7 }
+@photos_bp.route("/photos/copy", methods=["POST"])
+@jwt_required(locations=["headers"])
+def copy_photos():
+    data = request.get_json(silent=True) or {}
+    return _relocate(data.get("photo_ids") or [], data.get("album_id"), move=False)
+
+# POST /api/photos/move   { "photo_ids": [1, 2, 3], "album_id": 7 }
+@photos_bp.route("/photos/move", methods=["POST"])
+@jwt_required(locations=["headers"])
+def move_photos():
+    data = request.get_json(silent=True) or {}
+    return _relocate(data.get("photo_ids") or [], data.get("album_id"), move=True)
+
+# ---------- Upload pre-check ----------
+
+PRECHECK_MAX_FILES = 1000
+
+def _precheck_entries(files):
+    """[(client name, safe name, size, sha256)] or None if malformed."""
+    entries = []
+    for f in files:
+        if not isinstance(f, dict):
+            return None
+        name, digest = f.get("name"), str(f.get("sha256") or "").lower()
+        try:
+            size = int(f.get("size"))
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(name, str) or len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            return None
+        base = os.path.basename(name.replace("\\", "/"))
+        entries.append((name, None if _is_garbage_name(base) else secure_filename(base), size, digest))
+    return entries
+
+# POST /api/albums/<album_id>/photos/precheck
+#   { "files": [{ "name": "IMG_1.jpg", "size": 123456, "sha256": "<hex>" }, ...] }
+@photos_bp.route("/albums/<int:album_id>/photos/precheck", methods=["POST"])
+@jwt_required(locations=["headers"])
+def precheck_uploads(album_id):
+    """
+    Pre-flight for upload_photos: tells the client which files it still has to
+    send. One result per file, in request order, with a status of
+      present - the album already holds these bytes
+      linked  - the user has the same bytes in another album; a photo was
+                created here from a hard link to that file
+      upload  - not known; send it
+      skipped - an upload would skip it anyway (junk name, name already in
+                the album, or a repeat of an earlier entry)
+    Content matches on sha256 + size and only among the caller's own photos.
+    """
+    user_id = _uid()
+    album = Album.query.filter_by(id=album_id, user_id=user_id).first()
+    if not album:
+        return jsonify({"msg": "Album not found"}), 404
+
+    files = (request.get_json(silent=True) or {}).get("files")
+    if not isinstance(files, list) or not files:
+        return jsonify({"msg": "No files given"}), 400
+    if len(files) > PRECHECK_MAX_FILES:
+        return jsonify({"msg": f"At most {PRECHECK_MAX_FILES} files per request"}), 400
+    entries = _precheck_entries(files)
+    if entries is None:
+        return jsonify({"msg": "Each file needs a name, a size and a hex sha256"}), 400
+
+    digests = {digest for _, _, _, digest in entries}
+    names = {safe for _, safe, _, _ in entries if safe}
+    # one lookup over ix_photo_user_checksum, one over the album's names
+    known = Photo.query.filter(Photo.user_id == user_id, Photo.checksum.in_(digests)).order_by(Photo.id).all()
+    taken = {
+        name for (name,) in db.session.query(Photo.filename)
+        .filter(Photo.album_id == album.id, Photo.filename.in_(names))
+    } if names else set()
+
+    here, elsewhere = {}, {}
+    for p in known:
+        key = (p.checksum, p.size)
+        if p.album_id == album.id:
+            here.setdefault(key, p.id)
+        elif key not in elsewhere and (os.path.isfile(os.path.join(BASE_UPLOAD_DIR, p.filepath))
+                                       or cold_copy(p.filepath)):
+            elsewhere[key] = p
+
+    results, planned, seen = [], [], set()  # planned: (result, source photo, new_rel)
+    try:
+        for name, safe, size, digest in entries:
+            key = (digest, size)
+            if key in here:
+                results.append({"name": name, "status": "present", "photo_id": here[key]})
+            elif safe is None or key in seen or safe in taken:
+                results.append({"name": name, "status": "skipped"})
+            elif key in elsewhere and thaw(BASE_UPLOAD_DIR, elsewhere[key].filepath):
+                src = elsewhere[key]
+                new_rel = unique_photo_relpath(BASE_UPLOAD_DIR, user_id, album.id, safe, taken)
+                link_upload(os.path.join(BASE_UPLOAD_DIR, src.filepath), os.path.join(BASE_UPLOAD_DIR, new_rel))
+                result = {"name": name, "status": "linked"}
+                results.append(result)
+                planned.append((result, src, new_rel))
+            else:
+                taken.add(safe)  # a later entry of the same name would be skipped by the upload
+                results.append({"name": name, "status": "upload"})
+            seen.add(key)
+
+        linked = [
+            Photo(
+                filename=os.path.basename(new_rel),
+                filepath=new_rel,
+                album_id=album.id,
+                user_id=user_id,
+                size=src.size,
+                width=src.width,
+                height=src.height,
+                placeholder=src.placeholder,
+                phash=src.phash,
+                checksum=src.checksum,
+            )
+            for _, src, new_rel in planned
+        ]
+        db.session.add_all(linked)
+        db.session.flush()
+        photos_added(album.id, [(p.id, p.uploaded_at) for p in linked])
+        payload = [_serialize_photo(p) for p in linked]
+        pairs = []
+        for (result, src, _), p in zip(planned, linked):
+            result["photo_id"] = p.id
+            pairs.append((src.id, p.id))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        _remove_files(os.path.join(BASE_UPLOAD_DIR, new_rel) for _, _, new_rel in planned)
+        raise
+
+    if planned:
+        invalidate_album_manifests([album_id])
+        similarity_index.copy(user_id, pairs, album_id)
+    return jsonify({"results": results, "photos": payload}), 200
+
+# ---------- More like this ----------
+
+SIMILAR_MAX_K = 100
+
+# GET /api/photos/<photo_id>/similar?k=20
+@photos_bp.route("/photos/<int:photo_id>/similar", methods=["GET"])
+@jwt_required(locations=["headers"])
+def similar_photos(photo_id):
+    """
+    Visually similar photos from the same owner's library (utils.similarity).
+    The owner searches all of their albums; an event participant only the
+    owner's albums attached to events they joined.
+    """
+    if not similarity_available():
+        return jsonify({"msg": "Similarity search is not available on this server"}), 501
+
+    user_id = _uid()
+    photo = db.session.query(Photo.user_id, Photo.album_id).filter(Photo.id == photo_id).first()
+    if not photo:
+        return jsonify({"msg": "Photo not found"}), 404
+
+    visible = None  # owner: everything
+    if str(photo.user_id) != str(user_id):
+        rows = (
+            db.session.query(EventAlbum.c.album_id)
+            .join(EventParticipant, EventParticipant.event_id == EventAlbum.c.event_id)
+            .join(Album, Album.id == EventAlbum.c.album_id)
+            .filter(EventParticipant.user_id == user_id, Album.user_id == photo.user_id)
+            .distinct()
+            .all()
+        )
+        visible = {r[0] for r in rows}
+        if photo.album_id not in visible:
+            return jsonify({"msg": "Photo not found"}), 404
+
+    k = max(1, min(request.args.get("k", 20, type=int), SIMILAR_MAX_K))
+    ranked = similarity_index.similar(photo.user_id, photo_id, k, album_ids=visible)
+    if ranked is None:
+        return jsonify({"msg": "Photo is not indexed yet"}), 409
+
+    scores = dict(ranked)
+    found = {
+        p.id: p
+        for p in db.session.query(
+            Photo.id, Photo.filename, Photo.filepath, Photo.uploaded_at, Photo.width, Photo.height,
+            Photo.placeholder, Photo.size, Photo.album_id,
+        ).filter(Photo.id.in_(scores))
+    } if scores else {}
+    return jsonify({
+        "photo_id": photo_id,
+        "photos": [
+            {
+                "id": p.id,
+                "filename": p.filename,
+                "filepath": p.filepath,
+                "uploaded_at": p.uploaded_at.isoformat(),
+                "width": p.width,
+                "height": p.height,
+                "placeholder": p.placeholder,
+                "size": p.size or 0,
+                "album_id": p.album_id,
+                "score": round(scores[p.id], 4),
+            }
+            for p in (found.get(pid) for pid, _ in ranked)
+            if p is not None  # deleted since it was indexed
+        ],
+    }), 200
+
+# ---------- Guest uploads via share link ----------
+
+# Multipart framing (boundaries, part headers) on top of the file bytes
+_MULTIPART_SLACK = 64 * 1024
+_COPY_CHUNK = 256 * 1024
+
+class _QuotaExceeded(Exception):
+    pass
+
+def _share_target_album(share):
+    """Album a guest upload lands in: the shared album, or ?album_id= attached to the shared event."""
+    if share.album_id:
+        return Album.query.get(share.album_id)
+    if share.event_id:
+        album_id = request.args.get("album_id", type=int)
+        if not album_id:
+            return None
+        linked = db.session.query(EventAlbum.c.album_id).filter(
+            EventAlbum.c.event_id == share.event_id, EventAlbum.c.album_id == album_id
+        ).first()
+        return Album.query.get(album_id) if linked else None
+    return None
+
+def _unique_path(album, safe_name: str) -> str:
+    """Guests don't see each other's files, so never overwrite or skip: suffix on collision."""
+    path = os.path.join(BASE_UPLOAD_DIR, unique_photo_relpath(BASE_UPLOAD_DIR, album.user_id, album.id, safe_name))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def _save_counted(stream, path: str, limit) -> tuple[int, str]:
+    """
+    Copy `stream` to `path` in chunks, hashing as it goes; returns (size, checksum).
+    Raises _QuotaExceeded once more than `limit` bytes arrive.
+    """
+    written = 0
+    digest = new_hasher()
+    tmp_path = path + ".part"
+    try:
+        with open(tmp_path, "wb") as out:
+            while True:
+                chunk = stream.read(_COPY_CHUNK)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if limit is not None and written > limit:
+                    raise _QuotaExceeded()
+                digest.update(chunk)
+                out.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written, digest.hexdigest()
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+@photos_bp.route("/s/<token>/upload", methods=["POST"])
+@share_rate_limited
+@allow_jwt_or_share()
+@require_share_permission("can_upload")
+def upload_via_share(token):
+    """
+    POST /api/s/<token>/upload[?album_id=<id>]   (multipart: photos[] or photo)
+    Guest upload through an album or event share with can_upload.
+
+    The guest is identified by the X-Guest-Key header (or ?guest_key=); a new key is
+    issued and returned when none is sent. Share.max_upload_bytes / max_files_per_guest
+    are per-guest quotas tracked on Guest.upload_bytes / upload_count.
+    """
+    s = g.share
+    if s is None:
+        return jsonify({"msg": "Invalid or expired link"}), 404
+    if not (s.album_id or s.event_id):
+        return jsonify({"msg": "This link is not valid for this resource."}), 403
+
+    album = _share_target_album(s)
+    if not album:
+        msg = "album_id of an event album is required" if s.event_id else "Album not found"
+        return jsonify({"msg": msg}), 400 if s.event_id else 404
+
+    guest_key = request_guest_key()
+    guest = guest_for_share(s, guest_key)
+    if guest is None:
+        return jsonify({"msg": "Guest key belongs to another link"}), 403
+    touch_guest(guest_key)
+
+    # Quotas are decided before the body is read
+    files_left = None if s.max_files_per_guest is None else s.max_files_per_guest - guest.upload_count
+    bytes_left = None if s.max_upload_bytes is None else s.max_upload_bytes - guest.upload_bytes
+    if files_left is not None and files_left <= 0:
+        return jsonify({"msg": "Upload limit reached for this link"}), 403
+    if bytes_left is not None:
+        if bytes_left <= 0:
+            return jsonify({"msg": "Upload size limit reached for this link"}), 413
+        # Werkzeug stops reading (413) as soon as the body passes this, before it is buffered
+        request.max_content_length = bytes_left + _MULTIPART_SLACK
+
+    try:
+        files = request.files.getlist("photos") or [request.files.get("photo")]
+    except RequestEntityTooLarge:
+        return jsonify({"msg": "Upload size limit reached for this link"}), 413
+    files = [f for f in files if f and f.filename and not _is_garbage_name(os.path.basename(f.filename))]
+    if not files:
+        return jsonify({"msg": "No file(s) provided"}), 400
+    if files_left is not None and len(files) > files_left:
+        return jsonify({"msg": f"Only {files_left} more file(s) allowed for this link"}), 403
+
+    saved = []  # (abs_path, safe_name, size, checksum)
+    total = 0
+    try:
+        for file in files:
+            safe_name = secure_filename(os.path.basename(file.filename)) or "upload"
+            path = _unique_path(album, safe_name)
+            size, checksum = _save_counted(file.stream, path, None if bytes_left is None else bytes_left - total)
+            total += size
+            saved.append((path, os.path.basename(path), size, checksum))
+    except _QuotaExceeded:
+        _remove_files(p for p, _, _, _ in saved)
+        return jsonify({"msg": "Upload size limit reached for this link"}), 413
+
+    # Claim the quota atomically; a concurrent upload by the same guest may have used it
+    n = len(saved)
+    claim = update(Guest).where(Guest.id == guest.id)
+    if s.max_files_per_guest is not None:
+        claim = claim.where(Guest.upload_count + n <= s.max_files_per_guest)
+    if s.max_upload_bytes is not None:
+        claim = claim.where(Guest.upload_bytes + total <= s.max_upload_bytes)
+    claim = claim.values(upload_count=Guest.upload_count + n, upload_bytes=Guest.upload_bytes + total)
+    if db.session.execute(claim).rowcount != 1:
+        db.session.rollback()
+        _remove_files(p for p, _, _, _ in saved)
+        return jsonify({"msg": "Upload limit reached for this link"}), 403
+
+    photos = [
+        Photo(
+            filename=name,
+            filepath=os.path.relpath(path, BASE_UPLOAD_DIR),
+            album_id=album.id,
+            user_id=album.user_id,
+            size=size,
+            checksum=checksum,
+            uploaded_via_share_id=s.id,
+            uploaded_by_guest_id=guest.id,
+            **probe_image(path),
+        )
+        for path, name, size, checksum in saved
+    ]
+    db.session.add_all(photos)
+    db.session.flush()
+    payload = [{**_serialize_photo(p), "album_id": p.album_id} for p in photos]
+    target_album_id, owner_id = album.id, album.user_id
+    vectors = [(p.id, target_album_id, feature_vector(path)) for p, (path, _, _, _) in zip(photos, saved)]
+    photos_added(target_album_id, [(p.id, p.uploaded_at) for p in photos])
+    db.session.commit()
+    invalidate_album_manifests([target_album_id])
+    similarity_index.add(owner_id, vectors)
+
+    return jsonify({
+        "photos": payload,
+        "guest_key": guest_key,
+        "quota": {
+            "files_remaining": None if files_left is None else files_left - n,
+            "bytes_remaining": None if bytes_left is None else bytes_left - total,
+        },
+    }), 201
@@ -1,14 +1,22 @@
 # backend/routes/shares.py
-from flask import Blueprint, jsonify, request, make_response
+from flask import Blueprint, jsonify, request, make_response, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import select
 from extensions import db
+import gzip
 import secrets
+import time
+from datetime import datetime, timedelta
 
 from models.album import Album
 from models.photo import Photo
 from models.share import Share
 from models.event import Event
+from utils.activity import touch_guest, touch_share
+from utils.guests import request_guest_key
+from utils.rate_limit import share_rate_limited, penalize_share_miss
+from utils.share_tokens import resolve_share_token, remember_share_tokens
+from utils.event_manifest import cached_share_manifest, store_share_manifest, forget_share_manifests
 
 # If you created a separate association *table* for event<->album:
 #   models/event_albums.py should expose `event_albums = db.Table(...)`
@@ -44,21 +52,74 @@ def _nocache(resp):
     resp.headers["Expires"] = "0"
     return resp
 
+def _send_manifest(path: str):
+    """Serve a gzip manifest as-is, or inflated for clients that don't accept gzip."""
+    if "gzip" in request.accept_encodings:
+        resp = send_file(path, mimetype="application/json", conditional=False, etag=False)
+        resp.headers["Content-Encoding"] = "gzip"
+    else:
+        with gzip.open(path, "rb") as fh:
+            resp = make_response(fh.read())
+        resp.mimetype = "application/json"
+    resp.headers["Vary"] = "Accept-Encoding"
+    return _nocache(resp), 200
+
 def is_valid_event_share(token: str, event_id: int) -> bool:
     """
     Small helper used by other routes (e.g., events.py) to accept collaboration via share link.
     """
     if not token:
         return False
-    s = Share.query.filter_by(token=token, event_id=event_id).first()
-    return s is not None
+    s = resolve_share_token(token)
+    return s is not None and s.event_id == event_id
+
+def _upload_options(body: dict) -> dict:
+    """Guest-upload settings accepted when creating album/event shares (limits are per guest)."""
+    def _limit(key):
+        try:
+            value = int(body[key])
+        except (KeyError, TypeError, ValueError):
+            return None
+        return value if value >= 0 else None
+
+    return {
+        "can_upload": bool(body.get("can_upload", False)),
+        "max_upload_bytes": _limit("max_upload_bytes"),
+        "max_files_per_guest": _limit("max_files_per_guest"),
+    }
+
+def _expires_at(body: dict):
+    """Optional link expiry: expires_in_hours (number) or expires_at (ISO-8601, UTC)."""
+    if body.get("expires_in_hours") not in (None, ""):
+        try:
+            hours = float(body["expires_in_hours"])
+        except (TypeError, ValueError):
+            return None
+        return datetime.utcnow() + timedelta(hours=hours) if hours > 0 else None
+    if body.get("expires_at"):
+        try:
+            value = datetime.fromisoformat(str(body["expires_at"]).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return value.replace(tzinfo=None) - (value.utcoffset() or timedelta(0))
+    return None
+
+def _upload_fields(s: Share, token: str) -> dict:
+    if not s.can_upload:
+        return {"can_upload": False}
+    return {
+        "can_upload": True,
+        "upload_url": f"/api/s/{token}/upload",
+        "max_upload_bytes": s.max_upload_bytes,
+        "max_files_per_guest": s.max_files_per_guest,
+    }
 
 # Allow treating can_comment as "can_collaborate" for now
 def can_contribute_event(token: str, event_id: int) -> bool:
     if not token:
         return False
-    s = Share.query.filter_by(token=token, event_id=event_id, can_comment=True).first()
-    return s is not None
+    s = resolve_share_token(token)
+    return s is not None and s.event_id == event_id and bool(s.can_comment)
 
 # --------------------------------------------------------------------------
 # CREATE SHARES (owner-only)
@@ -77,16 +138,20 @@ def create_album_share(album_id):
     can_comment = bool(body.get("can_comment", False))
 
     token = _new_token()
-    s = Share(album_id=album_id, token=token, can_comment=can_comment)
+    s = Share(album_id=album_id, token=token, can_comment=can_comment,
+              expires_at=_expires_at(body), **_upload_options(body))
     db.session.add(s)
     db.session.commit()
+    remember_share_tokens([token])
 
     resp = jsonify({
         "share": {
             "id": s.id,
             "token": token,
             "url": f"/api/s/{token}/album",
-            "can_comment": s.can_comment
+            "can_comment": s.can_comment,
+            "expires_at": s.expires_at.isoformat() if s.expires_at else None,
+            **_upload_fields(s, token),
         }
     })
     return _nocache(resp), 201
@@ -104,16 +169,18 @@ def create_photo_share(photo_id):
     can_comment = bool(body.get("can_comment", False))
 
     token = _new_token()
-    s = Share(photo_id=photo_id, token=token, can_comment=can_comment)
+    s = Share(photo_id=photo_id, token=token, can_comment=can_comment, expires_at=_expires_at(body))
     db.session.add(s)
     db.session.commit()
+    remember_share_tokens([token])
 
     resp = jsonify({
         "share": {
             "id": s.id,
             "token": token,
             "url": f"/api/s/{token}/photo",
-            "can_comment": s.can_comment
+            "can_comment": s.can_comment,
+            "expires_at": s.expires_at.isoformat() if s.expires_at else None
         }
     })
     return _nocache(resp), 201
@@ -134,16 +201,20 @@ def create_event_share(event_id):
     can_comment = bool(body.get("can_comment", False))
 
     token = _new_token()
-    s = Share(event_id=event_id, token=token, can_comment=can_comment)
+    s = Share(event_id=event_id, token=token, can_comment=can_comment,
+              expires_at=_expires_at(body), **_upload_options(body))
     db.session.add(s)
     db.session.commit()
+    remember_share_tokens([token])
 
     resp = jsonify({
         "share": {
             "id": s.id,
             "token": token,
             "url": f"/api/s/{token}/event",
-            "can_comment": s.can_comment
+            "can_comment": s.can_comment,
+            "expires_at": s.expires_at.isoformat() if s.expires_at else None,
+            **_upload_fields(s, token),
         }
     })
     return _nocache(resp), 201
@@ -170,20 +241,31 @@ def revoke_share(share_id):
     if not ok:
         return jsonify({"msg": "Not authorized"}), 403
 
+    token = s.token
     db.session.delete(s)
     db.session.commit()
+    forget_share_manifests([token])
     return jsonify({"msg": "Share revoked"}), 200
 
 # --------------------------------------------------------------------------
 # PUBLIC: OPEN LINKS
 # --------------------------------------------------------------------------
 
+def _record_visit(token: str):
+    """Count a share view (and the guest, if the client sent its key); buffered, no query."""
+    touch_share(token)
+    touch_guest(request_guest_key(new_if_missing=False))
+
 # GET /api/s/:token/album
 @shares_bp.route("/s/<token>/album", methods=["GET"])
+@share_rate_limited
 def open_album_share(token):
-    s = Share.query.filter_by(token=token).first()
+    s = resolve_share_token(token)
+    if not s:
+        penalize_share_miss()
     if not s or not s.album_id:
         return jsonify({"msg": "Invalid or expired link"}), 404
+    _record_visit(token)
 
     album = Album.query.get_or_404(s.album_id)
     photos = Photo.query.filter_by(album_id=album.id).all()
@@ -195,20 +277,28 @@ def open_album_share(token):
                 "filename": p.filename,
                 "filepath": p.filepath,
                 "uploaded_at": p.uploaded_at.isoformat(),
+                "width": p.width,
+                "height": p.height,
+                "placeholder": p.placeholder,
                 "album_id": album.id,
             }
             for p in photos
         ],
         "can_comment": s.can_comment,
+        "can_upload": bool(s.can_upload),
     })
     return _nocache(resp), 200
 
 # GET /api/s/:token/photo
 @shares_bp.route("/s/<token>/photo", methods=["GET"])
+@share_rate_limited
 def open_photo_share(token):
-    s = Share.query.filter_by(token=token).first()
+    s = resolve_share_token(token)
+    if not s:
+        penalize_share_miss()
     if not s or not s.photo_id:
         return jsonify({"msg": "Invalid or expired link"}), 404
+    _record_visit(token)
 
     p = Photo.query.get_or_404(s.photo_id)
     resp = jsonify({
@@ -217,6 +307,9 @@ def open_photo_share(token):
             "filename": p.filename,
             "filepath": p.filepath,
             "uploaded_at": p.uploaded_at.isoformat(),
+            "width": p.width,
+            "height": p.height,
+            "placeholder": p.placeholder,
             "album_id": p.album_id,
         },
         "can_comment": s.can_comment,
@@ -225,6 +318,7 @@ def open_photo_share(token):
 
 # GET /api/s/:token/event
 @shares_bp.route("/s/<token>/event", methods=["GET"])
+@share_rate_limited
 def open_event_share(token):
     """
     Public: open an event share.
@@ -232,10 +326,22 @@ def open_event_share(token):
       - event info (id, name, description, date)
       - albums attached to the event
       - all photos across those albums (each photo includes album_id)
+
+    Served from the materialized manifest when present (no queries); a miss
+    builds the payload from the database and materializes it.
     """
-    s = Share.query.filter_by(token=token).first()
+    manifest = cached_share_manifest(token)
+    if manifest:
+        _record_visit(token)
+        return _send_manifest(manifest)
+
+    started_at = time.time()
+    s = resolve_share_token(token)
+    if not s:
+        penalize_share_miss()
     if not s or not s.event_id:
         return jsonify({"msg": "Invalid or expired link"}), 404
+    _record_visit(token)
 
     ev = Event.query.get_or_404(s.event_id)
 
@@ -264,7 +370,7 @@ def open_event_share(token):
             .all()
         )
 
-    resp = jsonify({
+    payload = {
         "event": {
             "id": ev.id,
             "name": getattr(ev, "title", None) or getattr(ev, "name", ""),
@@ -278,13 +384,18 @@ def open_event_share(token):
                 "filename": p.filename,
                 "filepath": p.filepath,
                 "uploaded_at": p.uploaded_at.isoformat(),
+                "width": p.width,
+                "height": p.height,
+                "placeholder": p.placeholder,
                 "album_id": p.album_id,
             }
             for p in photos
         ],
         "can_comment": s.can_comment,
-    })
-    return _nocache(resp), 200
+        "can_upload": bool(s.can_upload),
+    }
+    store_share_manifest(s, payload, album_ids, started_at)
+    return _nocache(jsonify(payload)), 200
 
 # --------------------------------------------------------------------------
 # Utility: resolve a token (helps frontend decide which page to open)
@@ -292,13 +403,15 @@ def open_event_share(token):
 
 # GET /api/share/resolve/:token
 @shares_bp.route("/share/resolve/<token>", methods=["GET"])
+@share_rate_limited
 def resolve_share(token):
     """
     Returns: { type: "album"|"photo"|"event", id: number }
     or 404 if token invalid.
     """
-    s = Share.query.filter_by(token=token).first()
+    s = resolve_share_token(token)
     if not s:
+        penalize_share_miss()
         return jsonify({"msg": "Invalid or expired link"}), 404
 
     if s.album_id:
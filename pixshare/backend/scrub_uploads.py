@@ -0,0 +1,60 @@
+# backend/scrub_uploads.py
+"""
+Reconcile uploads/photos with the Photo table now (utils/scrubber.py), e.g.
+from cron or after restoring a backup:
+
+    python scrub_uploads.py                          # report only, SCRUB_* settings
+    python scrub_uploads.py --no-checksums           # sizes only: a quick pass
+    python scrub_uploads.py --reclaim --grace-hours 48
+    python scrub_uploads.py --max-mbps 0 --workers 8 # unthrottled
+
+Writes the full report to SCRUB_REPORT_PATH (or --report) and prints a summary.
+"""
+import argparse
+
+from app import app
+from utils.scrubber import REPORT_LIMIT, scrub, write_report
+
+
+def main():
+    cfg = app.config
+    parser = argparse.ArgumentParser(description="Check uploaded files against the photo table.")
+    parser.add_argument("--no-checksums", action="store_true", help="compare sizes only")
+    parser.add_argument("--reclaim", action="store_true", default=cfg["SCRUB_RECLAIM_ORPHANS"],
+                        help="delete orphaned files older than the grace period")
+    parser.add_argument("--grace-hours", type=float, default=cfg["SCRUB_ORPHAN_GRACE_HOURS"])
+    parser.add_argument("--max-mbps", type=float, default=cfg["SCRUB_MAX_MBPS"], help="checksum read budget (0 = no limit)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--report", default=cfg["SCRUB_REPORT_PATH"])
+    args = parser.parse_args()
+
+    with app.app_context():
+        r = scrub(
+            cfg["UPLOAD_ROOT"],
+            verify_checksums=cfg["SCRUB_VERIFY_CHECKSUMS"] and not args.no_checksums,
+            reclaim=args.reclaim,
+            orphan_grace_seconds=args.grace_hours * 3600,
+            max_bytes_per_sec=args.max_mbps * 1024 * 1024,
+            workers=args.workers,
+            batch_size=args.batch_size,
+        )
+    write_report(args.report, r)
+
+    for entry in r["missing"][:20]:
+        print(f"  missing   #{entry['id']} {entry['path']}")
+    for entry in r["orphans"][:20]:
+        print(f"  orphan    {entry['path']}{' (reclaimed)' if entry.get('reclaimed') else ''}")
+    for entry in r["size_mismatch"][:20]:
+        print(f"  size      #{entry['id']} {entry['path']}: db {entry['db']} != disk {entry['disk']}")
+    for entry in r["checksum_mismatch"][:20]:
+        print(f"  checksum  #{entry['id']} {entry['path']}")
+    print(f"Scanned {r['files']} file(s) and {r['rows']} row(s) in {r['finished_at'] - r['started_at']:.1f}s: "
+          f"{r['missing_count']} missing, {r['orphan_count']} orphan(s) ({r['orphans_reclaimed']} reclaimed, "
+          f"{r['orphan_bytes_reclaimed'] / (1024 ** 2):.1f} MB), {len(r['size_mismatch'])} size and "
+          f"{len(r['checksum_mismatch'])} checksum mismatch(es), {r['checksums_filled']} checksum(s) filled.")
+    print(f"Report: {args.report} (lists capped at {REPORT_LIMIT})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# backend/sweep_shares.py
+"""
+Delete expired share links (and their guests) now, e.g. from cron:
+
+    python sweep_shares.py                    # everything past SHARE_SWEEP_GRACE_HOURS
+    python sweep_shares.py --grace-hours 0 --batch-size 2000
+"""
+import argparse
+from datetime import timedelta
+
+from app import app
+from utils.share_sweeper import sweep_expired_shares
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete expired share links in batches.")
+    parser.add_argument("--batch-size", type=int, default=app.config["SHARE_SWEEP_BATCH_SIZE"])
+    parser.add_argument("--grace-hours", type=float, default=app.config["SHARE_SWEEP_GRACE_HOURS"])
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    with app.app_context():
+        n = sweep_expired_shares(
+            batch_size=args.batch_size,
+            grace=timedelta(hours=args.grace_hours),
+            max_batches=args.max_batches,
+        )
+    print(f"Removed {n} expired share(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# backend/tests/test_query_budget.py
+"""
+check_query_budget.py as tests: every route within its statement budget, and
+the same number of statements at both data sizes.
+
+check_query_budget points the app at a throw-away database and upload root
+when it is imported, so it has to be imported before anything imports app.
+"""
+import pytest
+
+import check_query_budget as budget
+
+
+@pytest.fixture(scope="module")
+def failures():
+    _rows, found = budget.evaluate(budget._measure(budget.SMALL), budget._measure(budget.LARGE))
+    by_endpoint = {}
+    for endpoint, label, msg in found:
+        by_endpoint.setdefault(endpoint, []).append(f"{label or '-'}: {msg}")
+    return by_endpoint
+
+
+def test_every_route_declares_a_budget(failures):
+    undeclared = [e for e, msgs in failures.items() if any("no query budget declared" in m for m in msgs)]
+    assert not undeclared
+
+
+@pytest.mark.parametrize("endpoint", sorted(budget.BUDGETS))
+def test_route_within_budget(endpoint, failures):
+    assert not failures.get(endpoint), "\n".join(failures[endpoint])
@@ -0,0 +1,127 @@
+# backend/tier_uploads.py
+"""
+Move originals nobody has opened for a while to the cold tier
+(utils/cold_storage.py), e.g. nightly from cron:
+
+    python tier_uploads.py                          # idle for COLD_AFTER_DAYS
+    python tier_uploads.py --days 365 --compress --pause 0.2
+    python tier_uploads.py --dry-run
+    python tier_uploads.py --report                 # bytes moved off UPLOAD_ROOT, per user
+
+A photo is idle when its original hasn't been served through /uploads since
+the cutoff (Photo.last_accessed_at, or its upload time if it never was).
+Derivatives (sprites, rendered edits, placeholders) stay where they are; the
+next /uploads request for a cold original moves it back. Rows are walked in
+id order in batches, so the job can be stopped and re-run at any time:
+originals that are already cold, missing, or shared with a copy (hard link)
+are skipped.
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import app
+from extensions import db
+from models.photo import Photo
+from models.user import User
+from routes.photos import BASE_UPLOAD_DIR
+from utils.cold_storage import cold_usage, freeze
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):,.1f} MB"
+
+
+def _print_report():
+    usage = cold_usage()
+    if not usage:
+        print("Nothing in the cold tier.")
+        return
+    names = dict(db.session.execute(
+        select(User.id, User.email).where(User.id.in_(list(usage)))
+    ).all())
+    print(f"{'user':<32} {'files':>8} {'freed':>14} {'stored':>14} {'saved':>14}")
+    total = {"files": 0, "bytes_freed": 0, "bytes_stored": 0}
+    for user_id, row in sorted(usage.items(), key=lambda kv: -kv[1]["bytes_freed"]):
+        label = f"{user_id} {names.get(user_id, '?')}"[:32]
+        print(f"{label:<32} {row['files']:>8} {_mb(row['bytes_freed']):>14} {_mb(row['bytes_stored']):>14} "
+              f"{_mb(row['bytes_freed'] - row['bytes_stored']):>14}")
+        for k in total:
+            total[k] += row[k]
+    print(f"{'total':<32} {total['files']:>8} {_mb(total['bytes_freed']):>14} {_mb(total['bytes_stored']):>14} "
+          f"{_mb(total['bytes_freed'] - total['bytes_stored']):>14}")
+    print("freed = originals no longer on UPLOAD_ROOT; stored = their size in the cold tier; "
+          "saved = what compression took off on top.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move idle originals to the cold storage tier.")
+    parser.add_argument("--days", type=float, default=app.config["COLD_AFTER_DAYS"],
+                        help="move originals not served for this many days")
+    parser.add_argument("--compress", action="store_true", default=app.config["COLD_COMPRESS"],
+                        help="gzip cold copies (worth it for RAW/TIFF, not for JPEG)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches (throttle)")
+    parser.add_argument("--dry-run", action="store_true", help="count what would move; touch nothing")
+    parser.add_argument("--report", action="store_true", help="only print the per-user cold tier report")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.report:
+            _print_report()
+            return
+
+        cutoff = datetime.utcnow() - timedelta(days=args.days)
+        idle = func.coalesce(Photo.last_accessed_at, Photo.uploaded_at) < cutoff
+        moved = freed = skipped = 0
+        last_id = 0
+        started = time.perf_counter()
+        while True:
+            rows = db.session.execute(
+                select(Photo.id, Photo.filepath)
+                .where(Photo.id > last_id, idle)
+                .order_by(Photo.id)
+                .limit(args.batch_size)
+            ).all()
+            db.session.commit()  # end the read transaction while files are copied
+            if not rows:
+                break
+            for _, rel in rows:
+                if args.dry_run:
+                    full = os.path.join(BASE_UPLOAD_DIR, rel)
+                    try:
+                        st = os.stat(full)
+                    except OSError:
+                        skipped += 1
+                        continue
+                    if st.st_nlink > 1:
+                        skipped += 1
+                        continue
+                    moved, freed = moved + 1, freed + st.st_size
+                    continue
+                try:
+                    n = freeze(BASE_UPLOAD_DIR, rel, compress=args.compress)
+                except OSError as e:
+                    print(f"  ! {rel}: {e}")
+                    n = None
+                if n is None:
+                    skipped += 1
+                else:
+                    moved, freed = moved + 1, freed + n
+            last_id = rows[-1].id
+            print(f"  up to id {last_id}: {moved} {'to move' if args.dry_run else 'moved'} ({_mb(freed)}), "
+                  f"{skipped} skipped ({moved / max(time.perf_counter() - started, 1e-6):.0f}/s)")
+            if args.pause:
+                time.sleep(args.pause)
+
+        print(f"Done: {moved} original(s) {'to move' if args.dry_run else 'moved'} to the cold tier, "
+              f"{_mb(freed)} {'to free' if args.dry_run else 'freed'}; {skipped} already cold, missing or shared.")
+        if not args.dry_run:
+            _print_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# backend/utils/activity.py
+"""
+Write-behind buffer for activity bookkeeping: "last seen" timestamps and view
+counts of guests, share links and event participants, and the last time each
+original was served (Photo.last_accessed_at, used by the cold tier).
+
+Writing these per request would be an UPDATE + commit on every page view
+(and on SQLite every writer queues behind the one lock). Instead, routes call
+touch_guest / touch_share / touch_participant, which only record the touch in
+memory; repeated touches of the same row coalesce into one entry (latest
+timestamp, summed views). A background thread flushes every
+ACTIVITY_FLUSH_SECONDS with one executemany UPDATE per table, and a final
+flush runs at interpreter exit. ACTIVITY_FLUSH_SECONDS=0 turns tracking off.
+
+Activity is advisory: a crash loses at most one interval of touches, and a
+failed flush is merged back and retried on the next tick. The buffer never
+holds more than ACTIVITY_MAX_PENDING rows: reaching it wakes the flusher, and
+until a flush makes room, touches of rows not already buffered are dropped
+(counted in `dropped`). Clients choose their own X-Guest-Key, so nothing else
+would bound it while the database is down.
+"""
+from __future__ import annotations
+
+import atexit
+import threading
+from datetime import datetime
+
+from flask import Flask
+from sqlalchemy import and_, bindparam, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db
+from models.event_participant import EventParticipant
+from models.guest import Guest
+from models.photo import Photo
+from models.share import Share
+
+# kind -> (model, key columns, timestamp column, view counter column or None)
+_TARGETS = {
+    "guest": (Guest, ("guest_key",), "last_seen_at", "view_count"),
+    "share": (Share, ("token",), "last_used_at", "view_count"),
+    "participant": (EventParticipant, ("event_id", "user_id"), "last_seen_at", "view_count"),
+    "upload": (Photo, ("filepath",), "last_accessed_at", None),
+}
+
+
+class ActivityBuffer:
+    def __init__(self, max_pending: int = 10000):
+        self.max_pending = max_pending
+        self.enabled = False  # set by init_activity_buffer
+        self._lock = threading.Lock()
+        self._pending: dict[tuple, list] = {}  # (kind, *key) -> [last_seen, views]
+        self.dropped = 0  # touches not recorded because the buffer was full
+        self._wake = threading.Event()
+
+    def touch(self, kind: str, *key, views: int = 1, at: datetime | None = None):
+        if not self.enabled:
+            return
+        at = at or datetime.utcnow()
+        with self._lock:
+            entry = self._pending.get((kind, *key))
+            if entry is not None:
+                entry[0] = max(entry[0], at)
+                entry[1] += views
+            elif len(self._pending) < self.max_pending:
+                self._pending[(kind, *key)] = [at, views]
+            else:
+                self.dropped += 1
+            if len(self._pending) >= self.max_pending:
+                self._wake.set()  # flush early
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write all buffered touches (needs an app context); returns the number of rows touched."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        by_kind: dict[str, list] = {}
+        for (kind, *key), (at, views) in batch.items():
+            model, key_cols, _, _ = _TARGETS[kind]
+            row = {f"k_{col}": value for col, value in zip(key_cols, key)}
+            row.update(ts=at, n=views)
+            by_kind.setdefault(kind, []).append(row)
+
+        try:
+            with db.engine.begin() as conn:
+                for kind, rows in by_kind.items():
+                    model, key_cols, ts_col, count_col = _TARGETS[kind]
+                    values = {ts_col: bindparam("ts")}
+                    if count_col:
+                        values[count_col] = model.__table__.c[count_col] + bindparam("n")
+                    stmt = (
+                        update(model.__table__)
+                        .where(and_(*(model.__table__.c[col] == bindparam(f"k_{col}") for col in key_cols)))
+                        .values(values)
+                    )
+                    conn.execute(stmt, rows)
+        except SQLAlchemyError:
+            self._merge_back(batch)
+            raise
+        return len(batch)
+
+    def _merge_back(self, batch: dict):
+        with self._lock:
+            for key, (at, views) in batch.items():
+                entry = self._pending.get(key)
+                if entry is not None:
+                    entry[0] = max(entry[0], at)
+                    entry[1] += views
+                elif len(self._pending) < self.max_pending:
+                    self._pending[key] = [at, views]
+                else:
+                    self.dropped += 1
+
+    def wait(self, timeout: float):
+        self._wake.wait(timeout)
+        self._wake.clear()
+
+
+activity_buffer = ActivityBuffer()
+
+
+def touch_guest(guest_key: str):
+    if guest_key:
+        activity_buffer.touch("guest", guest_key)
+
+
+def touch_share(token: str):
+    if token:
+        activity_buffer.touch("share", token)
+
+
+def touch_participant(event_id: int, user_id):
+    activity_buffer.touch("participant", event_id, int(user_id))
+
+
+def touch_upload(rel_path: str):
+    """An original under /uploads was served (rel_path as stored in Photo.filepath)."""
+    if rel_path:
+        activity_buffer.touch("upload", rel_path)
+
+
+def init_activity_buffer(app: Flask):
+    """Start the flush thread and the exit flush (tracking stays off when ACTIVITY_FLUSH_SECONDS is 0)."""
+    interval = float(app.config.get("ACTIVITY_FLUSH_SECONDS", 0))
+    if interval <= 0 or activity_buffer.enabled:
+        return None
+    activity_buffer.max_pending = int(app.config.get("ACTIVITY_MAX_PENDING", 10000))
+    activity_buffer.enabled = True
+
+    def _flush():
+        with app.app_context():
+            try:
+                activity_buffer.flush()
+            except SQLAlchemyError:
+                app.logger.exception("Activity flush failed")
+
+    atexit.register(_flush)
+
+    def _loop():
+        while True:
+            activity_buffer.wait(interval)
+            _flush()
+
+    thread = threading.Thread(target=_loop, name="activity-flush", daemon=True)
+    thread.start()
+    return thread
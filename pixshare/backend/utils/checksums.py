@@ -0,0 +1,64 @@
+# backend/utils/checksums.py
+"""
+Content checksums of original files (Photo.checksum): SHA-256, hex.
+
+Uploads hash the bytes they just wrote, import_photos.py hashes while it
+copies, and backfill_photo_meta.py fills rows from before the column existed.
+Identical bytes give identical checksums regardless of file name or album.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import IO, Optional
+
+CHUNK = 1024 * 1024
+
+
+def new_hasher():
+    return hashlib.sha256()
+
+
+def stream_checksum(fh: IO[bytes]) -> Optional[str]:
+    """Hex SHA-256 of what is left in a binary file object, or None if reading fails."""
+    h = new_hasher()
+    try:
+        while True:
+            chunk = fh.read(CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    except (OSError, EOFError):  # EOFError: truncated gzip (cold tier)
+        return None
+    return h.hexdigest()
+
+
+def file_checksum(path: str) -> Optional[str]:
+    """Hex SHA-256 of the file at `path`, or None if it can't be read."""
+    try:
+        with open(path, "rb") as fh:
+            return stream_checksum(fh)
+    except OSError:
+        return None
+
+
+def copy_with_checksum(src: str, dst: str) -> tuple[int, str]:
+    """Copy `src` to `dst` (via a .part file) in one pass; returns (size, hex SHA-256)."""
+    h = new_hasher()
+    size = 0
+    tmp_path = dst + ".part"
+    try:
+        with open(src, "rb") as inp, open(tmp_path, "wb") as out:
+            while True:
+                chunk = inp.read(CHUNK)
+                if not chunk:
+                    break
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size, h.hexdigest()
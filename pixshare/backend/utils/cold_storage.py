@@ -0,0 +1,223 @@
+# backend/utils/cold_storage.py
+"""
+Cold tier for originals.
+
+Most of UPLOAD_ROOT is originals of old albums that are only looked at
+through derivatives (sprites, rendered edits, placeholders), which live in
+their own caches and stay where they are. tier_uploads.py moves originals
+that haven't been served for COLD_AFTER_DAYS to COLD_STORAGE_ROOT under the
+same relative path (gzipped to <path>.gz with COLD_COMPRESS), and
+upload_layout.locate_upload thaws one back the first time /uploads asks for
+it again.
+
+The file system is the only record of which tier holds a file: an original
+is hot while it exists under UPLOAD_ROOT and cold when only its cold copy
+does. Both directions write a temporary name, os.replace it into place and
+only then remove the source, so a crash at any point leaves a complete copy
+that locate_upload finds. Derivative builders read cold originals in place
+(open_original) without thawing them.
+
+Files with more than one name (copies between albums share an inode) are
+left hot: moving one name would free nothing.
+
+The tier job and web requests run in different processes and the job picks
+files by a last_accessed_at that lags behind by up to one activity flush, so
+freeze and thaw of the same path can meet. Both hold an flock on a lock file
+under COLD_ROOT/.locks for the whole move, and each re-checks the file it is
+about to remove is still the one it copied.
+"""
+from __future__ import annotations
+
+import contextlib
+import gzip
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from typing import IO, Optional
+
+from werkzeug.security import safe_join
+
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process locks apply
+    fcntl = None
+
+COLD_ROOT = Config.COLD_STORAGE_ROOT
+_GZ = ".gz"
+_STRIPES = 4096  # lock files are striped by path hash so they don't pile up per photo
+_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+@contextlib.contextmanager
+def _path_lock(rel_path: str):
+    """Exclusive across threads and processes for one upload path (and the few sharing its stripe)."""
+    stripe = int(hashlib.sha1(rel_path.encode("utf-8")).hexdigest()[:3], 16) % _STRIPES
+    with _LOCKS[stripe % len(_LOCKS)]:
+        if fcntl is None:
+            yield
+            return
+        folder = os.path.join(COLD_ROOT, ".locks")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{stripe:03x}.lock"), "a+b") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _same_file(a: os.stat_result, b: os.stat_result) -> bool:
+    return (a.st_dev, a.st_ino, a.st_size, a.st_mtime_ns) == (b.st_dev, b.st_ino, b.st_size, b.st_mtime_ns)
+
+
+def cold_copy(rel_path: str) -> Optional[str]:
+    """Absolute path of the cold copy of an upload, or None."""
+    for candidate in (rel_path + _GZ, rel_path):
+        full = safe_join(COLD_ROOT, candidate)
+        if full and os.path.isfile(full):
+            return full
+    return None
+
+
+def _copy_into(dst: str, src: str, read=open, write=open):
+    """Write src to dst through a temporary sibling; mtime and mode follow the file."""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst), prefix=".tmp-")
+    os.close(fd)
+    try:
+        with read(src, "rb") as fin, write(tmp, "wb") as fout:
+            shutil.copyfileobj(fin, fout, 1024 * 1024)
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def freeze(upload_root: str, rel_path: str, compress: bool = False) -> Optional[int]:
+    """Move a hot original to the cold tier; returns the bytes freed, or None if left alone."""
+    hot = safe_join(upload_root, rel_path)
+    if not hot:
+        return None
+    with _path_lock(rel_path):
+        try:
+            st = os.stat(hot)
+        except OSError:
+            return None
+        if st.st_nlink > 1:
+            return None
+        dst = os.path.join(COLD_ROOT, rel_path + (_GZ if compress else ""))
+        _copy_into(dst, hot, write=gzip.open if compress else open)
+        # Only drop the hot file if it is still exactly what was copied (same inode,
+        # size and mtime). Its atime is no use here: the copy itself just read it.
+        try:
+            unchanged = _same_file(st, os.stat(hot))
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            try:
+                os.remove(dst)
+            except OSError:
+                pass
+            return None
+        stale = os.path.join(COLD_ROOT, rel_path if compress else rel_path + _GZ)
+        for path in (stale, hot):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return st.st_size
+
+
+def thaw(upload_root: str, rel_path: str) -> Optional[str]:
+    """Hot path of an upload, bringing it back from the cold tier first if needed; None if neither has it."""
+    hot = safe_join(upload_root, rel_path)
+    if not hot:
+        return None
+    if os.path.isfile(hot):
+        return hot
+    with _path_lock(rel_path):
+        if os.path.isfile(hot):
+            return hot
+        src = cold_copy(rel_path)
+        if src is None:
+            return None
+        try:
+            st = os.stat(src)
+            _copy_into(hot, src, read=gzip.open if src.endswith(_GZ) else open)
+            if _same_file(st, os.stat(src)):  # never remove a cold copy written after ours was read
+                os.remove(src)
+        except OSError:
+            pass
+    return hot if os.path.isfile(hot) else None
+
+
+def open_original(upload_root: str, rel_path: str) -> Optional[IO[bytes]]:
+    """Readable binary file of an original from whichever tier has it, without thawing; None if neither."""
+    for path in (safe_join(upload_root, rel_path), cold_copy(rel_path)):
+        if not path:
+            continue
+        try:
+            return gzip.open(path, "rb") if path.startswith(COLD_ROOT) and path.endswith(_GZ) else open(path, "rb")
+        except OSError:
+            continue
+    return None
+
+
+def discard_cold(rel_path: str):
+    """Remove the cold copy of a deleted photo, if there is one."""
+    for candidate in (rel_path + _GZ, rel_path):
+        full = safe_join(COLD_ROOT, candidate)
+        if full:
+            try:
+                os.remove(full)
+            except OSError:
+                pass
+
+
+def _original_size(path: str, st: os.stat_result) -> int:
+    if not path.endswith(_GZ):
+        return st.st_size
+    try:
+        with open(path, "rb") as fh:
+            fh.seek(-4, os.SEEK_END)
+            return struct.unpack("<I", fh.read(4))[0]  # gzip trailer: size mod 2**32
+    except (OSError, struct.error):
+        return st.st_size
+
+
+def cold_usage() -> dict[int, dict]:
+    """Per user id: {"files", "bytes_freed" (original sizes), "bytes_stored" (cold tier)}."""
+    usage: dict[int, dict] = {}
+    photos = os.path.join(COLD_ROOT, "photos")
+    try:
+        users = os.listdir(photos)
+    except OSError:
+        return usage
+    for user in users:
+        try:
+            user_id = int(user)
+        except ValueError:
+            continue
+        row = usage.setdefault(user_id, {"files": 0, "bytes_freed": 0, "bytes_stored": 0})
+        for dirpath, _, filenames in os.walk(os.path.join(photos, user)):
+            for name in filenames:
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                row["files"] += 1
+                row["bytes_freed"] += _original_size(path, st)
+                row["bytes_stored"] += st.st_size
+    return usage
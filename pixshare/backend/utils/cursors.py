@@ -0,0 +1,27 @@
+# backend/utils/cursors.py
+"""
+Opaque keyset-pagination cursors: (created_at, id) of the last row of a page,
+base64url-encoded so clients pass them back verbatim (?after=, ?cursor=).
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    # Rows written before created_at was NOT NULL may lack it; they page as the oldest
+    raw = f"{(created_at or datetime.min).isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """(created_at, id); raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(str(e))
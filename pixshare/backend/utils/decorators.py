@@ -12,6 +12,7 @@ from models.share import Share
 from models.album import Album
 from models.photo import Photo
 from models.event import Event
+from utils.share_tokens import resolve_share_token
 
 
 ShareKind = Literal["album", "photo", "event"]
@@ -19,13 +20,18 @@ ShareKind = Literal["album", "photo", "event"]
 
 def _find_share_from_request() -> Optional[Share]:
     """
-    Pull a share token from either query param (?t=TOKEN) or header (X-Share-Token).
+    Pull a share token from either query param (?t=TOKEN), header (X-Share-Token)
+    or a <token> URL segment (/s/<token>/...).
     Return the Share row if found, else None.
     """
-    token = request.args.get("t") or request.headers.get("X-Share-Token")
+    token = (
+        request.args.get("t")
+        or request.headers.get("X-Share-Token")
+        or (request.view_args or {}).get("token")
+    )
     if not token:
         return None
-    return Share.query.filter_by(token=token).first()
+    return resolve_share_token(token)
 
 
 def _detect_share_kind(s: Share) -> Optional[ShareKind]:
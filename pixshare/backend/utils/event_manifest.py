@@ -0,0 +1,154 @@
+# backend/utils/event_manifest.py
+"""
+Materialized, gzip-compressed payloads for /api/s/<token>/event.
+
+Layout under MANIFEST_DIR (default instance/manifests):
+
+    tokens/<sha256(token)>.json             {"event_id": .., "expires_at": <epoch>|null}
+    events/<event_id>/<sha256(token)>.json.gz   the full open_event_share payload
+    events/<event_id>.stale                 touched on invalidation (see store_share_manifest)
+    albums/<album_id>/<event_id>            "album is part of event" markers
+
+A hit is two small file reads and no database work. Manifests are dropped per
+event when its photos/albums change (invalidate_event_manifests /
+invalidate_album_manifests) and rebuilt by the next request that misses.
+The album markers let photo/album changes find the affected events without a
+query. Tokens are only stored hashed.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from config import Config
+from utils.metrics import cache_hit, cache_miss
+
+MANIFEST_ROOT = Config.MANIFEST_DIR
+_TOKENS_DIR = os.path.join(MANIFEST_ROOT, "tokens")
+_EVENTS_DIR = os.path.join(MANIFEST_ROOT, "events")
+_ALBUMS_DIR = os.path.join(MANIFEST_ROOT, "albums")
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _expires_epoch(value: Optional[datetime]) -> Optional[float]:
+    return None if value is None else value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _stale_marker(event_id: int) -> str:
+    return os.path.join(_EVENTS_DIR, f"{event_id}.stale")
+
+
+def cached_share_manifest(token: str) -> Optional[str]:
+    """Path of the gzip manifest for a valid, unexpired event-share token; None on miss."""
+    key = _token_key(token)
+    try:
+        with open(os.path.join(_TOKENS_DIR, f"{key}.json"), "rb") as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        cache_miss("event_manifest")
+        return None
+
+    expires_at = meta.get("expires_at")
+    if expires_at is not None and expires_at <= time.time():
+        cache_miss("event_manifest")
+        return None
+
+    path = os.path.join(_EVENTS_DIR, str(meta.get("event_id")), f"{key}.json.gz")
+    if not os.path.isfile(path):
+        cache_miss("event_manifest")
+        return None
+    cache_hit("event_manifest")
+    return path
+
+
+def store_share_manifest(share, payload: dict, album_ids: Iterable[int], started_at: float):
+    """
+    Materialize `payload` for `share` (an event share). `started_at` is time.time()
+    taken before the payload was read from the database: if the event was
+    invalidated since, the manifest may already be stale and is discarded.
+    """
+    key = _token_key(share.token)
+    event_id = share.event_id
+    path = os.path.join(_EVENTS_DIR, str(event_id), f"{key}.json.gz")
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    for album_id in album_ids:
+        marker = os.path.join(_ALBUMS_DIR, str(album_id), str(event_id))
+        if not os.path.exists(marker):
+            _atomic_write(marker, b"")
+
+    _atomic_write(
+        os.path.join(_TOKENS_DIR, f"{key}.json"),
+        json.dumps({"event_id": event_id, "expires_at": _expires_epoch(share.expires_at)}).encode("utf-8"),
+    )
+    _atomic_write(path, gzip.compress(body, compresslevel=6, mtime=0))
+
+    try:
+        stale = os.path.getmtime(_stale_marker(event_id)) >= started_at
+    except OSError:
+        stale = False
+    if stale:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def invalidate_event_manifests(event_ids: Iterable[int]):
+    for event_id in set(event_ids):
+        os.makedirs(_EVENTS_DIR, exist_ok=True)
+        with open(_stale_marker(event_id), "a"):
+            os.utime(_stale_marker(event_id), None)
+        shutil.rmtree(os.path.join(_EVENTS_DIR, str(event_id)), ignore_errors=True)
+
+
+def invalidate_album_manifests(album_ids: Iterable[int]):
+    """Drop manifests of every event the albums have been materialized into."""
+    for album_id in set(album_ids):
+        folder = os.path.join(_ALBUMS_DIR, str(album_id))
+        try:
+            event_ids = [int(name) for name in os.listdir(folder) if name.isdigit()]
+        except OSError:
+            continue
+        invalidate_event_manifests(event_ids)
+
+
+def forget_share_manifests(tokens: Iterable[str]):
+    """Remove the token entry and manifest of revoked/expired shares."""
+    for token in tokens:
+        if not token:
+            continue
+        key = _token_key(token)
+        meta_path = os.path.join(_TOKENS_DIR, f"{key}.json")
+        try:
+            with open(meta_path, "rb") as fh:
+                event_id = json.load(fh).get("event_id")
+            os.remove(meta_path)
+            os.remove(os.path.join(_EVENTS_DIR, str(event_id), f"{key}.json.gz"))
+        except (OSError, ValueError):
+            pass
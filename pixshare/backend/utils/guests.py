@@ -0,0 +1,45 @@
+# backend/utils/guests.py
+"""
+Guest identities behind share links (models.guest).
+
+A guest is an opaque key the browser keeps (X-Guest-Key header or
+?guest_key=) scoped to one share; the first upload or comment through the
+link creates the row. Routes return the key so the client can persist it.
+"""
+from __future__ import annotations
+
+import secrets
+from typing import Optional
+
+from flask import request
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models.guest import Guest
+
+
+def request_guest_key(new_if_missing: bool = True) -> Optional[str]:
+    """The caller's guest key (header or query), a fresh one, or None."""
+    key = (request.headers.get("X-Guest-Key") or request.args.get("guest_key") or "").strip()[:64]
+    if not key and new_if_missing:
+        key = secrets.token_urlsafe(16)
+    return key or None
+
+
+def guest_for_share(share, guest_key: str, display_name: Optional[str] = None):
+    """Guest row for this link, created on first use (flushed, not committed); None if the key belongs to another link."""
+    guest = Guest.query.filter_by(guest_key=guest_key).first()
+    if guest is None:
+        guest = Guest(share_id=share.id, guest_key=guest_key, display_name=display_name,
+                      upload_count=0, upload_bytes=0)
+        db.session.add(guest)
+        try:
+            db.session.flush()  # committed together with the caller's rows
+        except IntegrityError:
+            db.session.rollback()
+            guest = Guest.query.filter_by(guest_key=guest_key).first()
+    if guest is None or guest.share_id != share.id:
+        return None
+    if display_name and guest.display_name != display_name:
+        guest.display_name = display_name
+    return guest
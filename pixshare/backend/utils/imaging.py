@@ -0,0 +1,194 @@
+# backend/utils/imaging.py
+"""
+Image metadata computed at ingest: display width/height, a tiny inline
+preview (LQIP) that galleries can paint before the real image arrives, and a
+perceptual hash for near-duplicate detection (utils/phash.py).
+
+The placeholder is a data: URI of a ~16px JPEG (a few hundred bytes), so the
+frontend can use it directly as an <img> src or CSS background — no decoder
+library needed.
+
+Pillow is optional: without it (or for files it can't read) the fields stay
+None and listings fall back to the old behaviour.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import json
+import math
+from typing import Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = ImageOps = None
+
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 50
+
+
+def probe_image(path) -> dict:
+    """{"width", "height", "placeholder", "phash"} for the image at `path`, a path or binary file
+    object (values None if unreadable)."""
+    meta = {"width": None, "height": None, "placeholder": None, "phash": None}
+    if Image is None:
+        return meta
+    try:
+        with Image.open(path) as img:
+            # Orientation-corrected size is what the browser lays out
+            orientation = img.getexif().get(0x0112, 1)
+            width, height = img.size
+            if orientation in (5, 6, 7, 8):
+                width, height = height, width
+            meta["width"], meta["height"] = width, height
+
+            # JPEG: decode at 1/8 scale instead of full resolution
+            img.draft("RGB", (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+            img = ImageOps.exif_transpose(img)
+            meta["phash"] = dhash(img)
+            meta["placeholder"] = _placeholder(img)
+    except Exception:
+        pass
+    return meta
+
+
+def dhash(img) -> str:
+    """64-bit difference hash (row-wise gradient signs of a 9x8 grayscale), as 16 hex digits."""
+    small = img.convert("L").resize((9, 8), Image.BILINEAR)
+    px = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (px[row * 9 + col] < px[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+
+def _placeholder(img) -> Optional[str]:
+    if img.mode not in ("RGB", "L"):
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        rgba = img.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        img = background
+    img.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.BILINEAR)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=PLACEHOLDER_QUALITY, optimize=True)
+    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+# ---------- Edit recipes (non-destructive editor) ----------
+
+RECIPE_VERSION = 1
+MAX_RENDER_SIZE = 4096
+
+
+def normalize_recipe(raw) -> dict:
+    """
+    Validate an edit recipe and return its canonical form (defaults dropped).
+    Raises ValueError with a user-facing message.
+
+      rotate:   degrees clockwise (multiples of 90 are lossless)
+      crop:     {"x", "y", "w", "h"} as fractions 0..1 of the rotated image
+      exposure: stops, -3..3
+      resize:   {"max": px} longest side, 16..MAX_RENDER_SIZE
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("recipe must be an object")
+    unknown = set(raw) - {"rotate", "crop", "exposure", "resize"}
+    if unknown:
+        raise ValueError(f"unknown recipe field(s): {', '.join(sorted(unknown))}")
+    out = {}
+
+    try:
+        rotate = float(raw.get("rotate") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("rotate must be a number")
+    if not math.isfinite(rotate):  # NaN/inf would survive % 360 and break rendering
+        raise ValueError("rotate must be a finite number")
+    rotate %= 360
+    if rotate:
+        out["rotate"] = round(rotate, 2)
+
+    crop = raw.get("crop")
+    if crop:
+        try:
+            x, y, w, h = (float(crop[k]) for k in ("x", "y", "w", "h"))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("crop needs numeric x, y, w, h")
+        if not (0 <= x < 1 and 0 <= y < 1 and 0 < w <= 1 - x + 1e-9 and 0 < h <= 1 - y + 1e-9):
+            raise ValueError("crop must lie within the image (fractions 0..1)")
+        if (x, y, w, h) != (0, 0, 1, 1):
+            out["crop"] = {k: round(v, 5) for k, v in zip(("x", "y", "w", "h"), (x, y, w, h))}
+
+    try:
+        exposure = float(raw.get("exposure") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("exposure must be a number")
+    if not -3 <= exposure <= 3:
+        raise ValueError("exposure must be between -3 and 3")
+    if exposure:
+        out["exposure"] = round(exposure, 3)
+
+    resize = raw.get("resize")
+    if resize:
+        try:
+            max_side = int(resize["max"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("resize needs an integer max")
+        if not 16 <= max_side <= MAX_RENDER_SIZE:
+            raise ValueError(f"resize.max must be between 16 and {MAX_RENDER_SIZE}")
+        out["resize"] = {"max": max_side}
+
+    return out
+
+
+def recipe_hash(recipe: dict) -> str:
+    canonical = json.dumps({"v": RECIPE_VERSION, **recipe}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def render_recipe(path, recipe: dict, max_size: Optional[int] = None) -> bytes:
+    """Apply `recipe` to the original at `path` (or an open binary file) and return JPEG bytes (original untouched)."""
+    with Image.open(path) as src:
+        limit = min(max_size or MAX_RENDER_SIZE, (recipe.get("resize") or {}).get("max", MAX_RENDER_SIZE))
+        if not recipe.get("crop"):
+            # Nothing needs full resolution: let JPEG decode at a reduced scale
+            src.draft("RGB", (limit, limit))
+        img = ImageOps.exif_transpose(src)
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+    rotate = recipe.get("rotate", 0)
+    if rotate in (90, 180, 270):
+        img = img.transpose({90: Image.ROTATE_270, 180: Image.ROTATE_180, 270: Image.ROTATE_90}[rotate])
+    elif rotate:
+        fill = (255, 255, 255, 0) if img.mode == "RGBA" else (255, 255, 255)
+        img = img.rotate(-rotate, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+
+    crop = recipe.get("crop")
+    if crop:
+        w, h = img.size
+        box = (
+            round(crop["x"] * w), round(crop["y"] * h),
+            round((crop["x"] + crop["w"]) * w), round((crop["y"] + crop["h"]) * h),
+        )
+        img = img.crop(box)
+
+    exposure = recipe.get("exposure")
+    if exposure:
+        factor = 2.0 ** exposure
+        lut = [min(255, int(i * factor + 0.5)) for i in range(256)]
+        bands = img.split()
+        img = Image.merge(img.mode, [b.point(lut) for b in bands[:3]] + list(bands[3:]))
+
+    if max(img.size) > limit:
+        img.thumbnail((limit, limit), Image.LANCZOS)
+
+    if img.mode != "RGB":
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=88, optimize=True, progressive=True)
+    return buf.getvalue()
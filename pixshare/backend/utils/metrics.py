@@ -0,0 +1,311 @@
+# backend/utils/metrics.py
+"""
+In-process request instrumentation.
+
+Hooks Flask request start/end and SQLAlchemy cursor events to record, per endpoint:
+  - request latency (histogram)
+  - SQL query count and time
+  - response bytes served
+  - cache hits / misses (callers report these via cache_hit() / cache_miss())
+  - timed I/O sections (e.g. the file open/stat in serve_uploads)
+
+Everything is exposed on GET /metrics in Prometheus text format, which is
+only registered when METRICS_TOKEN is set and then requires it as a bearer
+token (the figures name every endpoint and its traffic).
+Requests slower than SLOW_REQUEST_MS are logged together with their SQL.
+"""
+from __future__ import annotations
+
+import hmac
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from flask import Flask, Response, abort, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger("pixshare.metrics")
+
+# Seconds; roughly the Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Keep at most this many statements per request for the slow-request log
+_MAX_SQL_PER_REQUEST = 50
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "n")
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value: float):
+        self.total += value
+        self.n += 1
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """Thread-safe counters/histograms keyed by label tuples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency: dict[tuple, _Histogram] = {}     # (endpoint, method)
+            self.requests: dict[tuple, int] = {}           # (endpoint, method, status)
+            self.queries: dict[str, int] = {}              # endpoint
+            self.query_seconds: dict[str, float] = {}      # endpoint
+            self.bytes_served: dict[str, int] = {}         # endpoint
+            self.slow_requests: dict[str, int] = {}        # endpoint
+            self.io: dict[str, _Histogram] = {}            # section name
+            self.cache_hits: dict[str, int] = {}           # cache name
+            self.cache_misses: dict[str, int] = {}         # cache name
+
+    def observe_request(self, endpoint, method, status, seconds, n_queries, query_seconds, nbytes, slow):
+        with self._lock:
+            self.latency.setdefault((endpoint, method), _Histogram()).observe(seconds)
+            key = (endpoint, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.queries[endpoint] = self.queries.get(endpoint, 0) + n_queries
+            self.query_seconds[endpoint] = self.query_seconds.get(endpoint, 0.0) + query_seconds
+            self.bytes_served[endpoint] = self.bytes_served.get(endpoint, 0) + nbytes
+            if slow:
+                self.slow_requests[endpoint] = self.slow_requests.get(endpoint, 0) + 1
+
+    def observe_io(self, section: str, seconds: float):
+        with self._lock:
+            self.io.setdefault(section, _Histogram()).observe(seconds)
+
+    def count_cache(self, cache: str, hit: bool):
+        with self._lock:
+            target = self.cache_hits if hit else self.cache_misses
+            target[cache] = target.get(cache, 0) + 1
+
+    # ---------- Prometheus text exposition ----------
+
+    def render(self) -> str:
+        out: list[str] = []
+        with self._lock:
+            _render_histogram(out, "pixshare_http_request_duration_seconds",
+                              "Request latency by endpoint.", ("endpoint", "method"), self.latency)
+            _render_counter(out, "pixshare_http_requests_total",
+                            "Requests by endpoint and status.", ("endpoint", "method", "status"), self.requests)
+            _render_counter(out, "pixshare_db_queries_total",
+                            "SQL statements executed while handling requests.", ("endpoint",), self.queries)
+            _render_counter(out, "pixshare_db_query_seconds_total",
+                            "Time spent in SQL while handling requests.", ("endpoint",), self.query_seconds)
+            _render_counter(out, "pixshare_response_bytes_total",
+                            "Response body bytes served.", ("endpoint",), self.bytes_served)
+            _render_counter(out, "pixshare_slow_requests_total",
+                            "Requests slower than SLOW_REQUEST_MS.", ("endpoint",), self.slow_requests)
+            _render_histogram(out, "pixshare_io_duration_seconds",
+                              "Timed I/O sections (e.g. uploads file open/stat).", ("section",), self.io)
+            _render_counter(out, "pixshare_cache_hits_total",
+                            "Cache hits by cache name.", ("cache",), self.cache_hits)
+            _render_counter(out, "pixshare_cache_misses_total",
+                            "Cache misses by cache name.", ("cache",), self.cache_misses)
+        return "\n".join(out) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    if not isinstance(values, tuple):
+        values = (values,)
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _render_counter(out, name, help_text, label_names, data):
+    out.append(f"# HELP {name} {help_text}")
+    out.append(f"# TYPE {name} counter")
+    for key, value in sorted(data.items()):
+        out.append(f"{name}{_labels(label_names, key)} {value}")
+
+
+def _render_histogram(out, name, help_text, label_names, data):
+    out.append(f"# HELP {name} {help_text}")
+    out.append(f"# TYPE {name} histogram")
+    for key, h in sorted(data.items()):
+        for bound, count in zip(LATENCY_BUCKETS, h.counts):
+            le = 'le="%s"' % bound
+            out.append(f"{name}_bucket{_labels(label_names, key, le)} {count}")
+        le = 'le="+Inf"'
+        out.append(f"{name}_bucket{_labels(label_names, key, le)} {h.n}")
+        out.append(f"{name}_sum{_labels(label_names, key)} {h.total}")
+        out.append(f"{name}_count{_labels(label_names, key)} {h.n}")
+
+
+registry = MetricsRegistry()
+
+
+# ---------- Helpers for route code ----------
+
+def cache_hit(cache: str):
+    registry.count_cache(cache, True)
+
+
+def cache_miss(cache: str):
+    registry.count_cache(cache, False)
+
+
+@contextmanager
+def timed(section: str):
+    """Time a block of I/O and record it under pixshare_io_duration_seconds{section=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe_io(section, time.perf_counter() - start)
+
+
+def _request_stats() -> Optional[dict]:
+    if not has_request_context():
+        return None
+    return g.get("_metrics")
+
+
+# ---------- SQLAlchemy hooks ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_pixshare_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_pixshare_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    for counter in getattr(_active_counters, "stack", ()):
+        counter.statements.append(statement)
+    stats = _request_stats()
+    if stats is None:
+        return
+    stats["queries"] += 1
+    stats["query_seconds"] += elapsed
+    if len(stats["sql"]) < _MAX_SQL_PER_REQUEST:
+        stats["sql"].append((statement, elapsed))
+
+
+_listeners_installed = False
+
+
+def _install_sql_listeners():
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _listeners_installed = True
+
+
+# ---------- Ad-hoc query counting (benchmarks / query budgets) ----------
+
+_active_counters = threading.local()
+
+
+class QueryCounter:
+    """Collects every SQL statement executed on this thread while active."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries():
+    """
+    Usage:
+        with count_queries() as qc:
+            client.get("/api/albums")
+        assert qc.count <= 2
+    """
+    _install_sql_listeners()
+    counter = QueryCounter()
+    stack = getattr(_active_counters, "stack", None)
+    if stack is None:
+        stack = _active_counters.stack = []
+    stack.append(counter)
+    try:
+        yield counter
+    finally:
+        stack.remove(counter)
+
+
+# ---------- Flask wiring ----------
+
+def init_metrics(app: Flask):
+    """Install request/SQL hooks and, when METRICS_TOKEN is set, register GET /metrics."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    _install_sql_listeners()
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics = {
+            "start": time.perf_counter(),
+            "queries": 0,
+            "query_seconds": 0.0,
+            "sql": [],
+        }
+
+    @app.after_request
+    def _metrics_finish(response):
+        stats = g.pop("_metrics", None)
+        if stats is None:
+            return response
+
+        elapsed = time.perf_counter() - stats["start"]
+        endpoint = request.endpoint or "unmatched"
+        if endpoint == "metrics":
+            return response
+
+        if response.status_code == 304:
+            cache_hit("http_conditional")
+        nbytes = response.content_length or 0
+        slow = elapsed * 1000.0 >= float(app.config.get("SLOW_REQUEST_MS", 500))
+
+        registry.observe_request(
+            endpoint, request.method, response.status_code, elapsed,
+            stats["queries"], stats["query_seconds"], nbytes, slow,
+        )
+
+        if slow:
+            sql_lines = "\n".join(
+                f"  [{secs * 1000.0:.1f} ms] {stmt}" for stmt, secs in stats["sql"]
+            )
+            log.warning(
+                "Slow request %s %s -> %s in %.1f ms (%d queries, %.1f ms SQL)\n%s",
+                request.method, request.path, response.status_code, elapsed * 1000.0,
+                stats["queries"], stats["query_seconds"] * 1000.0, sql_lines,
+            )
+        return response
+
+    metrics_token = app.config.get("METRICS_TOKEN")
+    if not metrics_token:
+        return
+
+    @app.route("/metrics")
+    def metrics():
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied.encode("utf-8"), metrics_token.encode("utf-8")):
+            abort(401)
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,133 @@
+# backend/utils/phash.py
+"""
+Near-duplicate grouping over 64-bit perceptual hashes (Photo.phash, a dHash
+computed at ingest by utils.imaging.probe_image).
+
+Comparing every pair is O(n^2), so candidates come from multi-index hashing:
+the 64 bits are split into max_distance + 1 disjoint chunks and each chunk
+value is a bucket key. Two hashes within Hamming distance d differ in at most
+d chunks, so by pigeonhole they share at least one bucket — only photos that
+collide in some bucket are compared. Matches are merged with union-find, so
+burst shots A~B~C form one group even if A and C are a little further apart.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from config import Config
+
+HASH_BITS = 64
+MAX_DISTANCE_LIMIT = 12  # 13 chunks of ~5 bits: beyond this buckets get too coarse
+
+
+def max_distance_param(requested: Optional[int]) -> int:
+    """?distance= clamped to 0..MAX_DISTANCE_LIMIT (default DUPLICATE_MAX_DISTANCE)."""
+    if requested is None:
+        requested = Config.DUPLICATE_MAX_DISTANCE
+    return max(0, min(requested, MAX_DISTANCE_LIMIT))
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _chunk_masks(chunks: int):
+    """[(shift, mask)] splitting HASH_BITS into `chunks` nearly equal bit ranges."""
+    out, start = [], 0
+    for i in range(chunks):
+        width = HASH_BITS // chunks + (1 if i < HASH_BITS % chunks else 0)
+        out.append((start, (1 << width) - 1))
+        start += width
+    return out
+
+
+class MultiIndexHash:
+    """Buckets hashes by chunk value; candidates(h) are ids sharing any chunk with h."""
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self._masks = _chunk_masks(max_distance + 1)
+        self._tables = [defaultdict(list) for _ in self._masks]
+        self._hashes: dict[int, int] = {}
+
+    def add(self, item_id: int, value: int):
+        self._hashes[item_id] = value
+        for table, (shift, mask) in zip(self._tables, self._masks):
+            table[(value >> shift) & mask].append(item_id)
+
+    def near(self, value: int):
+        """(id, distance) for stored hashes within max_distance of `value`."""
+        seen = set()
+        for table, (shift, mask) in zip(self._tables, self._masks):
+            for other in table.get((value >> shift) & mask, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                d = hamming(value, self._hashes[other])
+                if d <= self.max_distance:
+                    yield other, d
+
+
+def near_duplicate_groups(items: Iterable[tuple[int, str]], max_distance: int) -> list[list[int]]:
+    """
+    Group ids whose hex hashes are within `max_distance` bits (transitively).
+    Only groups of two or more are returned, largest first; ids keep input order.
+    """
+    index = MultiIndexHash(max_distance)
+    parent: dict[int, int] = {}
+    order = []
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for item_id, hex_hash in items:
+        value = int(hex_hash, 16)
+        parent[item_id] = item_id
+        order.append(item_id)
+        # Query before adding: each close pair is examined once
+        for other, _d in index.near(value):
+            ra, rb = find(item_id), find(other)
+            if ra != rb:
+                parent[ra] = rb
+        index.add(item_id, value)
+
+    groups = defaultdict(list)
+    for item_id in order:
+        groups[find(item_id)].append(item_id)
+    return sorted((g for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+
+def duplicate_groups_payload(rows, max_distance: int) -> dict:
+    """
+    JSON body for the /duplicates endpoints. `rows` have the listing columns
+    (id, filename, filepath, uploaded_at, width, height, placeholder, size,
+    album_id) plus phash; photos without a hash yet are only counted.
+    """
+    by_id = {r.id: r for r in rows if r.phash}
+    groups = near_duplicate_groups(((r.id, r.phash) for r in by_id.values()), max_distance)
+    return {
+        "max_distance": max_distance,
+        "scanned": len(by_id),
+        "unhashed": len(rows) - len(by_id),
+        "groups": [
+            [
+                {
+                    "id": r.id,
+                    "filename": r.filename,
+                    "filepath": r.filepath,
+                    "uploaded_at": r.uploaded_at.isoformat(),
+                    "width": r.width,
+                    "height": r.height,
+                    "placeholder": r.placeholder,
+                    "size": r.size or 0,
+                    "album_id": r.album_id,
+                }
+                for r in (by_id[i] for i in group)
+            ]
+            for group in groups
+        ],
+    }
@@ -0,0 +1,114 @@
+# backend/utils/rate_limit.py
+"""
+Per-IP admission control for the public share routes.
+
+A token bucket per client IP: each public share request costs 1, and a
+request carrying an unknown/invalid token costs SHARE_MISS_COST extra, so
+someone enumerating tokens runs dry long before legitimate viewers do.
+Empty bucket -> 429 with Retry-After, before any database work.
+
+/uploads image requests are not charged per hit (a gallery loads hundreds);
+they are only refused while the IP's bucket is empty and charged on misses.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import current_app, jsonify, request
+
+
+class TokenBucketLimiter:
+    # Forget idle IPs once the table grows past this many entries
+    _MAX_TRACKED = 50_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[str, list[float]] = {}  # ip -> [tokens, last_refill_monotonic]
+
+    def _params(self):
+        cfg = current_app.config
+        return float(cfg.get("SHARE_RATE_PER_MINUTE", 120)) / 60.0, float(cfg.get("SHARE_RATE_BURST", 60))
+
+    def _bucket(self, ip: str, now: float, rate: float, burst: float) -> list[float]:
+        b = self._buckets.get(ip)
+        if b is None:
+            if len(self._buckets) >= self._MAX_TRACKED:
+                self._prune(now, rate, burst)
+            b = self._buckets[ip] = [burst, now]
+        else:
+            b[0] = min(burst, b[0] + (now - b[1]) * rate)
+            b[1] = now
+        return b
+
+    def _prune(self, now: float, rate: float, burst: float):
+        full_after = burst / rate if rate > 0 else math.inf
+        for ip in [ip for ip, (_, last) in self._buckets.items() if now - last >= full_after]:
+            del self._buckets[ip]
+
+    def try_acquire(self, ip: str, cost: float = 1.0) -> float:
+        """Charge `cost`; returns 0 if admitted, else seconds until the bucket can pay."""
+        rate, burst = self._params()
+        now = time.monotonic()
+        with self._lock:
+            b = self._bucket(ip, now, rate, burst)
+            if b[0] >= cost:
+                b[0] -= cost
+                return 0.0
+            return (cost - b[0]) / rate if rate > 0 else 60.0
+
+    def charge(self, ip: str, cost: float):
+        """Charge unconditionally (may go negative, which extends the lock-out)."""
+        rate, burst = self._params()
+        now = time.monotonic()
+        with self._lock:
+            b = self._bucket(ip, now, rate, burst)
+            b[0] = max(b[0] - cost, -burst)
+
+    def blocked(self, ip: str) -> float:
+        """Seconds until the IP may proceed (0 if not blocked), without charging."""
+        rate, burst = self._params()
+        now = time.monotonic()
+        with self._lock:
+            b = self._bucket(ip, now, rate, burst)
+            if b[0] >= 1.0:
+                return 0.0
+            return (1.0 - b[0]) / rate if rate > 0 else 60.0
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+share_admission = TokenBucketLimiter()
+
+
+def client_ip() -> str:
+    return request.remote_addr or "unknown"
+
+
+def too_many_requests(retry_after: float):
+    resp = jsonify({"msg": "Too many requests, slow down."})
+    resp.headers["Retry-After"] = str(max(int(math.ceil(retry_after)), 1))
+    return resp, 429
+
+
+def penalize_share_miss(ip: Optional[str] = None):
+    """Call when a request presented an unknown/invalid share token (`ip` defaults to the Flask request's)."""
+    if current_app.config.get("SHARE_RATE_LIMIT_ENABLED", True):
+        share_admission.charge(ip or client_ip(), float(current_app.config.get("SHARE_MISS_COST", 10)))
+
+
+def share_rate_limited(fn: Callable):
+    """Admission control for public /s/<token>/... style routes."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if current_app.config.get("SHARE_RATE_LIMIT_ENABLED", True):
+            wait = share_admission.try_acquire(client_ip(), 1.0)
+            if wait:
+                return too_many_requests(wait)
+        return fn(*args, **kwargs)
+    return wrapper
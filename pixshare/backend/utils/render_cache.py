@@ -0,0 +1,94 @@
+# backend/utils/render_cache.py
+"""
+Size-bounded on-disk LRU cache for rendered photo edits.
+
+Entries live under RENDER_CACHE_DIR/<xx>/<photo_id>-<recipe_hash>-<size>.jpg.
+A hit bumps the file's mtime; when a write pushes the total past
+RENDER_CACHE_MAX_MB, the least recently used files are evicted (oldest mtime
+first) down to ~90% of the limit. The byte total is kept in memory and
+re-scanned from disk on first use, so several worker processes sharing the
+directory only ever overshoot by a little before one of them trims it.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from config import Config
+from utils.metrics import cache_hit, cache_miss
+
+
+class RenderCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+
+    def path_for(self, photo_id: int, recipe_hash: str, size: int) -> str:
+        name = f"{photo_id}-{recipe_hash}-{size}.jpg"
+        return os.path.join(self.root, recipe_hash[:2], name)
+
+    def get(self, photo_id: int, recipe_hash: str, size: int) -> Optional[str]:
+        path = self.path_for(photo_id, recipe_hash, size)
+        try:
+            os.utime(path, None)  # LRU bump
+        except OSError:
+            cache_miss("render_cache")
+            return None
+        cache_hit("render_cache")
+        return path
+
+    def put(self, photo_id: int, recipe_hash: str, size: int, data: bytes) -> str:
+        path = self.path_for(photo_id, recipe_hash, size)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan()[1]
+            else:
+                self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def _scan(self):
+        entries, total = [], 0
+        for dirpath, _dirs, names in os.walk(self.root):
+            for name in names:
+                full = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                if name.startswith(".tmp-") and st.st_mtime > time.time() - 3600:
+                    continue  # another process is still writing it
+                entries.append((st.st_mtime, st.st_size, full))
+                total += st.st_size
+        return entries, total
+
+    def _evict(self, keep: Optional[str] = None):
+        """Trim to ~90% of the limit, never removing `keep` (the entry just written)."""
+        entries, total = self._scan()
+        target = int(self.max_bytes * 0.9)
+        for _mtime, size, full in sorted(entries):
+            if total <= target:
+                break
+            if full == keep:
+                continue
+            try:
+                os.remove(full)
+                total -= size
+            except OSError:
+                pass
+        self._total = total
+
+
+render_cache = RenderCache(Config.RENDER_CACHE_DIR, int(Config.RENDER_CACHE_MAX_MB * 1024 * 1024))
@@ -0,0 +1,336 @@
+# backend/utils/scrubber.py
+"""
+Storage integrity scrubber: reconciles uploads/photos with the Photo table.
+
+Deletes ignore OSError and uploads quietly re-save missing files, so disk
+and database drift apart over time. A scrub pass streams both sides in the
+same (byte-wise path) order and merges them like two sorted lists, so only
+the discrepancies are ever held in memory:
+
+  - disk walker (own thread): os.scandir, entries sorted so that the
+    concatenated paths come out in string order;
+  - database: keyset pages ordered by (filepath, id) over ix_photo_filepath,
+    each its own short read so writers are never held up.
+
+Every matched pair has its size compared; with verify_checksums the bytes
+are hashed on a small thread pool against Photo.checksum (and missing
+checksums are filled in). Rows without a file (hot, or in the cold tier of
+utils/cold_storage.py) are reported missing; files without a row are
+orphans, which are deleted when reclaim is on and the file is older than the
+grace period (an upload writes its file before its row commits). Both
+lists are re-checked before they are reported or acted on, so concurrent
+uploads, deletes, moves and thaws don't produce false alarms.
+
+Checksum reads are paced by an I/O budget (max_bytes_per_sec) so a pass can
+run continuously next to live traffic: from a daemon thread every
+SCRUB_INTERVAL_SECONDS (0 disables) or via scrub_uploads.py. The last
+pass's report is written to SCRUB_REPORT_PATH.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from flask import Flask
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db
+from models.photo import Photo
+from utils.checksums import CHUNK, new_hasher
+from utils.cold_storage import cold_copy
+
+REPORT_LIMIT = 1000  # entries kept per list in the report
+_DONE = object()
+
+
+class IOThrottle:
+    """Shared byte budget: callers sleep just long enough to stay under `rate` bytes/s."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def spend(self, nbytes: int):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + nbytes / self.rate
+            wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _checksum(path: str, throttle: IOThrottle) -> tuple[Optional[str], int]:
+    """(hex digest or None if unreadable, bytes read)."""
+    h = new_hasher()
+    read = 0
+    try:
+        with open(path, "rb") as fh:
+            while True:
+                chunk = fh.read(CHUNK)
+                if not chunk:
+                    break
+                throttle.spend(len(chunk))
+                h.update(chunk)
+                read += len(chunk)
+    except OSError:
+        return None, read
+    return h.hexdigest(), read
+
+
+# ---------- the two sorted streams ----------
+
+def _walk_sorted(root: str, rel: str) -> Iterator[tuple[str, int, float]]:
+    """(relative path, size, mtime) of every file below root/rel, in path string order."""
+    try:
+        with os.scandir(os.path.join(root, rel)) as it:
+            entries = [(e.name + ("/" if e.is_dir(follow_symlinks=False) else ""), e) for e in it]
+    except OSError:
+        return
+    entries.sort(key=lambda pair: pair[0])  # "a/" sorts where "a/..." paths do
+    for key, entry in entries:
+        path = f"{rel}/{entry.name}"
+        if key.endswith("/"):
+            yield from _walk_sorted(root, path)
+            continue
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        yield path, st.st_size, st.st_mtime
+
+
+def _disk_stream(upload_root: str) -> Iterator[tuple[str, int, float]]:
+    """_walk_sorted of photos/, produced on its own thread so disk and DB are read side by side."""
+    q: queue.Queue = queue.Queue(maxsize=4096)
+
+    def _produce():
+        try:
+            for item in _walk_sorted(upload_root, "photos"):
+                q.put(item)
+        finally:
+            q.put(_DONE)
+
+    threading.Thread(target=_produce, name="scrub-walk", daemon=True).start()
+    while True:
+        item = q.get()
+        if item is _DONE:
+            return
+        yield item
+
+
+def _db_stream(batch_size: int):
+    """(id, filepath, size, checksum) of every photo, in path string order."""
+    path_col = Photo.filepath
+    if db.engine.dialect.name == "postgresql":
+        path_col = path_col.collate("C")  # byte order, same as the disk walk
+    last = None
+    while True:
+        q = select(Photo.id, Photo.filepath, Photo.size, Photo.checksum)
+        if last is not None:
+            q = q.where(or_(path_col > last[1], and_(Photo.filepath == last[1], Photo.id > last[0])))
+        rows = db.session.execute(q.order_by(path_col, Photo.id).limit(batch_size)).all()
+        db.session.commit()  # end the read transaction between pages
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1][:2]
+
+
+# ---------- pass ----------
+
+def scrub(
+    upload_root: str,
+    verify_checksums: bool = True,
+    reclaim: bool = False,
+    orphan_grace_seconds: float = 24 * 3600,
+    max_bytes_per_sec: float = 0,
+    workers: int = 4,
+    batch_size: int = 1000,
+) -> dict:
+    """One pass over disk and database; returns the report. Needs an app context."""
+    started = time.time()
+    throttle = IOThrottle(max_bytes_per_sec)
+    report = {
+        "started_at": started,
+        "files": 0, "rows": 0, "matched": 0, "bytes_hashed": 0,
+        "missing": [], "orphans": [], "size_mismatch": [], "checksum_mismatch": [],
+        "checksums_filled": 0, "orphans_reclaimed": 0, "orphan_bytes_reclaimed": 0,
+    }
+    missing, orphans, fills = [], [], []
+    pending = []  # (photo_id, path, expected checksum) awaiting a hash
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="scrub-hash")
+
+    def _drain():
+        paths = [os.path.join(upload_root, rel) for _, rel, _ in pending]
+        for (photo_id, rel, expected), (actual, read) in zip(
+            pending, pool.map(lambda path: _checksum(path, throttle), paths)
+        ):
+            report["bytes_hashed"] += read
+            if actual is None:
+                continue
+            if expected is None:
+                fills.append({"b_id": photo_id, "b_checksum": actual})
+            elif expected != actual:
+                _note(report["checksum_mismatch"], {"id": photo_id, "path": rel})
+        pending.clear()
+
+    disk = _disk_stream(upload_root)
+
+    def _next_file():
+        item = next(disk, None)
+        if item is not None:
+            report["files"] += 1
+        return item
+
+    current, last_matched = _next_file(), None
+    try:
+        for photo_id, rel, size, checksum in _db_stream(batch_size):
+            report["rows"] += 1
+            while current is not None and current[0] < rel:
+                if current[0] != last_matched:
+                    orphans.append(current)
+                current = _next_file()
+            if current is None or current[0] != rel:
+                missing.append((photo_id, rel))
+                continue
+            # don't advance the disk side yet: another row may point at the same file
+            last_matched = rel
+            report["matched"] += 1
+            if size is not None and size != current[1]:
+                _note(report["size_mismatch"], {"id": photo_id, "path": rel, "db": size, "disk": current[1]})
+            if verify_checksums:
+                pending.append((photo_id, rel, checksum))
+                if len(pending) >= batch_size:
+                    _drain()
+        while current is not None:
+            if current[0] != last_matched:
+                orphans.append(current)
+            current = _next_file()
+        if pending:
+            _drain()
+    finally:
+        pool.shutdown(wait=True)
+
+    if fills:
+        for i in range(0, len(fills), batch_size):
+            db.session.execute(
+                update(Photo.__table__)
+                .where(Photo.__table__.c.id == bindparam("b_id"), Photo.__table__.c.checksum.is_(None))
+                .values(checksum=bindparam("b_checksum")),
+                fills[i:i + batch_size],
+            )
+        db.session.commit()
+        report["checksums_filled"] = len(fills)
+
+    _confirm_missing(upload_root, missing, report, batch_size)
+    _handle_orphans(upload_root, orphans, report, reclaim, orphan_grace_seconds, batch_size)
+    report["finished_at"] = time.time()
+    return report
+
+
+def _note(lst: list, entry: dict):
+    if len(lst) < REPORT_LIMIT:
+        lst.append(entry)
+
+
+def _confirm_missing(upload_root: str, missing, report: dict, batch_size: int):
+    """Keep rows that still exist with the same path and still have no file."""
+    count = 0
+    for i in range(0, len(missing), batch_size):
+        chunk = dict(missing[i:i + batch_size])
+        rows = db.session.execute(
+            select(Photo.id, Photo.filepath).where(Photo.id.in_(list(chunk)))
+        ).all()
+        for photo_id, rel in rows:
+            if chunk.get(photo_id) == rel and not os.path.exists(os.path.join(upload_root, rel)) \
+                    and cold_copy(rel) is None:
+                count += 1
+                _note(report["missing"], {"id": photo_id, "path": rel})
+    report["missing_count"] = count
+
+
+def _handle_orphans(upload_root: str, orphans, report: dict, reclaim: bool, grace: float, batch_size: int):
+    """Drop files that gained a row meanwhile; optionally delete the old enough rest."""
+    cutoff = time.time() - grace
+    count = 0
+    for i in range(0, len(orphans), batch_size):
+        chunk = orphans[i:i + batch_size]
+        claimed = set(db.session.scalars(
+            select(Photo.filepath).where(Photo.filepath.in_([rel for rel, _, _ in chunk]))
+        ).all())
+        for rel, size, mtime in chunk:
+            if rel in claimed:
+                continue
+            count += 1
+            entry = {"path": rel, "size": size, "mtime": mtime}
+            if reclaim and mtime < cutoff:
+                try:
+                    os.remove(os.path.join(upload_root, rel))
+                    report["orphans_reclaimed"] += 1
+                    report["orphan_bytes_reclaimed"] += size
+                    entry["reclaimed"] = True
+                except OSError:
+                    pass
+            _note(report["orphans"], entry)
+    report["orphan_count"] = count
+
+
+def write_report(path: str, report: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=1)
+    os.replace(tmp, path)
+
+
+def scrub_from_config(app: Flask) -> dict:
+    cfg = app.config
+    report = scrub(
+        cfg["UPLOAD_ROOT"],
+        verify_checksums=bool(cfg.get("SCRUB_VERIFY_CHECKSUMS", True)),
+        reclaim=bool(cfg.get("SCRUB_RECLAIM_ORPHANS", False)),
+        orphan_grace_seconds=float(cfg.get("SCRUB_ORPHAN_GRACE_HOURS", 24)) * 3600,
+        max_bytes_per_sec=float(cfg.get("SCRUB_MAX_MBPS", 20)) * 1024 * 1024,
+    )
+    write_report(cfg["SCRUB_REPORT_PATH"], report)
+    return report
+
+
+def init_scrubber(app: Flask):
+    """Start the background scrub thread (no-op when SCRUB_INTERVAL_SECONDS is 0)."""
+    interval = float(app.config.get("SCRUB_INTERVAL_SECONDS", 0))
+    if interval <= 0:
+        return None
+
+    def _loop():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    r = scrub_from_config(app)
+                    if r["missing_count"] or r["orphan_count"] or r["size_mismatch"] or r["checksum_mismatch"]:
+                        app.logger.warning(
+                            "Scrub: %d missing, %d orphan(s) (%d reclaimed), %d size / %d checksum mismatch(es)",
+                            r["missing_count"], r["orphan_count"], r["orphans_reclaimed"],
+                            len(r["size_mismatch"]), len(r["checksum_mismatch"]),
+                        )
+                except (SQLAlchemyError, OSError):
+                    db.session.rollback()
+                    app.logger.exception("Scrub failed")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=_loop, name="scrubber", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,110 @@
+# backend/utils/share_sweeper.py
+"""
+Deletes expired share links and their Guest rows in small batches.
+
+resolve_share_token already refuses expired tokens, so the sweep is only
+housekeeping: it keeps the share/guest tables from growing forever. Each batch
+walks ix_share_expires (oldest first), so a sweep costs the same whether the
+table holds a thousand or millions of historical shares.
+
+Content created through a link is kept: photos and guest comments just lose
+their share/guest reference; guest reactions are deleted with the guest.
+
+Runs from a daemon thread every SHARE_SWEEP_INTERVAL_SECONDS (0 disables), or
+on demand via sweep_shares.py.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from flask import Flask
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db
+from models.comment import Comment
+from models.guest import Guest
+from models.photo import Photo
+from models.photo_reaction import PhotoReaction
+from models.share import Share
+from utils.event_manifest import forget_share_manifests
+
+
+def _sweep_batch(cutoff: datetime, batch_size: int) -> int:
+    rows = db.session.execute(
+        select(Share.id, Share.token)
+        .where(Share.expires_at.isnot(None), Share.expires_at <= cutoff)
+        .order_by(Share.expires_at)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return 0
+    share_ids = [share_id for share_id, _ in rows]
+    guest_ids = db.session.scalars(select(Guest.id).where(Guest.share_id.in_(share_ids))).all()
+
+    if guest_ids:
+        db.session.execute(delete(PhotoReaction).where(PhotoReaction.guest_id.in_(guest_ids)))
+        db.session.execute(update(Comment).where(Comment.guest_id.in_(guest_ids)).values(guest_id=None))
+        db.session.execute(
+            update(Photo).where(Photo.uploaded_by_guest_id.in_(guest_ids)).values(uploaded_by_guest_id=None)
+        )
+        db.session.execute(delete(Guest).where(Guest.id.in_(guest_ids)))
+
+    db.session.execute(update(PhotoReaction).where(PhotoReaction.share_id.in_(share_ids)).values(share_id=None))
+    db.session.execute(update(Comment).where(Comment.share_id.in_(share_ids)).values(share_id=None))
+    db.session.execute(
+        update(Photo).where(Photo.uploaded_via_share_id.in_(share_ids)).values(uploaded_via_share_id=None)
+    )
+    db.session.execute(delete(Share).where(Share.id.in_(share_ids)))
+    db.session.commit()
+    forget_share_manifests(token for _, token in rows)
+    return len(share_ids)
+
+
+def sweep_expired_shares(
+    batch_size: int = 500,
+    grace: timedelta = timedelta(0),
+    max_batches: Optional[int] = None,
+) -> int:
+    """Delete shares that expired more than `grace` ago; returns how many were removed.
+    Commits per batch so locks stay short. Needs an app context."""
+    cutoff = datetime.utcnow() - grace
+    removed = batches = 0
+    while max_batches is None or batches < max_batches:
+        n = _sweep_batch(cutoff, batch_size)
+        removed += n
+        batches += 1
+        if n < batch_size:
+            break
+    return removed
+
+
+def init_share_sweeper(app: Flask):
+    """Start the background sweeper thread (no-op when SHARE_SWEEP_INTERVAL_SECONDS is 0)."""
+    interval = float(app.config.get("SHARE_SWEEP_INTERVAL_SECONDS", 0))
+    if interval <= 0:
+        return None
+
+    def _loop():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    n = sweep_expired_shares(
+                        batch_size=int(app.config.get("SHARE_SWEEP_BATCH_SIZE", 500)),
+                        grace=timedelta(hours=float(app.config.get("SHARE_SWEEP_GRACE_HOURS", 24))),
+                    )
+                    if n:
+                        app.logger.info("Share sweeper removed %d expired share(s)", n)
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    app.logger.exception("Share sweep failed")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=_loop, name="share-sweeper", daemon=True)
+    thread.start()
+    return thread
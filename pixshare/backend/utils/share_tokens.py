@@ -0,0 +1,215 @@
+# backend/utils/share_tokens.py
+"""
+Share-token resolution with an in-memory negative-lookup filter.
+
+Every /uploads?t=, /s/<token>/... and comment/share check used to issue
+Share.query.filter_by(token=...) even for tokens that cannot exist (stale
+links, scanners). A Bloom filter of all valid tokens lets us reject those
+without touching the database:
+
+  - built at startup (init_share_token_filter) and rebuilt every
+    SHARE_FILTER_REBUILD_SECONDS so revoked tokens drop out; the rebuild runs
+    on a background thread started by the first request to notice it is due,
+    and that request (and any concurrent ones) keep using the old filter;
+  - updated in-process when a share is created (remember_share_tokens);
+  - on a miss, shares created since the last refresh (e.g. by another worker
+    process) are pulled in with one small query, at most once every
+    SHARE_FILTER_REFRESH_SECONDS, before the token is rejected.
+
+A Bloom filter has no false negatives, so valid tokens always reach the DB
+lookup; false positives (~SHARE_FILTER_FP_RATE) just cost the old query.
+If the filter cannot be built (e.g. tables not created yet) it fails open.
+
+Expired shares (Share.expires_at in the past) are left out of the filter and
+rejected by resolve_share_token; utils.share_sweeper deletes them later.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from flask import Flask, current_app
+from sqlalchemy import or_
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db
+from models.share import Share
+from utils.metrics import cache_hit, cache_miss
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over str keys (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01):
+        capacity = max(int(capacity), 1)
+        self.nbits = max(int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)), 64)
+        self.nhashes = max(int(round(self.nbits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.nbits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.nhashes):
+            yield (h1 + i * h2) % self.nbits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def _not_expired(now: datetime):
+    return or_(Share.expires_at.is_(None), Share.expires_at > now)
+
+
+def is_expired(share: Share, now: Optional[datetime] = None) -> bool:
+    return share.expires_at is not None and share.expires_at <= (now or datetime.utcnow())
+
+
+class ShareTokenFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom: Optional[BloomFilter] = None
+        self._built_at = 0.0          # monotonic
+        self._refreshed_at = 0.0      # monotonic
+        self._refreshed_wall: Optional[datetime] = None  # utc, for the created_at catch-up query
+        self._last_attempt = 0.0
+        self._rebuilding = False
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    def _config(self, key, default):
+        try:
+            return current_app.config.get(key, default)
+        except RuntimeError:
+            return default
+
+    def build(self):
+        """(Re)build from the share table. Needs an app context."""
+        started_wall = datetime.utcnow()
+        tokens = [
+            t for (t,) in db.session.query(Share.token)
+            .filter(Share.token.isnot(None), _not_expired(started_wall))
+            .yield_per(10000)
+        ]
+        fp_rate = float(self._config("SHARE_FILTER_FP_RATE", 0.01))
+        bloom = BloomFilter(capacity=len(tokens) * 2 + 1024, fp_rate=fp_rate)
+        for t in tokens:
+            bloom.add(t)
+        now = time.monotonic()
+        with self._lock:
+            self._bloom = bloom
+            self._built_at = self._refreshed_at = now
+            self._refreshed_wall = started_wall
+
+    def _rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        app = current_app._get_current_object()
+        threading.Thread(target=self._rebuild, args=(app,), name="share-filter-rebuild", daemon=True).start()
+
+    def _rebuild(self, app: Flask):
+        try:
+            with app.app_context():
+                try:
+                    self.build()
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    app.logger.warning("Share token filter rebuild failed; keeping the old one.", exc_info=True)
+                    with self._lock:
+                        self._built_at = time.monotonic()  # try again after the next interval
+        finally:
+            self._rebuilding = False
+
+    def add(self, token: str):
+        with self._lock:
+            if self._bloom is not None and token:
+                self._bloom.add(token)
+
+    def _catch_up(self):
+        """Pull in shares created since the last build/refresh (other processes)."""
+        since = self._refreshed_wall - timedelta(seconds=5)  # slack for clock/commit skew
+        started_wall = datetime.utcnow()
+        rows = db.session.query(Share.token).filter(Share.created_at >= since, Share.token.isnot(None)).all()
+        with self._lock:
+            for (t,) in rows:
+                self._bloom.add(t)
+            self._refreshed_at = time.monotonic()
+            self._refreshed_wall = started_wall
+
+    def might_exist(self, token: str) -> bool:
+        """False only if the token is certainly not a valid share token."""
+        if not self._config("SHARE_FILTER_ENABLED", True):
+            return True
+        now = time.monotonic()
+
+        if self._bloom is None:
+            # Not built yet (e.g. tables were missing at startup): retry occasionally, fail open.
+            if now - self._last_attempt < float(self._config("SHARE_FILTER_REFRESH_SECONDS", 1.0)):
+                return True
+            self._last_attempt = now
+            try:
+                self.build()
+            except SQLAlchemyError:
+                db.session.rollback()
+                return True
+        elif now - self._built_at > float(self._config("SHARE_FILTER_REBUILD_SECONDS", 300)):
+            # Periodic rebuild drops revoked/expired tokens
+            self._rebuild_in_background()
+
+        if token in self._bloom:
+            return True
+
+        if now - self._refreshed_at >= float(self._config("SHARE_FILTER_REFRESH_SECONDS", 1.0)):
+            try:
+                self._catch_up()
+            except SQLAlchemyError:
+                db.session.rollback()
+                return True
+            return token in self._bloom
+        return False
+
+
+share_token_filter = ShareTokenFilter()
+
+
+def init_share_token_filter(app: Flask):
+    """Build the filter at startup; leaves it unbuilt (fail-open) if the DB isn't ready."""
+    with app.app_context():
+        try:
+            share_token_filter.build()
+        except SQLAlchemyError:
+            db.session.rollback()
+            app.logger.info("Share token filter not built at startup (tables missing?); will retry lazily.")
+
+
+def remember_share_tokens(tokens: Iterable[str]):
+    for t in tokens:
+        share_token_filter.add(t)
+
+
+def resolve_share_token(token: Optional[str]) -> Optional[Share]:
+    """Share row for `token`, or None if unknown or expired.
+    Unknown tokens are rejected without a query when possible."""
+    token = (token or "").strip()
+    if not token:
+        return None
+    if not share_token_filter.might_exist(token):
+        cache_hit("share_token_filter")
+        return None
+    cache_miss("share_token_filter")
+    s = Share.query.filter_by(token=token).first()
+    if s is None or is_expired(s):
+        return None
+    return s
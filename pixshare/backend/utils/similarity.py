@@ -0,0 +1,323 @@
+# backend/utils/similarity.py
+"""
+"More like this": compact visual feature vectors and a per-user similarity
+index.
+
+Each photo gets a DIM-float vector at ingest (feature_vector): a 4x4x4 RGB
+colour histogram (square-rooted, so the dot product is a Hellinger-style
+colour similarity) next to a mean-centred 8x8 grayscale thumbnail (layout),
+L2-normalised as a whole. A dot product of two vectors is their cosine
+similarity.
+
+Vectors live in one memory-mapped matrix per owner under
+SIMILARITY_DIR/<user_id>/:
+
+    vectors.f32   capacity x DIM float32
+    ids.i64       photo id per row (-1 = deleted)
+    albums.i64    album id per row (visibility filtering)
+    meta.json     {"count", "capacity", "deleted"}
+
+Uploads append rows and deletes tombstone them in place; capacity doubles
+when full and the files are compacted once a quarter of the rows are dead.
+A query is one matrix-vector product over the mapped rows plus an
+argpartition — a few milliseconds for 100k photos. Every write is a
+read-modify-write of the files and meta.json, and web workers and
+import_photos.py write the same user's index, so writers hold an flock on
+SIMILARITY_DIR/.locks/<user_id>.lock (plus a thread lock) for the whole
+update; readers don't lock. build_similarity_index.py rebuilds a user's index
+from the originals if it is ever lost or out of step.
+
+NumPy and Pillow are optional: without them nothing is indexed and the
+endpoint reports 501.
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Iterable, Optional, Sequence
+
+from config import Config
+from utils.imaging import Image, ImageOps
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+DIM = 128
+_MIN_CAPACITY = 1024
+
+
+def similarity_available() -> bool:
+    return np is not None and Image is not None
+
+
+def feature_vector(path):
+    """Unit-length float32 vector for the image at `path` (a path or binary file object), or None if unreadable."""
+    if not similarity_available():
+        return None
+    try:
+        with Image.open(path) as img:
+            img.draft("RGB", (64, 64))
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            img.thumbnail((64, 64), Image.BILINEAR)
+            rgb = np.asarray(img, dtype=np.uint8).reshape(-1, 3)
+            gray = np.asarray(img.convert("L").resize((8, 8), Image.BILINEAR), dtype=np.float32).ravel()
+    except Exception:
+        return None
+
+    bins = (rgb >> 6).astype(np.int32)  # 4 levels per channel
+    hist = np.bincount(bins[:, 0] * 16 + bins[:, 1] * 4 + bins[:, 2], minlength=64).astype(np.float32)
+    hist = np.sqrt(hist / max(hist.sum(), 1.0))
+
+    gray -= gray.mean()
+    norm = np.linalg.norm(gray)
+    if norm > 0:
+        gray /= norm
+
+    vec = np.concatenate([hist, gray])
+    norm = np.linalg.norm(vec)
+    return (vec / norm if norm > 0 else vec).astype(np.float32)
+
+
+class _UserIndex:
+    """Open memmaps of one user's index, valid while meta.json is unchanged."""
+
+    def __init__(self, folder: str, meta: dict, stamp):
+        self.stamp = stamp
+        self.count = meta["count"]
+        self.capacity = meta["capacity"]
+        self.deleted = meta.get("deleted", 0)
+        self.vectors = np.memmap(os.path.join(folder, "vectors.f32"), dtype=np.float32, mode="r+",
+                                 shape=(self.capacity, DIM))
+        self.ids = np.memmap(os.path.join(folder, "ids.i64"), dtype=np.int64, mode="r+", shape=(self.capacity,))
+        self.albums = np.memmap(os.path.join(folder, "albums.i64"), dtype=np.int64, mode="r+",
+                                shape=(self.capacity,))
+
+
+class SimilarityIndex:
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._open: dict[int, _UserIndex] = {}
+
+    # ---------- files ----------
+
+    def _folder(self, user_id: int) -> str:
+        return os.path.join(self.root, str(int(user_id)))
+
+    @contextlib.contextmanager
+    def _writing(self, user_id: int):
+        """Exclusive across threads and processes for one user's index."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            folder = os.path.join(self.root, ".locks")  # outside the user folder, which rebuild removes
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, f"{int(user_id)}.lock"), "a+b") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _meta_path(self, user_id: int) -> str:
+        return os.path.join(self._folder(user_id), "meta.json")
+
+    def _load(self, user_id: int) -> Optional[_UserIndex]:
+        """Current mapping for `user_id` (reopened if another writer changed it), or None."""
+        meta_path = self._meta_path(user_id)
+        try:
+            st = os.stat(meta_path)
+        except OSError:
+            self._open.pop(user_id, None)
+            return None
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        cached = self._open.get(user_id)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+        try:
+            with open(meta_path, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            idx = _UserIndex(self._folder(user_id), meta, stamp)
+        except (OSError, ValueError, KeyError):
+            return None
+        self._open[user_id] = idx
+        return idx
+
+    def _write_meta(self, user_id: int, count: int, capacity: int, deleted: int):
+        folder = self._folder(user_id)
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump({"count": count, "capacity": capacity, "deleted": deleted}, fh)
+        os.replace(tmp, self._meta_path(user_id))
+
+    def _rewrite(self, user_id: int, ids, albums, vectors, capacity: int):
+        """Write fresh files holding exactly the given rows (grow / compact / rebuild)."""
+        folder = self._folder(user_id)
+        os.makedirs(folder, exist_ok=True)
+        count = len(ids)
+        for name, dtype, shape, rows in (
+            ("vectors.f32", np.float32, (capacity, DIM), vectors),
+            ("ids.i64", np.int64, (capacity,), ids),
+            ("albums.i64", np.int64, (capacity,), albums),
+        ):
+            fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+            os.close(fd)
+            out = np.memmap(tmp, dtype=dtype, mode="w+", shape=shape)
+            if count:
+                out[:count] = rows
+            if name != "vectors.f32":
+                out[count:] = -1
+            out.flush()
+            del out
+            os.replace(tmp, os.path.join(folder, name))
+        self._write_meta(user_id, count, capacity, 0)
+
+    # ---------- writes ----------
+
+    def add(self, user_id: int, items: Iterable[tuple[int, int, object]]):
+        """Append (photo_id, album_id, vector) rows; items with a None vector are skipped."""
+        items = [(pid, aid, vec) for pid, aid, vec in items if vec is not None]
+        if not items or not similarity_available():
+            return
+        with self._writing(user_id):
+            idx = self._load(user_id)
+            count = idx.count if idx else 0
+            deleted = idx.deleted if idx else 0
+            if idx is None or count + len(items) > idx.capacity:
+                capacity = max(_MIN_CAPACITY, (idx.capacity if idx else 0) * 2)
+                while capacity < count + len(items):
+                    capacity *= 2
+                if idx is None:
+                    self._rewrite(user_id, [], [], np.empty((0, DIM), np.float32), capacity)
+                else:
+                    self._rewrite(user_id, idx.ids[:count], idx.albums[:count], idx.vectors[:count], capacity)
+                idx = self._load(user_id)
+
+            end = count + len(items)
+            idx.ids[count:end] = [pid for pid, _, _ in items]
+            idx.albums[count:end] = [aid for _, aid, _ in items]
+            idx.vectors[count:end] = np.stack([vec for _, _, vec in items])
+            for arr in (idx.vectors, idx.ids, idx.albums):
+                arr.flush()
+            self._write_meta(user_id, end, idx.capacity, deleted)  # tombstones survive a grow
+
+    def remove(self, user_id: int, photo_ids: Sequence[int]):
+        """Tombstone the rows of `photo_ids`; compacts when a quarter of the rows are dead."""
+        if not photo_ids or not similarity_available():
+            return
+        with self._writing(user_id):
+            idx = self._load(user_id)
+            if idx is None or idx.count == 0:
+                return
+            rows = np.nonzero(np.isin(idx.ids[:idx.count], np.asarray(photo_ids, dtype=np.int64)))[0]
+            if rows.size == 0:
+                return
+            idx.ids[rows] = -1
+            idx.vectors[rows] = 0
+            idx.ids.flush()
+            idx.vectors.flush()
+            deleted = idx.deleted + int(rows.size)
+
+            if deleted * 4 >= idx.count and idx.count >= _MIN_CAPACITY // 4:
+                live = idx.ids[:idx.count] >= 0
+                self._rewrite(user_id, idx.ids[:idx.count][live], idx.albums[:idx.count][live],
+                              idx.vectors[:idx.count][live], idx.capacity)
+            else:
+                self._write_meta(user_id, idx.count, idx.capacity, deleted)
+
+    def move(self, user_id: int, photo_ids: Sequence[int], album_id: int):
+        """Re-tag the rows of `photo_ids` with their new album (photos moved between albums)."""
+        if not photo_ids or not similarity_available():
+            return
+        with self._writing(user_id):
+            idx = self._load(user_id)
+            if idx is None or idx.count == 0:
+                return
+            rows = np.isin(idx.ids[:idx.count], np.asarray(photo_ids, dtype=np.int64))
+            idx.albums[:idx.count][rows] = album_id
+            idx.albums.flush()
+
+    def copy(self, user_id: int, pairs: Sequence[tuple[int, int]], album_id: int):
+        """Index copies under `album_id`, reusing the vectors of the (source_id, copy_id) sources."""
+        if not pairs or not similarity_available():
+            return
+        with self._writing(user_id):
+            idx = self._load(user_id)
+            if idx is None or idx.count == 0:
+                return
+            ids = idx.ids[:idx.count]
+            row_of = {int(pid): row for row, pid in enumerate(ids) if pid >= 0}
+            items = [
+                (new_id, album_id, np.array(idx.vectors[row_of[src_id]]))
+                for src_id, new_id in pairs if src_id in row_of
+            ]
+        self.add(user_id, items)
+
+    def rebuild(self, user_id: int, items: Sequence[tuple[int, int, object]]):
+        """Replace the user's index with exactly these (photo_id, album_id, vector) rows."""
+        items = [(pid, aid, vec) for pid, aid, vec in items if vec is not None]
+        with self._writing(user_id):
+            if not items:
+                shutil.rmtree(self._folder(user_id), ignore_errors=True)
+                self._open.pop(user_id, None)
+                return
+            capacity = _MIN_CAPACITY
+            while capacity < len(items):
+                capacity *= 2
+            self._rewrite(
+                user_id,
+                [pid for pid, _, _ in items],
+                [aid for _, aid, _ in items],
+                np.stack([vec for _, _, vec in items]),
+                capacity,
+            )
+
+    # ---------- queries ----------
+
+    def similar(
+        self,
+        user_id: int,
+        photo_id: int,
+        k: int,
+        album_ids: Optional[Iterable[int]] = None,
+    ) -> Optional[list[tuple[int, float]]]:
+        """
+        Top-k (photo_id, score) most similar to `photo_id` in `user_id`'s library,
+        restricted to `album_ids` when given. None if the photo isn't indexed.
+        """
+        idx = self._load(user_id)
+        if idx is None or idx.count == 0:
+            return None
+        ids = idx.ids[:idx.count]
+        rows = np.nonzero(ids == photo_id)[0]
+        if rows.size == 0:
+            return None
+
+        scores = idx.vectors[:idx.count] @ idx.vectors[rows[0]]
+        invalid = ids < 0
+        invalid[rows[0]] = True
+        if album_ids is not None:
+            invalid |= ~np.isin(idx.albums[:idx.count], np.fromiter(album_ids, dtype=np.int64))
+        scores[invalid] = -np.inf
+
+        k = min(k, int((~invalid).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+similarity_index = SimilarityIndex(Config.SIMILARITY_DIR)
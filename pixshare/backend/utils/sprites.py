@@ -0,0 +1,146 @@
+# backend/utils/sprites.py
+"""
+Album contact sheets: one WebP holding a grid of square thumbnails plus an
+offset map, so an album overview is a single image request instead of one
+per photo.
+
+Large albums are split into pages of SPRITE_PAGE_SIZE tiles. Sheets are cached
+under SPRITE_DIR/<album_id>/p<page>-<key>.webp|.json, where <key> hashes the
+page's (photo id, filepath) list and the tile settings. Adding,
+removing or moving photos changes the key, so a stale sheet is never served;
+older sheets of that page are deleted when a new one is written, and the
+whole folder goes with the album (invalidate_album_sprites).
+
+Requires Pillow (with WebP support).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional, Sequence
+
+from config import Config
+from utils.cold_storage import open_original
+from utils.imaging import Image, ImageOps
+from utils.metrics import cache_hit, cache_miss
+
+SPRITE_ROOT = Config.SPRITE_DIR
+
+
+def sprites_available() -> bool:
+    return Image is not None
+
+
+def _sprite_key(photos: Sequence[tuple[int, str]], tile: int, columns: int) -> str:
+    h = hashlib.sha1(f"v1:{tile}:{columns}".encode())
+    for photo_id, filepath in photos:
+        h.update(f"|{photo_id}:{filepath}".encode("utf-8"))
+    return h.hexdigest()[:20]
+
+
+def sprite_path(album_id: int, page: int, key: str) -> str:
+    return os.path.join(SPRITE_ROOT, str(album_id), f"p{page}-{key}.webp")
+
+
+def _thumb(upload_root: str, filepath: str, tile: int):
+    fh = open_original(upload_root, filepath)  # a cold original is read in place, not thawed
+    if fh is None:
+        return None
+    try:
+        with fh, Image.open(fh) as img:
+            img.draft("RGB", (tile * 2, tile * 2))
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            return ImageOps.fit(img, (tile, tile), Image.BILINEAR)
+    except Exception:
+        return None
+
+
+def _write_atomic(path: str, write):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def album_sprite(
+    album_id: int,
+    page: int,
+    photos: Sequence[tuple[int, str]],
+    upload_root: str,
+    tile: Optional[int] = None,
+    columns: Optional[int] = None,
+) -> tuple[str, dict]:
+    """
+    Contact sheet for one page of an album: `photos` are (id, filepath) in display order.
+    Returns (key, offset map); the image is at sprite_path(album_id, page, key).
+    """
+    tile = tile or Config.SPRITE_TILE
+    columns = max(1, min(columns or Config.SPRITE_COLUMNS, len(photos) or 1))
+    key = _sprite_key(photos, tile, columns)
+    folder = os.path.join(SPRITE_ROOT, str(album_id))
+    prefix = f"p{page}-"
+    map_path = os.path.join(folder, f"{prefix}{key}.json")
+
+    try:
+        with open(map_path, "r", encoding="utf-8") as fh:
+            offsets = json.load(fh)
+        if os.path.isfile(sprite_path(album_id, page, key)):
+            cache_hit("album_sprite")
+            return key, offsets
+    except (OSError, ValueError):
+        pass
+    cache_miss("album_sprite")
+
+    rows = max(1, -(-len(photos) // columns))
+    sheet = Image.new("RGB", (columns * tile, rows * tile), (240, 240, 240))
+    tiles = []
+    for i, (photo_id, filepath) in enumerate(photos):
+        x, y = (i % columns) * tile, (i // columns) * tile
+        thumb = _thumb(upload_root, filepath, tile)
+        if thumb is not None:
+            sheet.paste(thumb, (x, y))
+        tiles.append({"id": photo_id, "x": x, "y": y, "missing": thumb is None})
+
+    offsets = {
+        "tile": tile,
+        "columns": columns,
+        "rows": rows,
+        "width": columns * tile,
+        "height": rows * tile,
+        "tiles": tiles,
+    }
+
+    os.makedirs(folder, exist_ok=True)
+    _write_atomic(
+        sprite_path(album_id, page, key),
+        lambda tmp: sheet.save(tmp, format="WEBP", quality=Config.SPRITE_QUALITY, method=4),
+    )
+
+    def _dump(tmp):
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(offsets, fh, separators=(",", ":"))
+    _write_atomic(map_path, _dump)
+
+    # Drop this page's sheets for older membership
+    for name in os.listdir(folder):
+        if name.startswith(prefix) and not name.startswith(prefix + key):
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+    return key, offsets
+
+
+def invalidate_album_sprites(album_ids):
+    for album_id in set(album_ids):
+        shutil.rmtree(os.path.join(SPRITE_ROOT, str(album_id)), ignore_errors=True)
@@ -0,0 +1,203 @@
+# backend/utils/timeline.py
+"""
+Incremental rollups behind GET /timeline (models.timeline_bucket).
+
+Every photo counts towards two buckets of its album: the day and the month it
+was uploaded. Upload and delete routes call photos_added / photos_removed in
+the same transaction as the photo rows, so a bucket only changes together
+with its photos. Each bucket also keeps the ids of its TIMELINE_SAMPLES newest
+photos for the timeline's preview tiles.
+
+build_timeline.py recomputes everything from the photo table.
+"""
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Iterable
+
+from sqlalchemy import and_, bindparam, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models.photo import Photo
+from models.timeline_bucket import TimelineBucket
+
+TIMELINE_SAMPLES = 4
+GRANULARITIES = ("day", "month")
+
+
+def bucket_start(granularity: str, ts: datetime) -> date:
+    d = ts.date() if isinstance(ts, datetime) else ts
+    return d if granularity == "day" else d.replace(day=1)
+
+
+def _group(photos: Iterable[tuple[int, datetime]]) -> dict:
+    """(granularity, bucket_start) -> photo ids, newest first."""
+    grouped = defaultdict(list)
+    for photo_id, uploaded_at in photos:
+        uploaded_at = uploaded_at or datetime.utcnow()
+        for gran in GRANULARITIES:
+            grouped[(gran, bucket_start(gran, uploaded_at))].append(photo_id)
+    for ids in grouped.values():
+        ids.sort(reverse=True)
+    return grouped
+
+
+def _existing_samples(album_id: int, keys) -> dict:
+    """(granularity, bucket_start) -> sample ids of the buckets that exist."""
+    rows = db.session.execute(
+        select(TimelineBucket.granularity, TimelineBucket.bucket_start, TimelineBucket.sample_ids).where(
+            TimelineBucket.album_id == album_id,
+            or_(*(and_(TimelineBucket.granularity == g, TimelineBucket.bucket_start == s) for g, s in keys)),
+        )
+    ).all()
+    return {(g, s): json.loads(samples) for g, s, samples in rows}
+
+
+def _key_filter(album_id: int, key):
+    return and_(
+        TimelineBucket.album_id == album_id,
+        TimelineBucket.granularity == key[0],
+        TimelineBucket.bucket_start == key[1],
+    )
+
+
+def _upsert_insert():
+    """Dialect insert() with ON CONFLICT support, or None."""
+    name = db.engine.dialect.name
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def photos_added(album_id: int, photos: Iterable[tuple[int, datetime]]):
+    """Count new (photo_id, uploaded_at) rows of `album_id`. Call before commit, after flush.
+
+    Two uploads can create the same bucket at once (guests of one event on the
+    same day), so counts are upserted: ON CONFLICT adds to the row the other
+    transaction inserted instead of failing on uq_timeline_bucket. Samples are
+    advisory; the last writer's list wins.
+    """
+    grouped = _group(photos)
+    if not grouped:
+        return
+    existing = _existing_samples(album_id, grouped)
+    table = TimelineBucket.__table__
+    rows = [
+        dict(
+            album_id=album_id, granularity=key[0], bucket_start=key[1], photo_count=len(ids),
+            sample_ids=json.dumps(sorted(set(ids) | set(existing.get(key, ())), reverse=True)[:TIMELINE_SAMPLES]),
+        )
+        for key, ids in grouped.items()
+    ]
+    dialect_insert = _upsert_insert()
+    if dialect_insert is not None:
+        stmt = dialect_insert(table)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.album_id, table.c.granularity, table.c.bucket_start],
+            set_={
+                "photo_count": table.c.photo_count + stmt.excluded.photo_count,
+                "sample_ids": stmt.excluded.sample_ids,
+            },
+        ), rows)
+        return
+    # Other dialects: insert each bucket in a savepoint, count into the winner's row if it lost
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table).values(**row))
+        except IntegrityError:
+            db.session.execute(
+                update(table).where(_key_filter(album_id, (row["granularity"], row["bucket_start"])))
+                .values(photo_count=table.c.photo_count + row["photo_count"], sample_ids=row["sample_ids"])
+            )
+
+
+def photos_removed(album_id: int, photos: Iterable[tuple[int, datetime]]):
+    """Uncount deleted (photo_id, uploaded_at) rows of `album_id`. Call before commit, after the delete.
+
+    Counts are decremented in SQL and empty buckets deleted by their stored
+    count, never by a value read earlier in the transaction.
+    """
+    grouped = _group(photos)
+    if not grouped:
+        return
+    table = TimelineBucket.__table__
+    rows = []
+    for (gran, start), samples in _existing_samples(album_id, grouped).items():
+        gone = set(grouped[(gran, start)])
+        samples = [pid for pid in samples if pid not in gone] or _refill(album_id, (gran, start))
+        rows.append({"g": gran, "s": start, "n": len(gone), "samples": json.dumps(samples)})
+    if rows:
+        db.session.execute(
+            update(table)
+            .where(table.c.album_id == album_id, table.c.granularity == bindparam("g"),
+                   table.c.bucket_start == bindparam("s"))
+            .values(photo_count=table.c.photo_count - bindparam("n"), sample_ids=bindparam("samples")),
+            rows,
+        )
+    db.session.execute(
+        delete(table).where(
+            table.c.photo_count <= 0,
+            or_(*(_key_filter(album_id, key) for key in grouped)),
+        )
+    )
+
+
+def _refill(album_id: int, key) -> list[int]:
+    """Newest remaining photo ids of a bucket whose samples were all deleted."""
+    gran, start = key
+    if gran == "day":
+        end = date.fromordinal(start.toordinal() + 1)
+    else:
+        end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    rows = (
+        db.session.query(Photo.id)
+        .filter(
+            Photo.album_id == album_id,
+            Photo.uploaded_at >= datetime.combine(start, datetime.min.time()),
+            Photo.uploaded_at < datetime.combine(end, datetime.min.time()),
+        )
+        .order_by(Photo.id.desc())
+        .limit(TIMELINE_SAMPLES)
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+def album_removed(album_id: int):
+    TimelineBucket.query.filter_by(album_id=album_id).delete(synchronize_session=False)
+
+
+def rebuild_timeline(batch_size: int = 5000) -> int:
+    """Recompute every bucket from the photo table (streamed); returns the number of buckets."""
+    counts = defaultdict(int)
+    samples = defaultdict(list)
+    rows = db.session.execute(
+        select(Photo.album_id, Photo.id, Photo.uploaded_at).order_by(Photo.id.desc())
+    ).yield_per(batch_size)
+    for album_id, photo_id, uploaded_at in rows:
+        for gran in GRANULARITIES:
+            key = (album_id, gran, bucket_start(gran, uploaded_at or datetime.utcnow()))
+            counts[key] += 1
+            if len(samples[key]) < TIMELINE_SAMPLES:
+                samples[key].append(photo_id)  # ids arrive newest first
+
+    TimelineBucket.query.delete(synchronize_session=False)
+    buckets = [
+        {
+            "album_id": album_id, "granularity": gran, "bucket_start": start,
+            "photo_count": n, "sample_ids": json.dumps(samples[(album_id, gran, start)]),
+        }
+        for (album_id, gran, start), n in counts.items()
+    ]
+    for i in range(0, len(buckets), batch_size):
+        db.session.execute(insert(TimelineBucket), buckets[i:i + batch_size])
+    db.session.commit()
+    return len(buckets)
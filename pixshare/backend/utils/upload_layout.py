@@ -0,0 +1,110 @@
+# backend/utils/upload_layout.py
+"""
+On-disk layout of uploaded photos.
+
+Files used to land flat in photos/<user>/<album>/, which makes albums with
+tens of thousands of files slow to list, stat and back up. New files go one
+or two hash-prefix directories deeper:
+
+    photos/<user>/<album>/<xx>/<yy>/<name>     (xx/yy = sha1(name)[:4])
+
+The prefix depends only on the file name, so a flat path maps to exactly one
+fan-out path (fanout_path). That is what lets migrate_upload_layout.py move
+files while the site is live: URLs handed out before a photo moved are
+resolved to its new location by locate_upload, and the user/album part that
+authorization relies on (parse_upload_path) is the same in both layouts.
+
+Copying or moving a photo to another album (routes/photos.py) and the layout
+migration never rewrite bytes: link_upload gives the file a second name
+under the destination path and the old name is dropped once the database
+points at the new one.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import secrets
+import shutil
+from typing import Optional
+
+from werkzeug.security import safe_join
+
+from config import Config
+from utils.cold_storage import thaw
+
+FANOUT_LEVELS = Config.UPLOAD_FANOUT_LEVELS
+
+
+def _prefix(name: str) -> list[str]:
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+    return [digest[2 * i:2 * i + 2] for i in range(FANOUT_LEVELS)]
+
+
+def photo_relpath(user_id: int, album_id: int, name: str) -> str:
+    """Relative path (as stored in Photo.filepath) for a new file of an album."""
+    return "/".join(["photos", str(user_id), str(album_id), *_prefix(name), name])
+
+
+def fanout_path(rel_path: str) -> Optional[str]:
+    """Where `rel_path` lives in the current layout, or None if it isn't a photo path."""
+    parts = rel_path.split("/")
+    if len(parts) < 4 or parts[0] != "photos":
+        return None
+    return photo_relpath(parts[1], parts[2], parts[-1])
+
+
+def is_current_layout(rel_path: str) -> bool:
+    return fanout_path(rel_path) == rel_path
+
+
+def unique_photo_relpath(upload_root: str, user_id: int, album_id: int, name: str,
+                         taken: Optional[set] = None) -> str:
+    """
+    photo_relpath, suffixing the name until nothing exists there yet (and,
+    when `taken` is given, until it isn't one of those names; the chosen
+    name is added to it).
+    """
+    stem, ext = os.path.splitext(name)
+    rel = photo_relpath(user_id, album_id, name)
+    while (taken is not None and name in taken) or os.path.exists(os.path.join(upload_root, rel)):
+        name = f"{stem}_{secrets.token_hex(4)}{ext}"
+        rel = photo_relpath(user_id, album_id, name)
+    if taken is not None:
+        taken.add(name)
+    return rel
+
+
+def link_upload(src: str, dst: str):
+    """
+    Give the file at `src` the additional name `dst` (hard link; a copy only
+    where the filesystem can't link). Raises FileExistsError if a different
+    file already sits at `dst`.
+    """
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if os.path.exists(dst):
+        if os.path.samefile(src, dst):
+            return  # linked by an earlier, interrupted attempt
+        raise FileExistsError(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def locate_upload(upload_root: str, rel_path: str) -> Optional[str]:
+    """
+    Absolute path of the file behind an /uploads URL, or None. Falls back to
+    the fan-out location so links to not-yet-migrated paths keep working
+    after migrate_upload_layout.py moved the file, and thaws an original that
+    tier_uploads.py moved to the cold tier (utils/cold_storage.py).
+    """
+    candidates = [c for c in (rel_path, fanout_path(rel_path)) if c]
+    for candidate in candidates:
+        full = safe_join(upload_root, candidate)
+        if full and os.path.isfile(full):
+            return full
+    for candidate in candidates:
+        full = thaw(upload_root, candidate)
+        if full:
+            return full
+    return None
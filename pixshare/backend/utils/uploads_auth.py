@@ -0,0 +1,146 @@
+# backend/utils/uploads_auth.py
+"""
+Authorization rules for files under /uploads, shared by the Flask route
+(app.serve_uploads) and the async media server (media_server.py).
+
+Both callers resolve the caller identity themselves (share token and/or JWT
+identity) and then ask admit_upload() for an HTTP status: authorize_upload()
+behind the per-IP share admission check (utils.rate_limit).
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from flask import current_app
+
+from extensions import db
+from models.photo import Photo
+from models.album import Album
+from models.event import Event
+from models.event_participant import EventParticipant
+from utils.rate_limit import penalize_share_miss, share_admission
+from utils.share_tokens import resolve_share_token
+from utils.upload_layout import fanout_path
+
+try:
+    from models.event_albums import event_albums  # db.Table(...)
+except Exception:
+    event_albums = None
+
+
+def parse_upload_path(filename: str) -> Optional[tuple[int, int]]:
+    """'photos/<user>/<album>/[<xx>/<yy>/]...' -> (user_id, album_id), or None if malformed."""
+    parts = filename.split("/")
+    if len(parts) < 3 or parts[0] != "photos":
+        return None
+    try:
+        return int(parts[1]), int(parts[2])
+    except (TypeError, ValueError):
+        return None
+
+
+def _event_album_ids(event_id: int) -> Optional[set[int]]:
+    if event_albums is not None:
+        rows = (
+            db.session.query(Album.id)
+            .join(event_albums, event_albums.c.album_id == Album.id)
+            .filter(event_albums.c.event_id == event_id)
+            .all()
+        )
+        return {row[0] for row in rows}
+
+    ev = Event.query.get(event_id)
+    if not ev:
+        return None
+    try:
+        return {a.id for a in getattr(ev, "albums", [])}
+    except Exception:
+        return set()
+
+
+def authorize_upload(filename: str, token: str = "", uid=None) -> int:
+    """
+    Return 200 if the file may be served, else the HTTP error status.
+
+    Access rules:
+      - Public share token (?t=<token> or ?token=):
+         * album token: allow any file under photos/<user_id>/<album_id>/*
+         * photo token: allow only the exact shared photo file
+         * event token: allow any file whose album_id is attached to the event
+      - Owner/participant with JWT identity `uid`:
+         * owner may access photos/<owner_id>/**
+         * participant may access files of albums tied to events they joined
+    """
+    # Always require 'photos/<user>/<album>/...' path
+    parsed = parse_upload_path(filename)
+    if parsed is None:
+        return 403
+    req_user_id, req_album_id = parsed
+
+    # 1) PUBLIC SHARE
+    if token:
+        s = resolve_share_token(token)
+        if not s:
+            return 404
+
+        # Album share: any file within that album
+        if s.album_id:
+            return 200 if req_album_id == s.album_id else 403
+
+        # Photo share: only the exact shared file
+        if s.photo_id:
+            p = Photo.query.get(s.photo_id)
+            if not p:
+                return 404
+            # the shared file may have moved to the fan-out layout since the link was built
+            return 200 if p.filepath in (filename, fanout_path(filename)) else 403
+
+        # Event share: any file from an album attached to the event
+        if s.event_id:
+            event_album_ids = _event_album_ids(s.event_id)
+            if event_album_ids is None:
+                return 404
+            return 200 if req_album_id in event_album_ids else 403
+
+        # Unknown share type
+        return 403
+
+    # 2) OWNER / PARTICIPANT via JWT
+    if not uid:
+        return 401
+
+    # Owner may fetch anything under their own user folder
+    if str(req_user_id) == str(uid):
+        return 200
+
+    # Participant may fetch files of albums linked to events they joined
+    if event_albums is not None:
+        exists = (
+            db.session.query(event_albums.c.event_id)
+            .join(EventParticipant, EventParticipant.event_id == event_albums.c.event_id)
+            .filter(event_albums.c.album_id == req_album_id, EventParticipant.user_id == uid)
+            .first()
+        )
+        if exists:
+            return 200
+
+    return 403
+
+
+def admit_upload(filename: str, token: str, uid, ip: str) -> tuple[int, float]:
+    """
+    (status, retry_after) for an /uploads-style request from `ip`; needs an app context.
+
+    Image loads are not charged per hit, but with a share token an IP that
+    burned its budget on bad tokens gets 429 before any lookup, and a token
+    that matches nothing is charged SHARE_MISS_COST.
+    """
+    limited = token and current_app.config.get("SHARE_RATE_LIMIT_ENABLED", True)
+    if limited:
+        wait = share_admission.blocked(ip)
+        if wait:
+            return 429, wait
+    status = authorize_upload(filename, token=token, uid=uid)
+    if status == 404 and limited:
+        penalize_share_miss(ip)
+    return status, 0.0
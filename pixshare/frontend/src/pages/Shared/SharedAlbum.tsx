@@ -1,8 +1,9 @@
 import { useEffect, useMemo, useRef, useState } from "react";
 import { useParams, Link } from "react-router-dom";
 import { BASE_URL, PHOTO_BASE_URL } from "../../utils/api";
+import { placeholderStyle, type PhotoMeta } from "../../utils/placeholder";
 
-type SharedPhoto = {
+type SharedPhoto = PhotoMeta & {
   id: number;
   filename: string;
   filepath: string; // e.g., "photos/<user>/<album>/<file>"
@@ -133,7 +134,14 @@ export default function SharedAlbum() {
               className="block border rounded overflow-hidden bg-white shadow hover:shadow-md transition"
               title={p.filename}
             >
-              <img src={src} alt={p.filename} className="w-full h-40 object-cover" />
+              <img
+                src={src}
+                alt={p.filename}
+                width={p.width ?? undefined}
+                height={p.height ?? undefined}
+                style={placeholderStyle(p)}
+                className="w-full h-40 object-cover"
+              />
             </a>
           );
         })}
@@ -2,9 +2,10 @@
 import { useEffect, useMemo, useState } from "react";
 import { useParams, Link, useNavigate } from "react-router-dom";
 import { BASE_URL } from "../../utils/api";
+import { placeholderStyle, type PhotoMeta } from "../../utils/placeholder";
 
 type Album = { id: number; name: string };
-type Photo = {
+type Photo = PhotoMeta & {
   id: number;
   filename: string;
   filepath: string;
@@ -320,6 +321,9 @@ export default function SharedEvent() {
                 // pass the public share token so /uploads authorizes the file
                 src={`${IMG_BASE}/uploads/${p.filepath}?t=${encodeURIComponent(shareToken!)}`}
                 alt={p.filename}
+                width={p.width ?? undefined}
+                height={p.height ?? undefined}
+                style={placeholderStyle(p)}
                 className="w-full h-44 object-cover"
                 loading="lazy"
               />
@@ -35,12 +35,17 @@ const noCacheFetch = (url: string, init: RequestInit = {}) =>
     },
   });
 
+// Guest identity for this link: the server hands out a guest_key with the first
+// comment; sending it back keeps later comments under the same guest.
+const guestKeyItem = (token: string) => `guest_key:${token}`;
+
 export default function SharedPhoto() {
   const { token } = useParams(); // from /shared/photo/:token
 
   const [photo, setPhoto] = useState<Photo | null>(null);
   const [canComment, setCanComment] = useState<boolean>(false);
   const [comments, setComments] = useState<Comment[]>([]);
+  const [commentsCursor, setCommentsCursor] = useState<string | null>(null);
   const [newComment, setNewComment] = useState<string>("");
   const [posting, setPosting] = useState<boolean>(false);
   const [error, setError] = useState<string>("");
@@ -76,6 +81,7 @@ export default function SharedPhoto() {
         }
         const data = await res.json();
         setComments(data?.comments || []);
+        setCommentsCursor(data?.next_cursor || null);
       } catch {
         /* ignore comment load errors on public page */
       }
@@ -83,16 +89,38 @@ export default function SharedPhoto() {
     loadComments();
   }, [token, photo?.id]);
 
+  const loadMoreComments = async () => {
+    if (!token || !photo?.id || !commentsCursor) return;
+    try {
+      const res = await noCacheFetch(
+        `${BASE_URL}/photos/${photo.id}/comments?t=${encodeURIComponent(token)}&after=${encodeURIComponent(commentsCursor)}`
+      );
+      if (!res.ok) return;
+      const data = await res.json();
+      setComments((prev) => {
+        const seen = new Set(prev.map((c) => c.id));
+        return [...prev, ...((data?.comments || []) as Comment[]).filter((c) => !seen.has(c.id))];
+      });
+      setCommentsCursor(data?.next_cursor || null);
+    } catch {
+      /* ignore comment load errors on public page */
+    }
+  };
+
   const handlePost = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!token || !photo?.id || !newComment.trim() || posting) return;
     try {
       setPosting(true);
+      const guestKey = localStorage.getItem(guestKeyItem(token));
       const res = await fetch(
         `${BASE_URL}/photos/${photo.id}/comments?t=${encodeURIComponent(token)}`,
         {
           method: "POST",
-          headers: { "Content-Type": "application/json" },
+          headers: {
+            "Content-Type": "application/json",
+            ...(guestKey ? { "X-Guest-Key": guestKey } : {}),
+          },
           credentials: "omit",
           body: JSON.stringify({ content: newComment.trim() }),
         }
@@ -101,9 +129,10 @@ export default function SharedPhoto() {
       if (!res.ok) {
         throw new Error((data as any)?.msg || "Failed to post comment");
       }
-      // Append newly created comment
+      if (data?.guest_key) localStorage.setItem(guestKeyItem(token), data.guest_key);
+      // Append newly created comment, unless older pages are still to load (it comes with the last one)
       if (data?.comment) {
-        setComments((prev) => [...prev, data.comment as Comment]);
+        if (!commentsCursor) setComments((prev) => [...prev, data.comment as Comment]);
       } else {
         // Fallback: refetch the list
         const r2 = await noCacheFetch(
@@ -164,6 +193,15 @@ export default function SharedPhoto() {
             ))}
           </ul>
         )}
+        {commentsCursor && (
+          <button
+            type="button"
+            onClick={loadMoreComments}
+            className="text-sm text-[var(--primary)] hover:underline mb-4"
+          >
+            Load more comments
+          </button>
+        )}
 
         {canComment ? (
           <form onSubmit={handlePost} className="flex gap-2">
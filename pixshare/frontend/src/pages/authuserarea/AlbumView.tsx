@@ -1,8 +1,10 @@
 import { useState, useEffect, useRef } from "react";
 import { useParams, Link, useNavigate } from "react-router-dom";
 import { BASE_URL, PHOTO_BASE_URL } from "../../utils/api";
+import { placeholderStyle, type PhotoMeta } from "../../utils/placeholder";
+import { sha256Hex } from "../../utils/hash";
 
-type Photo = {
+type Photo = PhotoMeta & {
   id: number;
   filename: string;
   filepath: string;
@@ -106,6 +108,53 @@ export default function AlbumView() {
     );
   };
 
+  // Ask the server which files it already has (same bytes in this album, or
+  // in another of our albums, which it links instead). Returns the files that
+  // still need sending plus any photos created by linking; if hashing or a
+  // pre-check request fails, the files not yet checked are all sent.
+  const PRECHECK_BATCH = 1000;
+  const HASH_CONCURRENCY = 3; // each hash holds a whole file in memory
+  const hashAll = async (files: File[]): Promise<(string | null)[]> => {
+    const out: (string | null)[] = new Array(files.length).fill(null);
+    let next = 0;
+    const worker = async () => {
+      while (next < files.length) {
+        const k = next++;
+        out[k] = await sha256Hex(files[k]);
+      }
+    };
+    await Promise.all(Array.from({ length: Math.min(HASH_CONCURRENCY, files.length) }, worker));
+    return out;
+  };
+  const precheck = async (files: File[]): Promise<{ toSend: File[]; linked: Photo[] }> => {
+    const toSend: File[] = [];
+    const linked: Photo[] = [];
+    let i = 0;
+    try {
+      for (; i < files.length; i += PRECHECK_BATCH) {
+        const batch = files.slice(i, i + PRECHECK_BATCH);
+        const hashes = await hashAll(batch);
+        if (hashes.some((h) => !h)) break;
+        const res = await fetch(`${BASE_URL}/albums/${albumId}/photos/precheck`, {
+          method: "POST",
+          headers: { ...authHeaders(), "Content-Type": "application/json" },
+          body: JSON.stringify({
+            files: batch.map((f, k) => ({ name: f.name, size: f.size, sha256: hashes[k] })),
+          }),
+        });
+        if (!res.ok) break;
+        const data = await res.json();
+        (data.results || []).forEach((r: { status: string }, k: number) => {
+          if (r.status === "upload") toSend.push(batch[k]);
+        });
+        linked.push(...(data.photos || []));
+      }
+    } catch (err) {
+      console.warn("Upload pre-check failed; sending the remaining files:", err);
+    }
+    return { toSend: [...toSend, ...files.slice(i)], linked };
+  };
+
   // Handles both files and folder uploads
   const uploadFiles = async (files: File[]) => {
     if (!files.length || !ensureAuthed()) return;
@@ -117,11 +166,14 @@ export default function AlbumView() {
       return;
     }
 
-    const formData = new FormData();
-    clean.forEach((file) => formData.append("photos", file));
-
     try {
       setUploading(true);
+      const { toSend, linked } = await precheck(clean);
+      if (linked.length) setPhotos((prev) => [...prev, ...linked]);
+      if (toSend.length === 0) return;
+
+      const formData = new FormData();
+      toSend.forEach((file) => formData.append("photos", file));
       const res = await fetch(`${BASE_URL}/albums/${albumId}/photos`, {
         method: "POST",
         headers: authHeaders(),
@@ -362,6 +414,9 @@ export default function AlbumView() {
                 <img
                   src={`${PHOTO_BASE_URL}/uploads/${photo.filepath}${ownerImgQS}`}
                   alt={photo.filename}
+                  width={photo.width ?? undefined}
+                  height={photo.height ?? undefined}
+                  style={placeholderStyle(photo)}
                   className="max-h-full max-w-full object-contain"
                   loading="lazy"
                 />
@@ -7,12 +7,7 @@ type Album = {
   name: string;
 };
 
-type EventItem = {
-  id: number;
-  name: string;
-  shareId?: string | null;
-};
-
+// Same shape as GET /api/events items; only what the dashboard shows
 type EventCard = {
   id: number;
   name: string;
@@ -22,7 +17,7 @@ type EventCard = {
 const noCache = (url: string) => `${url}${url.includes("?") ? "&" : "?"}_=${Date.now()}`;
 
 export default function Dashboard() {
-  const [albums, setAlbums] = useState<Album[]>([]);
+  const [recentAlbums, setRecentAlbums] = useState<Album[]>([]);
   const [recentEvents, setRecentEvents] = useState<EventCard[]>([]);
   const [storageUsed, setStorageUsed] = useState<number>(0);
   const [storageLimit, setStorageLimit] = useState<number>(10);
@@ -56,41 +51,20 @@ export default function Dashboard() {
     return token && token !== "undefined" ? `${base}?a=${encodeURIComponent(token)}` : base;
   };
 
-  const fetchAlbums = async () => {
+  // One request for everything on this page (GET /api/bootstrap): profile,
+  // storage, albums and events with their cover photos
+  const fetchBootstrap = async () => {
     if (!ensureAuthOrRedirect()) return;
     try {
-      const res = await fetch(noCache(`${BASE_URL}/albums`), {
-        headers: authHeader,
-        credentials: "omit",
-        cache: "no-store",
-      });
-      if (!res.ok) {
-        if (handleAuthError(res.status)) return;
-        let msg = "Failed to fetch albums";
-        try {
-          const j = await res.json();
-          msg = j?.msg || msg;
-        } catch {}
-        throw new Error(msg);
-      }
-      const data = await res.json();
-      setAlbums(data.albums || []);
-    } catch (err) {
-      console.error("Failed to fetch dashboard albums:", err);
-    }
-  };
-
-  const fetchStorage = async () => {
-    if (!ensureAuthOrRedirect()) return;
-    try {
-      const res = await fetch(noCache(`${BASE_URL}/dashboard/storage`), {
+      setLoadingEvents(true);
+      const res = await fetch(noCache(`${BASE_URL}/bootstrap?events_limit=3`), {
         headers: authHeader,
         credentials: "omit",
         cache: "no-store",
       });
       if (!res.ok) {
         if (handleAuthError(res.status)) return;
-        let msg = "Failed to fetch storage";
+        let msg = "Failed to load dashboard";
         try {
           const j = await res.json();
           msg = j?.msg || msg;
@@ -98,71 +72,12 @@ export default function Dashboard() {
         throw new Error(msg);
       }
       const data = await res.json();
-      setStorageUsed(Number(data.used_gb || 0));
-      setStorageLimit(Number(data.limit_gb || 10));
-    } catch (err) {
-      console.error("Failed to fetch storage:", err);
-    }
-  };
-
-  // Fetch recent 3 events and derive a cover image (first album's first photo)
-  const fetchRecentEventsWithCovers = async () => {
-    if (!ensureAuthOrRedirect()) return;
-    try {
-      setLoadingEvents(true);
-      const listRes = await fetch(noCache(`${BASE_URL}/events`), {
-        headers: authHeader,
-        credentials: "omit",
-        cache: "no-store",
-      });
-      if (!listRes.ok) {
-        if (handleAuthError(listRes.status)) return;
-        let msg = "Failed to fetch events";
-        try {
-          const j = await listRes.json();
-          msg = j?.msg || msg;
-        } catch {}
-        throw new Error(msg);
-      }
-      const listData = await listRes.json();
-      const recent = (listData.events || []).slice(0, 3) as EventItem[];
-
-      const withCovers = await Promise.all(
-        recent.map(async (ev): Promise<EventCard> => {
-          try {
-            const evRes = await fetch(noCache(`${BASE_URL}/events/${ev.id}`), {
-              headers: authHeader,
-              credentials: "omit",
-              cache: "no-store",
-            });
-            if (!evRes.ok) throw new Error("event detail failed");
-            const evData = await evRes.json();
-            const albums: { id: number; name: string }[] = evData?.event?.albums || [];
-            if (!albums.length) return { id: ev.id, name: ev.name, coverPath: null };
-
-            const firstAlbumId = albums[0].id;
-            const phRes = await fetch(noCache(`${BASE_URL}/albums/${firstAlbumId}/photos`), {
-              headers: authHeader,
-              credentials: "omit",
-              cache: "no-store",
-            });
-            if (!phRes.ok) throw new Error("album photos failed");
-            const phData = await phRes.json();
-            const firstPhoto = (phData.photos || [])[0];
-            return {
-              id: ev.id,
-              name: ev.name,
-              coverPath: firstPhoto ? firstPhoto.filepath : null,
-            };
-          } catch {
-            return { id: ev.id, name: ev.name, coverPath: null };
-          }
-        })
-      );
-
-      setRecentEvents(withCovers);
+      setRecentAlbums(data.recent_albums || []);
+      setStorageUsed(Number(data.storage?.used_gb || 0));
+      setStorageLimit(Number(data.storage?.limit_gb || 10));
+      setRecentEvents((data.events || []).slice(0, 3));
     } catch (err) {
-      console.error("Failed to fetch recent events:", err);
+      console.error("Failed to load dashboard:", err);
       setRecentEvents([]);
     } finally {
       setLoadingEvents(false);
@@ -170,13 +85,10 @@ export default function Dashboard() {
   };
 
   useEffect(() => {
-    fetchAlbums();
-    fetchStorage();
-    fetchRecentEventsWithCovers();
+    fetchBootstrap();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
-  const recentAlbums = albums.slice(-3).reverse();
   const pct =
     storageLimit > 0 ? Math.min(100, Math.round((storageUsed / storageLimit) * 100)) : 0;
 
@@ -1,6 +1,7 @@
 import { useEffect, useMemo, useRef, useState } from "react";
 import { useNavigate, useParams, Link } from "react-router-dom";
 import { BASE_URL, PHOTO_BASE_URL } from "../../utils/api";
+import { placeholderStyle, type PhotoMeta } from "../../utils/placeholder";
 
 type Album = { id: number; name: string; photo_count?: number };
 type EventDetails = {
@@ -12,7 +13,7 @@ type EventDetails = {
   shareId?: string | null;
 };
 
-type Photo = {
+type Photo = PhotoMeta & {
   id: number;
   filename: string;
   filepath: string;   // relative path under /uploads
@@ -139,45 +140,36 @@ export default function EventView() {
     }
   };
 
-  // Fetch photos for all albums inside this event
+  // Fetch photos for all albums inside this event (single request)
   const fetchEventPhotos = async (albums: Album[]) => {
     if (!ensureAuthed()) return;
-    if (!albums || albums.length === 0) {
+    if (!eventId || !albums || albums.length === 0) {
       setEventPhotos([]);
       return;
     }
     setPhotosLoading(true);
     try {
-      const results = await Promise.all(
-        albums.map(async (a) => {
-          const res = await fetch(noCache(`${BASE_URL}/albums/${a.id}/photos`), {
-            headers: {
-              "Cache-Control": "no-cache",
-              Pragma: "no-cache",
-              ...authHeaders(),
-            },
-            cache: "no-store",
-          });
-          if (!res.ok) {
-            if (handleAuthError(res.status)) return [] as Photo[];
-            try {
-              const data = await res.json();
-              console.warn("Album photos fetch failed:", a.id, data?.msg || res.statusText);
-            } catch {
-              console.warn("Album photos fetch failed:", a.id, res.statusText);
-            }
-            return [] as Photo[];
-          }
+      const res = await fetch(noCache(`${BASE_URL}/events/${eventId}/photos`), {
+        headers: {
+          "Cache-Control": "no-cache",
+          Pragma: "no-cache",
+          ...authHeaders(),
+        },
+        cache: "no-store",
+      });
+      if (!res.ok) {
+        if (handleAuthError(res.status)) return;
+        try {
           const data = await res.json();
-          const withAlbum = (data.photos || []).map((p: Photo) => ({
-            ...p,
-            album_id: a.id,
-          }));
-          return withAlbum as Photo[];
-        })
-      );
-      const merged = results.flat();
-      setEventPhotos(merged);
+          console.warn("Event photos fetch failed:", data?.msg || res.statusText);
+        } catch {
+          console.warn("Event photos fetch failed:", res.statusText);
+        }
+        setEventPhotos([]);
+        return;
+      }
+      const data = await res.json();
+      setEventPhotos((data.photos || []) as Photo[]);
     } catch (e) {
       console.error("fetchEventPhotos error:", e);
       setEventPhotos([]);
@@ -530,6 +522,9 @@ export default function EventView() {
                 <img
                   src={imgUrl(p.filepath)}
                   alt={p.filename}
+                  width={p.width ?? undefined}
+                  height={p.height ?? undefined}
+                  style={placeholderStyle(p)}
                   className="w-full h-44 object-cover"
                   loading="lazy"
                 />
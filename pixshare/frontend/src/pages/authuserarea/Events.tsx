@@ -7,22 +7,21 @@ type EventItem = {
   id: number;
   name: string;
   shareId?: string | null;
-};
-
-type EventMeta = {
-  coverPath: string | null;
-  photoCount: number;
+  role?: "owner" | "participant";
+  photoCount?: number;
+  albumCount?: number;
+  coverPath?: string | null;
 };
 
 const noCache = (url: string) => `${url}${url.includes("?") ? "&" : "?"}_=${Date.now()}`;
 
 export default function Events() {
   const [events, setEvents] = useState<EventItem[]>([]);
-  const [meta, setMeta] = useState<Record<number, EventMeta>>({});
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [eventName, setEventName] = useState("");
   const [creating, setCreating] = useState(false);
   const [deletingId, setDeletingId] = useState<number | null>(null);
-  const [loadingMeta, setLoadingMeta] = useState(false);
 
   const navigate = useNavigate();
 
@@ -57,10 +56,13 @@ export default function Events() {
     return true;
   };
 
-  const fetchEvents = async () => {
+  // Each page already carries counts + cover, so no per-event follow-up requests
+  const fetchEvents = async (cursor: string | null = null) => {
     if (!ensureAuthed()) return;
     try {
-      const res = await fetch(noCache(`${BASE_URL}/events`), {
+      if (cursor) setLoadingMore(true);
+      const qs = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const res = await fetch(noCache(`${BASE_URL}/events${qs}`), {
         headers: authHeaders(),
         credentials: "omit",
         cache: "no-store",
@@ -76,68 +78,12 @@ export default function Events() {
       }
       const data = await res.json();
       const list: EventItem[] = data.events || [];
-      setEvents(list);
+      setEvents((prev) => (cursor ? [...prev, ...list] : list));
+      setNextCursor(data.next_cursor || null);
     } catch (err) {
       console.error("Failed to fetch events", err);
-    }
-  };
-
-  // Load preview cover + photoCount for each event
-  const fetchEventMeta = async (list: EventItem[]) => {
-    if (!ensureAuthed()) return;
-    if (!list.length) {
-      setMeta({});
-      return;
-    }
-    setLoadingMeta(true);
-    try {
-      const entries = await Promise.all(
-        list.map(async (ev) => {
-          try {
-            // 1) event detail -> albums
-            const evRes = await fetch(noCache(`${BASE_URL}/events/${ev.id}`), {
-              headers: authHeaders(),
-              credentials: "omit",
-              cache: "no-store",
-            });
-            if (!evRes.ok) throw new Error("event detail failed");
-            const evData = await evRes.json();
-            const albums: { id: number; name: string; photo_count?: number }[] =
-              evData?.event?.albums || [];
-
-            const photoCount = albums.reduce(
-              (sum, a) => sum + (typeof a.photo_count === "number" ? a.photo_count : 0),
-              0
-            );
-
-            // 2) find first album with a photo -> cover
-            let coverPath: string | null = null;
-            for (const a of albums) {
-              const phRes = await fetch(noCache(`${BASE_URL}/albums/${a.id}/photos`), {
-                headers: authHeaders(),
-                credentials: "omit",
-                cache: "no-store",
-              });
-              if (!phRes.ok) continue;
-              const phData = await phRes.json();
-              const first = (phData.photos || [])[0];
-              if (first?.filepath) {
-                coverPath = first.filepath as string;
-                break;
-              }
-            }
-            return [ev.id, { coverPath, photoCount }] as const;
-          } catch {
-            return [ev.id, { coverPath: null, photoCount: 0 }] as const;
-          }
-        })
-      );
-      setMeta(Object.fromEntries(entries));
-    } catch (e) {
-      console.warn("Cover/metadata loading failed:", e);
-      setMeta({});
     } finally {
-      setLoadingMeta(false);
+      setLoadingMore(false);
     }
   };
 
@@ -161,8 +107,6 @@ export default function Events() {
       const created = (data as any).event as EventItem;
       setEvents((prev) => [created, ...prev]);
       setEventName("");
-      // load meta for the new one
-      fetchEventMeta([created]);
     } catch (err) {
       console.error("Create failed", err);
     } finally {
@@ -197,11 +141,6 @@ export default function Events() {
       }
       // Update UI
       setEvents((prev) => prev.filter((e) => e.id !== eventId));
-      setMeta((prev) => {
-        const copy = { ...prev };
-        delete copy[eventId];
-        return copy;
-      });
     } catch (err) {
       console.error("Delete failed", err);
       alert((err as Error).message || "Delete failed");
@@ -219,11 +158,6 @@ export default function Events() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
-  useEffect(() => {
-    if (events.length) fetchEventMeta(events);
-    // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [events.map((e) => e.id).join(",")]);
-
   const onKeyDownCreate = (e: React.KeyboardEvent<HTMLInputElement>) => {
     if (e.key === "Enter") {
       e.preventDefault();
@@ -262,10 +196,9 @@ export default function Events() {
       ) : (
         <div className="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 gap-4">
           {events.map((ev) => {
-            const m = meta[ev.id];
             const coverUrl =
-              m?.coverPath ? `${PHOTO_BASE_URL}/uploads/${m.coverPath}${ownerImgQS()}` : null;
-            const count = m?.photoCount ?? 0;
+              ev.coverPath ? `${PHOTO_BASE_URL}/uploads/${ev.coverPath}${ownerImgQS()}` : null;
+            const count = ev.photoCount ?? 0;
 
             return (
               <div key={ev.id} className="rounded overflow-hidden shadow bg-white">
@@ -279,7 +212,7 @@ export default function Events() {
                     />
                   ) : (
                     <div className="w-full h-40 md:h-48 bg-gray-100 text-gray-500 flex items-center justify-center text-sm">
-                      {loadingMeta ? "Loading…" : "No cover image"}
+                      No cover image
                     </div>
                   )}
                 </Link>
@@ -310,6 +243,18 @@ export default function Events() {
           })}
         </div>
       )}
+
+      {nextCursor && (
+        <div className="mt-6 flex justify-center">
+          <button
+            onClick={() => fetchEvents(nextCursor)}
+            disabled={loadingMore}
+            className="px-4 py-2 rounded border text-[var(--secondary)] hover:bg-gray-50 disabled:opacity-60"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </main>
   );
 }
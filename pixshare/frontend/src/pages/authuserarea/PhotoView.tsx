@@ -2,7 +2,13 @@ import { useState, useEffect, useRef } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { BASE_URL, PHOTO_BASE_URL } from "../../utils/api";
 
-type Comment = { id: number; content: string; author: string; created_at: string };
+type Comment = {
+  id: number;
+  content: string;
+  author: string;
+  author_type?: "user" | "guest";
+  created_at: string;
+};
 type Photo = { id: number; filename: string; filepath: string; uploaded_at: string };
 
 export default function PhotoView() {
@@ -11,6 +17,7 @@ export default function PhotoView() {
 
   const [photo, setPhoto] = useState<Photo | null>(null);
   const [comments, setComments] = useState<Comment[]>([]);
+  const [commentsCursor, setCommentsCursor] = useState<string | null>(null);
   const [newComment, setNewComment] = useState("");
 
   // Share UI
@@ -84,6 +91,7 @@ export default function PhotoView() {
         }
         const data = await res.json();
         setComments(data.comments || []);
+        setCommentsCursor(data.next_cursor || null);
       } catch (err) {
         console.error("Failed to load comments:", err);
       }
@@ -94,6 +102,28 @@ export default function PhotoView() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [albumId, photoId]);
 
+  const loadMoreComments = async () => {
+    if (!commentsCursor || !ensureAuthed()) return;
+    try {
+      const res = await fetch(
+        noCache(`${BASE_URL}/photos/${photoId}/comments?after=${encodeURIComponent(commentsCursor)}`),
+        { method: "GET", headers: authHeaders(), cache: "no-store" }
+      );
+      if (!res.ok) {
+        if (handleAuthError(res.status)) return;
+        return;
+      }
+      const data = await res.json();
+      setComments((prev) => {
+        const seen = new Set(prev.map((c) => c.id));
+        return [...prev, ...(data.comments || []).filter((c: Comment) => !seen.has(c.id))];
+      });
+      setCommentsCursor(data.next_cursor || null);
+    } catch (err) {
+      console.error("Failed to load more comments:", err);
+    }
+  };
+
   const handleCommentSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!newComment.trim() || !ensureAuthed()) return;
@@ -110,7 +140,8 @@ export default function PhotoView() {
         console.error("Comment post failed:", data);
         return;
       }
-      setComments((prev) => [...prev, data.comment]);
+      // Oldest first: while older pages are unloaded, the new comment arrives with the last one
+      if (!commentsCursor) setComments((prev) => [...prev, data.comment]);
       setNewComment("");
     } catch (err) {
       console.error("Comment post error:", err);
@@ -290,6 +321,15 @@ export default function PhotoView() {
                 <li className="text-sm text-gray-500">No comments yet.</li>
               )}
             </ul>
+            {commentsCursor && (
+              <button
+                type="button"
+                onClick={loadMoreComments}
+                className="text-sm text-[var(--primary)] hover:underline mb-4"
+              >
+                Load more comments
+              </button>
+            )}
 
             <form onSubmit={handleCommentSubmit} className="flex gap-2">
               <input
@@ -0,0 +1,8 @@
+// SHA-256 of a file as lowercase hex, the same digest the backend stores in
+// Photo.checksum (backend utils/checksums.py). Needs a secure context
+// (https or localhost); returns null where SubtleCrypto isn't available.
+export const sha256Hex = async (file: Blob): Promise<string | null> => {
+  if (!globalThis.crypto?.subtle) return null;
+  const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+};
@@ -0,0 +1,19 @@
+import type { CSSProperties } from "react";
+
+// Listing payloads carry width/height and a tiny inline preview per photo
+// (see backend utils/imaging.py). Paint the preview behind the <img> so the
+// grid is filled before the real image arrives.
+export type PhotoMeta = {
+  width?: number | null;
+  height?: number | null;
+  placeholder?: string | null;
+};
+
+export const placeholderStyle = (p: PhotoMeta): CSSProperties | undefined =>
+  p.placeholder
+    ? {
+        backgroundImage: `url(${p.placeholder})`,
+        backgroundSize: "cover",
+        backgroundPosition: "center",
+      }
+    : undefined;
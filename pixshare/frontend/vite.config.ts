@@ -19,6 +19,8 @@ function getLocalExternalIP() {
 
 const localIP = getLocalExternalIP();
 const backendURL = `http://${localIP}:5172`; // dynamically use your LAN IP
+// Optional: route /uploads to the async media server (backend/media_server.py)
+const mediaURL = process.env.VITE_MEDIA_PROXY || backendURL;
 
 export default defineConfig({
   plugins: [react(), tailwindcss()],
@@ -32,7 +34,7 @@ export default defineConfig({
         secure: false,
       },
       '/uploads': {
-        target: backendURL,
+        target: mediaURL,
         changeOrigin: true,
         secure: false,
       },